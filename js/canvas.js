@@ -18,6 +18,78 @@
     // Redraw on load/resize when appropriate
     W.addEventListener('load', resizeMainCanvas);
 
+    // Background mipmaps: W.MAFFIE._bgLevels holds the current background at
+    // several sizes, largest first ({ width, height, image, url }). A redraw
+    // draws the smallest level that still covers the background's size on the
+    // canvas, so slider redraws resample about as many pixels as the canvas
+    // has rather than the whole photo. Levels come from a prebuilt pyramid
+    // (tools/mipmap_backgrounds.py, MAFFIE.setBackgroundPyramid) or are built
+    // once by halving an uploaded image (buildBackgroundLevels).
+    const MIN_LEVEL_EDGE = 256;
+    const PYRAMID_VERSION = 1;
+
+    // The levels of bg, or null (levels left over from another image are ignored)
+    function backgroundLevels(bg) {
+        const levels = W.MAFFIE && W.MAFFIE._bgLevels;
+        return levels && levels.some(level => level.image === bg) ? levels : null;
+    }
+
+    function pickBackgroundLevel(bg, levels, dw, dh) {
+        if (!levels) return bg;
+        let wanted = null;
+        let best = null;
+        for (const level of levels) {
+            if (level.width < dw || level.height < dh) break;
+            wanted = level;
+            if (level.image) best = level;
+        }
+        // zoomed past full size: nothing covers, the full-size level is wanted
+        if (!wanted) wanted = levels[0];
+        if (!wanted.image) loadBackgroundLevel(wanted, levels);
+        if (best) return best.image;
+        // nothing loaded covers it yet: use the largest loaded level meanwhile
+        const loaded = levels.find(level => level.image);
+        return loaded ? loaded.image : bg;
+    }
+
+    // Load (and decode, off the redraw path) one level of a prebuilt pyramid
+    function loadBackgroundLevel(level, levels) {
+        if (level.loading || !level.url) return;
+        level.loading = true;
+        const img = new Image();
+        img.src = level.url;
+        img.decode().then(() => {
+            level.image = img;
+            if (W.MAFFIE && W.MAFFIE._bgLevels === levels) redrawCanvas();
+        }, (e) => {
+            level.url = null;
+            console.warn('Failed to load background level:', e);
+        }).then(() => { level.loading = false; });
+    }
+
+    // Halve an uploaded image down to MIN_LEVEL_EDGE; the original is level 0
+    async function buildBackgroundLevels(img) {
+        let w = img.naturalWidth || img.width;
+        let h = img.naturalHeight || img.height;
+        const levels = [{ width: w, height: h, image: img, url: null }];
+        if (typeof W.createImageBitmap !== 'function') return levels;
+        let src = img;
+        while (Math.max(Math.ceil(w / 2), Math.ceil(h / 2)) >= MIN_LEVEL_EDGE) {
+            w = Math.ceil(w / 2);
+            h = Math.ceil(h / 2);
+            src = await W.createImageBitmap(src, { resizeWidth: w, resizeHeight: h, resizeQuality: 'high' });
+            levels.push({ width: w, height: h, image: src, url: null });
+        }
+        return levels;
+    }
+
+    function releaseBackgroundLevels(levels) {
+        if (!levels) return;
+        levels.forEach(level => {
+            if (level.image && typeof level.image.close === 'function') level.image.close();
+        });
+    }
+
     // Draw an optional background image (scaled to fill) onto the provided canvas.
     function drawBackgroundOnCanvas(canvas) {
         if (!canvas) return;
@@ -25,9 +97,11 @@
         if (!ctx) return;
         const bg = (W.MAFFIE && W.MAFFIE._bgImage) ? W.MAFFIE._bgImage : null;
         if (!bg) return;
-        // image may be an HTMLImageElement or ImageBitmap
-        const imgW = bg.naturalWidth || bg.width || 0;
-        const imgH = bg.naturalHeight || bg.height || 0;
+        // image may be an HTMLImageElement or ImageBitmap; with levels, the
+        // geometry comes from the full-size level
+        const levels = backgroundLevels(bg);
+        const imgW = levels ? levels[0].width : (bg.naturalWidth || bg.width || 0);
+        const imgH = levels ? levels[0].height : (bg.naturalHeight || bg.height || 0);
         if (!imgW || !imgH) return;
         // scale to cover (fill) the canvas, then apply user scaler (percent)
         const coverScale = Math.max(canvas.width / imgW, canvas.height / imgH);
@@ -46,7 +120,7 @@
         const dy = (canvas.height - dh) / 2 + (offset.y || 0);
         try {
             ctx.save();
-            ctx.drawImage(bg, dx, dy, dw, dh);
+            ctx.drawImage(pickBackgroundLevel(bg, levels, dw, dh), dx, dy, dw, dh);
             ctx.restore();
         } catch (e) {
             console.warn('Failed to draw background image:', e);
@@ -92,9 +166,218 @@
 
     // parsePoints moved to W.UTILS.parsePoints
 
-    // Draw parsed SVG onto a canvas using canvas API (vector path conversion)
+    // Render bookkeeping: every draw gets a sequence number and, when it
+    // finishes (successfully or not), a 'maffie:rendered' event is dispatched
+    // with { seq, pending, path, ms }. Tests and tools wait on this instead of
+    // sleeping. Each render is also timed with performance.mark/measure; the
+    // measure is named after the path taken ('maffie:render:raster',
+    // 'maffie:render:vector' or 'maffie:render:background').
+    const renders = { requested: 0, completed: 0, pending: 0 };
+    let idleWaiters = [];
+    // 'auto' tries the raster (Blob/Image) path first; 'vector' skips it
+    let renderPath = 'auto';
+    // keep the performance timeline bounded in long sessions
+    const MAX_MEASURES = 500;
+
+    function beginRender() {
+        renders.requested += 1;
+        renders.pending += 1;
+        const seq = renders.requested;
+        try { W.performance.mark('maffie:render:' + seq); } catch (e) { /* ignore */ }
+        return seq;
+    }
+
+    function measureRender(seq, path) {
+        const start = 'maffie:render:' + seq;
+        const name = 'maffie:render:' + path;
+        let ms = null;
+        try {
+            const entry = W.performance.measure(name, start) || W.performance.getEntriesByName(name).pop();
+            if (entry) ms = entry.duration;
+            if (W.performance.getEntriesByName(name).length > MAX_MEASURES) W.performance.clearMeasures(name);
+        } catch (e) { /* ignore */ }
+        try { W.performance.clearMarks(start); } catch (e) { /* ignore */ }
+        return ms;
+    }
+
+    function endRender(seq, path) {
+        const ms = measureRender(seq, path || 'none');
+        renders.pending -= 1;
+        renders.completed = Math.max(renders.completed, seq);
+        try {
+            const detail = { seq: seq, pending: renders.pending, path: path || null, ms: ms };
+            W.dispatchEvent(new CustomEvent('maffie:rendered', { detail: detail }));
+        } catch (e) { /* ignore */ }
+        if (renders.pending === 0) {
+            const waiters = idleWaiters;
+            idleWaiters = [];
+            waiters.forEach(resolve => resolve(renders.completed));
+        }
+    }
+
+    // Resolve (with the last completed sequence number) once no render is in flight
+    function whenIdle() {
+        if (renders.pending === 0) return Promise.resolve(renders.completed);
+        return new Promise(resolve => idleWaiters.push(resolve));
+    }
+
+    // Put the page back into its just-loaded state without reloading it: no
+    // background, scaler at its default, automatic render path, no draw lists,
+    // timing entries cleared and the first thumbnail selected and drawn.
+    // Resolves once that render has completed (or after RESET_TIMEOUT_MS).
+    // Used by tools that reuse a warm page between runs.
+    const RESET_TIMEOUT_MS = 10000;
+    const RENDER_PATHS = ['raster', 'vector', 'drawlist', 'background', 'none'];
+
+    function reset() {
+        const input = D.getElementById('additional-image-input');
+        const slider = D.getElementById('additional-image-scaler');
+        try { if (input) input.value = ''; } catch (e) { /* ignore */ }
+        if (slider) slider.value = slider.defaultValue || '100';
+        setBackground(null);
+        renderPath = 'auto';
+        drawLists.clear();
+        try { RENDER_PATHS.forEach(path => W.performance.clearMeasures('maffie:render:' + path)); } catch (e) { /* ignore */ }
+
+        const seen = renders.requested;
+        const first = D.querySelector('.thumb');
+        if (first) first.click();
+        else redrawCanvas();
+        return new Promise(resolve => {
+            const timer = setTimeout(done, RESET_TIMEOUT_MS);
+            function done() {
+                clearTimeout(timer);
+                W.removeEventListener('maffie:rendered', check);
+                resolve(renders.completed);
+            }
+            function check() {
+                if (renders.completed > seen && renders.pending === 0) done();
+            }
+            W.addEventListener('maffie:rendered', check);
+            check();
+        });
+    }
+
+    // Precompiled draw lists (tools/compile_drawlists.py), keyed by SVG text.
+    // An entry is registered with its URL and only fetched the first time the
+    // vector path needs it; after that the vector path replays the list
+    // instead of parsing and walking the SVG.
+    const drawLists = new Map();
+    const MAX_DRAW_LISTS = 16;
+    const DRAW_LIST_VERSION = 1;
+
+    function registerDrawList(svgText, url, list) {
+        if (!svgText) return;
+        let entry = drawLists.get(svgText);
+        if (!entry) {
+            if (!url && !list) return;
+            entry = { url: url || null, list: null, loading: false, failed: false };
+            drawLists.set(svgText, entry);
+            while (drawLists.size > MAX_DRAW_LISTS) drawLists.delete(drawLists.keys().next().value);
+        }
+        if (list) entry.list = list;
+    }
+
+    function requestDrawList(entry) {
+        if (!entry || !entry.url || entry.list || entry.loading || entry.failed) return;
+        entry.loading = true;
+        fetch(entry.url)
+            .then(res => {
+                if (!res.ok) throw new Error('Failed to fetch ' + entry.url + ' (' + res.status + ')');
+                return res.json();
+            })
+            .then(json => { entry.list = buildDrawList(json); })
+            .catch(e => {
+                entry.failed = true;
+                console.warn('Draw list unavailable, using the SVG vector path:', e);
+            })
+            .then(() => { entry.loading = false; });
+    }
+
+    // Decode the JSON draw list into typed arrays and one Path2D per shape
+    function buildDrawList(json) {
+        if (!json || json.version !== DRAW_LIST_VERSION) throw new Error('Unsupported draw list version');
+        const cmds = Uint8Array.from(json.cmds);
+        const coords = new Float32Array(json.coords.length);
+        let x = 0, y = 0;
+        for (let i = 0; i < coords.length; i += 2) {
+            x += json.coords[i];
+            y += json.coords[i + 1];
+            coords[i] = x * json.scale;
+            coords[i + 1] = y * json.scale;
+        }
+        const shapes = [];
+        let c = 0, k = 0;
+        for (let i = 0; i < json.ops.length; i += 2) {
+            const path = new Path2D();
+            const end = c + json.ops[i + 1];
+            for (; c < end; c++) {
+                switch (cmds[c]) {
+                    case 0: path.moveTo(coords[k], coords[k + 1]); k += 2; break;
+                    case 1: path.lineTo(coords[k], coords[k + 1]); k += 2; break;
+                    case 2: path.bezierCurveTo(coords[k], coords[k + 1], coords[k + 2], coords[k + 3], coords[k + 4], coords[k + 5]); k += 6; break;
+                    case 3: path.quadraticCurveTo(coords[k], coords[k + 1], coords[k + 2], coords[k + 3]); k += 4; break;
+                    default: path.closePath();
+                }
+            }
+            shapes.push({ style: json.styles[json.ops[i]], path: path });
+        }
+        return { width: json.width, height: json.height, shapes: shapes };
+    }
+
+    // Replay a decoded draw list; ctx is already translated/scaled to SVG units
+    function replayDrawList(list, ctx) {
+        list.shapes.forEach(shape => {
+            const fill = shape.style[0];
+            const stroke = shape.style[1];
+            if (fill) { ctx.fillStyle = fill; ctx.fill(shape.path); }
+            if (stroke) { ctx.lineWidth = shape.style[2]; ctx.strokeStyle = stroke; ctx.stroke(shape.path); }
+        });
+    }
+
+    // Size the canvas, clear it, draw the background and return the fit transform
+    function prepareFrame(canvas, svgW, svgH) {
+        // resize drawing buffer to canvas displayed size
+        resizeMainCanvas();
+        const ctx = canvas.getContext('2d');
+        // clear canvas and draw optional background image
+        ctx.clearRect(0, 0, canvas.width, canvas.height);
+        drawBackgroundOnCanvas(canvas);
+
+        // compute scaling to fit svg into canvas while preserving aspect
+        const sx = canvas.width / svgW;
+        const sy = canvas.height / svgH;
+        const scale = Math.min(sx, sy);
+        const tx = (canvas.width - svgW * scale) / 2;
+        const ty = (canvas.height - svgH * scale) / 2;
+        return { ctx: ctx, scale: scale, tx: tx, ty: ty };
+    }
+
     async function drawSvgOnCanvas(svgText, canvas) {
+        const seq = beginRender();
+        let path = null;
+        try {
+            path = await renderSvg(svgText, canvas);
+        } finally {
+            endRender(seq, path);
+        }
+    }
+
+    // Draw parsed SVG onto a canvas using canvas API (vector path conversion).
+    // Resolves with the path used ('raster', 'vector' or 'drawlist'), or
+    // undefined when nothing was drawn.
+    async function renderSvg(svgText, canvas) {
         if (!canvas) return;
+        const compiled = drawLists.get(svgText);
+        if (renderPath === 'vector' && compiled && compiled.list) {
+            const frame = prepareFrame(canvas, compiled.list.width, compiled.list.height);
+            frame.ctx.save();
+            frame.ctx.translate(frame.tx, frame.ty);
+            frame.ctx.scale(frame.scale, frame.scale);
+            replayDrawList(compiled.list, frame.ctx);
+            frame.ctx.restore();
+            return 'drawlist';
+        }
         const parser = new DOMParser();
         const doc = parser.parseFromString(svgText, 'image/svg+xml');
         const svg = doc.querySelector('svg');
@@ -115,65 +398,63 @@
             svgH = parseFloat(svg.getAttribute('height')) || svg.getBoundingClientRect().height || canvas.clientHeight;
         }
 
-        // resize drawing buffer to canvas displayed size
-        resizeMainCanvas();
-        const ctx = canvas.getContext('2d');
-        // clear canvas and draw optional background image
-        ctx.clearRect(0, 0, canvas.width, canvas.height);
-        drawBackgroundOnCanvas(canvas);
-
-        // compute scaling to fit svg into canvas while preserving aspect
-        const sx = canvas.width / svgW;
-        const sy = canvas.height / svgH;
-        const scale = Math.min(sx, sy);
-        const tx = (canvas.width - svgW * scale) / 2;
-        const ty = (canvas.height - svgH * scale) / 2;
+        const { ctx, scale, tx, ty } = prepareFrame(canvas, svgW, svgH);
 
         // Try a raster approach first: render the SVG into an offscreen Image
         // and draw it onto the canvas. This preserves fills, gradients,
         // filters and other paint servers that are hard to replicate via
         // Path2D. If this fails (older browsers / security restrictions),
         // fall back to the vector element-by-element drawing below.
-        try {
-            const svgBlob = new Blob([svgText], { type: 'image/svg+xml;charset=utf-8' });
-            const url = URL.createObjectURL(svgBlob);
-            await new Promise((resolve, reject) => {
-                const img = new Image();
-                // blob URLs are same-origin so no crossOrigin required
-                img.onload = () => {
-                    try {
-                        // compute destination rectangle in pixel coordinates
-                        const destW = svgW * scale;
-                        const destH = svgH * scale;
-                        const destX = tx;
-                        const destY = ty;
-                        // draw the rasterized SVG onto the canvas (on top of background)
-                        ctx.save();
-                        ctx.drawImage(img, destX, destY, destW, destH);
-                        ctx.restore();
-                        resolve();
-                    } catch (e) {
-                        reject(e);
-                    } finally {
+        if (renderPath !== 'vector') {
+            try {
+                const svgBlob = new Blob([svgText], { type: 'image/svg+xml;charset=utf-8' });
+                const url = URL.createObjectURL(svgBlob);
+                await new Promise((resolve, reject) => {
+                    const img = new Image();
+                    // blob URLs are same-origin so no crossOrigin required
+                    img.onload = () => {
+                        try {
+                            // compute destination rectangle in pixel coordinates
+                            const destW = svgW * scale;
+                            const destH = svgH * scale;
+                            const destX = tx;
+                            const destY = ty;
+                            // draw the rasterized SVG onto the canvas (on top of background)
+                            ctx.save();
+                            ctx.drawImage(img, destX, destY, destW, destH);
+                            ctx.restore();
+                            resolve();
+                        } catch (e) {
+                            reject(e);
+                        } finally {
+                            URL.revokeObjectURL(url);
+                        }
+                    };
+                    img.onerror = (ev) => {
                         URL.revokeObjectURL(url);
-                    }
-                };
-                img.onerror = (ev) => {
-                    URL.revokeObjectURL(url);
-                    reject(new Error('Failed to load rasterized SVG image'));
-                };
-                img.src = url;
-            });
-            // successfully drawn via drawImage; we're done
-            return;
-        } catch (e) {
-            console.warn('Raster drawImage approach failed, falling back to vector draw:', e);
+                        reject(new Error('Failed to load rasterized SVG image'));
+                    };
+                    img.src = url;
+                });
+                // successfully drawn via drawImage; we're done
+                return 'raster';
+            } catch (e) {
+                console.warn('Raster drawImage approach failed, falling back to vector draw:', e);
+            }
         }
 
         ctx.save();
         ctx.translate(tx, ty);
         ctx.scale(scale, scale);
 
+        if (compiled && compiled.list) {
+            replayDrawList(compiled.list, ctx);
+            ctx.restore();
+            return 'drawlist';
+        }
+        // fetch the compiled list (if registered) for the next redraw
+        requestDrawList(compiled);
+
         // recursive draw for supported elements
         function drawElement(el) {
             const tag = el.tagName && el.tagName.toLowerCase();
@@ -296,6 +577,7 @@
         Array.from(svg.children || []).forEach(child => drawElement(child));
 
         ctx.restore();
+        return 'vector';
     }
 
     // Export the minimal API under W.MAFFIE so other modules can call these functions
@@ -306,12 +588,28 @@
         _bgImage: null,
         // optional pan offset for background drawing (pixels)
         _bgOffset: null,
+        // the background at several sizes, largest first (see pickBackgroundLevel)
+        _bgLevels: null,
         resizeMainCanvas: resizeMainCanvas,
         drawSvgOnCanvas: drawSvgOnCanvas,
         setLastSvg(text) { this._lastSvgText = text; },
         getLastSvg() { return this._lastSvgText; },
         // request a redraw of the canvas (background and/or last SVG)
-        requestRedraw() { try { redrawCanvas(); } catch (e) { /* ignore */ } }
+        requestRedraw() { try { redrawCanvas(); } catch (e) { /* ignore */ } },
+        // render sequence state: { requested, completed, pending }
+        renderState() { return { requested: renders.requested, completed: renders.completed, pending: renders.pending }; },
+        whenIdle: whenIdle,
+        // restore the just-loaded state (no background, first thumbnail drawn); resolves after the render
+        reset: reset,
+        // 'vector' forces the element-by-element fallback (for benchmarks/debugging); 'auto' restores the default
+        setRenderPath(path) { renderPath = path === 'vector' ? 'vector' : 'auto'; },
+        // associate a compiled draw list URL with an SVG text (fetched lazily by the vector path)
+        registerDrawList(svgText, url) { registerDrawList(svgText, url); },
+        // install an already loaded draw list (parsed JSON) for an SVG text
+        setDrawList(svgText, json) { registerDrawList(svgText, null, buildDrawList(json)); },
+        // use a prebuilt background pyramid (index.json from tools/mipmap_backgrounds.py); resolves to the level count
+        setBackgroundPyramid: setBackgroundPyramid,
+        getRenderPath() { return renderPath; }
     };
 
     // Redraw helper used by multiple controls: draws background (if any)
@@ -323,13 +621,60 @@
         if (last) {
             drawSvgOnCanvas(last, canvas);
         } else {
-            resizeMainCanvas();
-            const ctx = canvas.getContext('2d');
-            ctx.clearRect(0, 0, canvas.width, canvas.height);
-            drawBackgroundOnCanvas(canvas);
+            const seq = beginRender();
+            let path = null;
+            try {
+                resizeMainCanvas();
+                const ctx = canvas.getContext('2d');
+                ctx.clearRect(0, 0, canvas.width, canvas.height);
+                drawBackgroundOnCanvas(canvas);
+                path = 'background';
+            } finally {
+                endRender(seq, path);
+            }
         }
     }
 
+    // Install (img null: remove) the background and its levels, update the
+    // related controls and notify other modules. The caller redraws.
+    function setBackground(img, levels) {
+        const previous = W.MAFFIE._bgLevels;
+        W.MAFFIE._bgImage = img || null;
+        W.MAFFIE._bgLevels = img ? (levels || null) : null;
+        // initialize pan offset (pixels) so image is centered
+        W.MAFFIE._bgOffset = img ? { x: 0, y: 0 } : null;
+        if (previous !== W.MAFFIE._bgLevels) releaseBackgroundLevels(previous);
+        const btn = D.getElementById('clear-additional-image');
+        const slider = D.getElementById('additional-image-scaler');
+        if (btn) btn.disabled = !img;
+        if (slider) slider.disabled = !img;
+        try { W.dispatchEvent(new Event('maffie:bgchange')); } catch (e) { /* ignore */ }
+    }
+
+    async function setBackgroundPyramid(indexUrl) {
+        const res = await fetch(indexUrl);
+        if (!res.ok) throw new Error('Failed to fetch ' + indexUrl + ': ' + res.status);
+        const index = await res.json();
+        if (!index || index.version !== PYRAMID_VERSION || !Array.isArray(index.levels) || !index.levels.length) {
+            throw new Error('Unsupported background pyramid: ' + indexUrl);
+        }
+        const base = new URL(indexUrl, W.location.href);
+        const levels = index.levels.map(level => ({
+            width: level.width, height: level.height, image: null, url: new URL(level.file, base).href
+        }));
+        // show the smallest level right away; the covering level loads on the first draw
+        const smallest = levels[levels.length - 1];
+        const img = new Image();
+        img.src = smallest.url;
+        await img.decode();
+        smallest.image = img;
+        const input = D.getElementById('additional-image-input');
+        try { if (input) input.value = ''; } catch (e) { /* ignore */ }
+        setBackground(img, levels);
+        redrawCanvas();
+        return levels.length;
+    }
+
     // Wire the 'Immagine Addizionale' file input to load an image and set it
     // as the canvas background (scaled to fill). This runs after MAFFIE is
     // exported so we can store the loaded image on W.MAFFIE._bgImage.
@@ -360,9 +705,7 @@
         input.addEventListener('change', (ev) => {
             const file = (ev.target && ev.target.files && ev.target.files[0]) || null;
             if (!file) {
-                if (W.MAFFIE) W.MAFFIE._bgImage = null;
-                if (btn) btn.disabled = true;
-                if (slider) slider.disabled = true;
+                setBackground(null);
                 redrawCanvas();
                 return;
             }
@@ -370,19 +713,23 @@
             const url = URL.createObjectURL(file);
             const img = new Image();
             img.onload = () => {
-                // store image and redraw
-                if (W.MAFFIE) {
-                    W.MAFFIE._bgImage = img;
-                    // initialize pan offset (pixels) so image is centered
-                    W.MAFFIE._bgOffset = { x: 0, y: 0 };
-                    // notify other modules that background changed
-                    try { window.dispatchEvent(new Event('maffie:bgchange')); } catch (e) { /* ignore */ }
-                }
-                if (btn) btn.disabled = false;
-                if (slider) slider.disabled = false;
+                // store image and redraw; the full-size image serves until its levels exist
+                setBackground(img, [{ width: img.naturalWidth, height: img.naturalHeight, image: img, url: null }]);
                 redrawCanvas();
                 // release blob URL; keep image in memory
                 URL.revokeObjectURL(url);
+                buildBackgroundLevels(img).then((levels) => {
+                    // the background may have changed while the levels were built
+                    if (W.MAFFIE._bgImage === img) {
+                        const previous = W.MAFFIE._bgLevels;
+                        W.MAFFIE._bgLevels = levels;
+                        releaseBackgroundLevels((previous || []).filter(level => level.image !== img));
+                    } else {
+                        releaseBackgroundLevels(levels);
+                    }
+                }, (e) => {
+                    console.warn('Failed to build background levels:', e);
+                });
             };
             img.onerror = (e) => {
                 console.error('Failed to load additional image:', e);
@@ -395,13 +742,7 @@
             btn.addEventListener('click', () => {
                 // clear input, remove background and redraw
                 try { input.value = ''; } catch (e) { /* ignore */ }
-                if (W.MAFFIE) {
-                    W.MAFFIE._bgImage = null;
-                    W.MAFFIE._bgOffset = null;
-                    try { window.dispatchEvent(new Event('maffie:bgchange')); } catch (e) { /* ignore */ }
-                }
-                btn.disabled = true;
-                if (slider) slider.disabled = true;
+                setBackground(null);
                 redrawCanvas();
             });
         }
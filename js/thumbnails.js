@@ -3,6 +3,88 @@
 
     // Uses global aliases from js/globals.js: W = window, D = document
 
+    // Optional pre-rendered sprite sheet built by tools/build_thumb_sprites.py.
+    // Opt-in through <meta name="maffie-sprites" content="thumbs/sprites.json">
+    // (added to build/index.html by tools/build_assets.py when the sheet
+    // exists): thumbnails are then painted from one shared image and the SVG
+    // is only fetched on click; that build moves the thumbnail urls to data-src
+    // so they are not loaded up front. Without the meta tag each <img> loads its
+    // SVG (src) right away and no sprite map is requested.
+    function spriteMapUrl() {
+        const meta = D.querySelector('meta[name="maffie-sprites"]');
+        return meta ? meta.getAttribute('content') : null;
+    }
+    // Optional draw lists built by tools/compile_drawlists.py, used by the
+    // canvas vector path (svgs/<name>.svg -> drawlists/<name>.json)
+    const DRAW_LIST_DIR = 'drawlists/';
+
+    // thumbnails keep their SVG url in data-src (src is only set on fallback)
+    function thumbSrc(img) {
+        return img.getAttribute('data-src') || img.getAttribute('src') || '';
+    }
+
+    function supportsWebp() {
+        try {
+            return D.createElement('canvas').toDataURL('image/webp').indexOf('data:image/webp') === 0;
+        } catch (e) {
+            return false;
+        }
+    }
+
+    // Replace each thumbnail <img> that has a cell in the sprite map with a
+    // sprite-backed element. Returns the images that still need their SVG.
+    function applySprites(map, url) {
+        const imgs = Array.from(D.querySelectorAll('.thumb img'));
+        if (!map || !map.items || !map.sheets) return imgs;
+        const base = url.replace(/[^/]*$/, '');
+        const sheets = (map.sheets.webp && supportsWebp()) ? map.sheets.webp : map.sheets.png;
+        const sheet = (W.devicePixelRatio || 1) > 1 && sheets['2x'] ? sheets['2x'] : sheets['1x'];
+        const cols = map.cols || 1;
+        const rows = map.rows || 1;
+        const remaining = [];
+        imgs.forEach(img => {
+            const item = map.items[thumbSrc(img)];
+            if (!item) {
+                remaining.push(img);
+                return;
+            }
+            const cell = D.createElement('span');
+            cell.className = 'thumb-sprite';
+            cell.setAttribute('role', 'img');
+            cell.setAttribute('aria-label', img.getAttribute('alt') || '');
+            cell.style.backgroundImage = 'url("' + base + sheet + '")';
+            cell.style.backgroundSize = (cols * 100) + '% ' + (rows * 100) + '%';
+            const px = cols > 1 ? item.col / (cols - 1) * 100 : 0;
+            const py = rows > 1 ? item.row / (rows - 1) * 100 : 0;
+            cell.style.backgroundPosition = px + '% ' + py + '%';
+            img.style.display = 'none';
+            img.parentNode.insertBefore(cell, img);
+        });
+        return remaining;
+    }
+
+    function loadThumbnails() {
+        const url = spriteMapUrl();
+        const mapLoaded = url
+            ? fetch(url).then(res => (res.ok ? res.json() : null)).catch(() => null)
+            : Promise.resolve(null);
+        return mapLoaded
+            .then(map => {
+                let remaining;
+                try {
+                    remaining = applySprites(map, url);
+                } catch (e) {
+                    console.warn('Failed to apply thumbnail sprites:', e);
+                    remaining = Array.from(D.querySelectorAll('.thumb img'));
+                }
+                // fall back to loading the SVG itself for thumbs without a sprite cell
+                remaining.forEach(img => {
+                    if (!img.getAttribute('src') && img.getAttribute('data-src')) img.src = img.getAttribute('data-src');
+                });
+                updateThumbHeights();
+            });
+    }
+
     function updateThumbHeights() {
         const main = D.getElementById('main-area');
         const thumbs = D.querySelectorAll('.thumb');
@@ -21,7 +103,7 @@
     async function onThumbClick(thumb) {
         const img = thumb.querySelector('img');
         if (!img) return;
-        const src = img.getAttribute('src') || '';
+        const src = thumbSrc(img);
         const name = src.split('/').pop();
         const base = name.replace(/\.[^/.]+$/, '');
 
@@ -47,6 +129,9 @@
             } else {
                 W._lastSvgText = svgText;
             }
+            if (W.MAFFIE && typeof W.MAFFIE.registerDrawList === 'function') {
+                W.MAFFIE.registerDrawList(svgText, DRAW_LIST_DIR + base + '.json');
+            }
             if (W.MAFFIE && typeof W.MAFFIE.drawSvgOnCanvas === 'function') {
                 W.MAFFIE.drawSvgOnCanvas(svgText, canvas);
             }
@@ -59,7 +144,7 @@
         D.querySelectorAll('.thumb').forEach(thumb => {
             const img = thumb.querySelector('img');
             if (!img) return;
-            const src = img.getAttribute('src') || '';
+            const src = thumbSrc(img);
             const name = src.split('/').pop();
             const base = name.replace(/\.[^/.]+$/, '');
             thumb.style.cursor = 'pointer';
@@ -73,6 +158,10 @@
         if (first) first.click();
     }
 
+    // start fetching the sprite map right away so the fallback <img> loads
+    // are not delayed until the window load event
+    loadThumbnails();
+
     W.addEventListener('load', () => {
         updateThumbHeights();
         wireThumbnails();
@@ -0,0 +1,35 @@
+"""Nearest-rank percentiles and viewport parsing shared by the tools."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+import common
+
+
+@pytest.mark.parametrize('n, pct, expected', [
+    (1, 50, 1), (1, 95, 1), (1, 100, 1),
+    (2, 50, 1), (2, 90, 2), (2, 100, 2),
+    (10, 50, 5), (10, 90, 9), (10, 95, 10), (10, 99, 10),
+    (20, 50, 10), (20, 90, 18), (20, 95, 19), (20, 99, 20), (20, 100, 20),
+])
+def test_percentile_nearest_rank(n, pct, expected):
+    values = list(range(n, 0, -1))
+    assert common.percentile(values, pct) == expected
+
+
+def test_percentile_empty():
+    assert common.percentile([], 50) is None
+
+
+def test_parse_viewports_ratios():
+    assert common.parse_viewports('1200x800, 800x600@2x,800x600@3x,400x300@1.5x') == [
+        (1200, 800, 1), (800, 600, 2), (800, 600, 3), (400, 300, 1.5)]
+    assert common.parse_viewports('800x600,800x600@2x', default_dpr=None) == [(800, 600, None), (800, 600, 2)]
+
+
+@pytest.mark.parametrize('spec', ['800', '800x600@2', '800x600@0x', 'axb', '800x600x2'])
+def test_parse_viewports_rejects(spec):
+    with pytest.raises(ValueError, match='bad viewport'):
+        common.parse_viewports(spec)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Benchmark drawSvgOnCanvas for every SVG across viewports and render paths.
+
+Requires: playwright (python -m pip install playwright; python -m playwright install)
+
+Usage:
+    python tools/bench_render.py                              # writes tools/bench_render.json
+    python tools/bench_render.py --baseline baseline.json     # also flag regressions
+
+Pages come from tools/warm_browser.py: leased from tools/browser_daemon.py
+when it is running, otherwise from a launched browser and an in-process
+tools/dev_server.py. For every SVG in svgs/
+and every --viewports entry, each scenario is run --warmup times and then
+--repeat times:
+
+- raster: MAFFIE.drawSvgOnCanvas with the default Blob/Image path
+- vector: the same with MAFFIE.setRenderPath('vector') (drawElement fallback)
+- resize: a window 'resize' event (handleResize, after its debounce)
+- slider: an 'input' event on #additional-image-scaler (redrawCanvas)
+- drawlist: the vector path replaying drawlists/<name>.json from
+  tools/compile_drawlists.py (skipped when the draw list was not built)
+
+The in-process dev server serves build/ as an overlay, so built draw lists
+are found (start the daemon with --overlay for the same).
+
+Timings are the performance.measure entries canvas.js records per render
+('maffie:render:<path>'), so they cover the render itself and not the
+debounce or the Playwright round trip. The JSON output has p50/p95/max/mean
+per SVG, viewport and scenario plus a per-scenario summary. With --baseline,
+entries whose p50 or p95 grew by more than --tolerance (and by more than
+--min-delta-ms) are reported and the exit status is 1.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+
+try:
+    from playwright.sync_api import sync_playwright
+except ImportError:  # pragma: no cover - user will install locally
+    print('This script requires playwright. Install with: pip install playwright')
+    raise
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import parse_viewports, summarize, viewport_label
+from dev_server import ROOT
+from warm_browser import AppBrowser
+
+DEFAULT_SVG_DIR = os.path.join(ROOT, 'svgs')
+DEFAULT_OUT = os.path.join(ROOT, 'tools', 'bench_render.json')
+DEFAULT_VIEWPORTS = '1200x800,800x600,800x600@2x'
+SCENARIOS = ('raster', 'vector', 'resize', 'slider', 'drawlist')
+DEFAULT_OVERLAY_DIR = os.path.join(ROOT, 'build')
+DEFAULT_WARMUP = 3
+DEFAULT_REPEAT = 20
+# regression: slower than baseline by more than this fraction and by more than DEFAULT_MIN_DELTA_MS
+DEFAULT_TOLERANCE = 0.15
+DEFAULT_MIN_DELTA_MS = 0.5
+
+# Runs one scenario inside the page and returns the measured durations.
+BENCH_JS = """async ({ url, listUrl, scenario, warmup, repeat }) => {
+    const M = window.MAFFIE;
+    const canvas = document.getElementById('main-canvas');
+    const slider = document.getElementById('additional-image-scaler');
+    const text = await (await fetch(url)).text();
+    await M.whenIdle();
+    if (scenario === 'drawlist') {
+        const res = await fetch(listUrl);
+        if (!res.ok) return { samples: [], paths: {}, missing: true };
+        M.setDrawList(text, await res.json());
+    }
+    M.setLastSvg(text);
+    M.setRenderPath(scenario === 'vector' || scenario === 'drawlist' ? 'vector' : 'auto');
+    const triggers = {
+        raster: () => M.drawSvgOnCanvas(text, canvas),
+        vector: () => M.drawSvgOnCanvas(text, canvas),
+        drawlist: () => M.drawSvgOnCanvas(text, canvas),
+        resize: () => window.dispatchEvent(new Event('resize')),
+        slider: (i) => {
+            slider.value = String(100 + (i % 2) * 10);
+            slider.dispatchEvent(new Event('input'));
+        }
+    };
+    const samples = [];
+    const paths = {};
+    try {
+        for (let i = 0; i < warmup + repeat; i++) {
+            const done = new Promise(resolve =>
+                window.addEventListener('maffie:rendered', e => resolve(e.detail), { once: true }));
+            triggers[scenario](i);
+            const detail = await done;
+            await M.whenIdle();
+            if (i < warmup) continue;
+            const entry = performance.getEntriesByName('maffie:render:' + detail.path).pop();
+            samples.push(entry ? entry.duration : detail.ms);
+            paths[detail.path] = (paths[detail.path] || 0) + 1;
+        }
+    } finally {
+        M.setRenderPath('auto');
+    }
+    return { samples: samples, paths: paths };
+}"""
+
+
+def run_bench(svg_dir: str, viewports: list, scenarios=SCENARIOS, warmup: int = DEFAULT_WARMUP,
+              repeat: int = DEFAULT_REPEAT) -> dict:
+    svgs = sorted(n for n in os.listdir(svg_dir) if n.lower().endswith('.svg'))
+    results = []
+    per_scenario = {}
+    overlay = DEFAULT_OVERLAY_DIR if os.path.isdir(DEFAULT_OVERLAY_DIR) else None
+    with sync_playwright() as p, AppBrowser(p, overlay=overlay) as app:
+        for width, height, scale in viewports:
+            viewport = viewport_label(width, height, scale)
+            with app.page(width, height, scale) as page:
+                for svg in svgs:
+                    for scenario in scenarios:
+                        out = page.evaluate(BENCH_JS, {
+                            'url': 'svgs/' + svg, 'listUrl': 'drawlists/' + os.path.splitext(svg)[0] + '.json',
+                            'scenario': scenario, 'warmup': warmup, 'repeat': repeat})
+                        if out.get('missing'):
+                            print(f'{svg:<16} {viewport:<12} {scenario:<7} skipped (no draw list; run compile_drawlists.py)')
+                            continue
+                        stats = summarize(out['samples'])
+                        stats.update(svg=svg, viewport=viewport, scenario=scenario, paths=out['paths'])
+                        results.append(stats)
+                        per_scenario.setdefault(scenario, []).extend(out['samples'])
+                        print(f"{svg:<16} {viewport:<12} {scenario:<7} p50={stats['p50']:.2f}ms "
+                              f"p95={stats['p95']:.2f}ms max={stats['max']:.2f}ms")
+        version = app.version
+    return {
+        'version': 1,
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'browser': f'chromium {version}',
+            'warmup': warmup,
+            'repeat': repeat,
+            'viewports': [viewport_label(*v) for v in viewports],
+        },
+        'results': results,
+        'summary': {name: summarize(samples) for name, samples in per_scenario.items()},
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE,
+            min_delta_ms: float = DEFAULT_MIN_DELTA_MS) -> list:
+    """Return regressions of current against baseline, matched by svg/viewport/scenario."""
+    base = {(r['svg'], r['viewport'], r['scenario']): r for r in baseline.get('results', [])}
+    regressions = []
+    for r in current.get('results', []):
+        b = base.get((r['svg'], r['viewport'], r['scenario']))
+        if not b:
+            continue
+        for metric in ('p50', 'p95'):
+            old, new = b.get(metric), r.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + tolerance) and new - old > min_delta_ms:
+                regressions.append({'svg': r['svg'], 'viewport': r['viewport'], 'scenario': r['scenario'],
+                                    'metric': metric, 'baseline': old, 'current': new,
+                                    'change': (new - old) / old if old else None})
+    return regressions
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Benchmark SVG rendering in the main canvas')
+    p.add_argument('--svgs', default=DEFAULT_SVG_DIR, help='SVG directory (default svgs/)')
+    p.add_argument('--viewports', default=DEFAULT_VIEWPORTS, help="Comma-separated WxH[@<dpr>x] list (default '%(default)s')")
+    p.add_argument('--scenarios', default=','.join(SCENARIOS), help="Comma-separated subset of %(default)s")
+    p.add_argument('--warmup', type=int, default=DEFAULT_WARMUP, help='Untimed renders per scenario (default %(default)s)')
+    p.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Timed renders per scenario (default %(default)s)')
+    p.add_argument('--out', default=DEFAULT_OUT, help='JSON output path (default tools/bench_render.json; - for stdout)')
+    p.add_argument('--baseline', help='Previous JSON output to compare against')
+    p.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                   help='Allowed relative slowdown of p50/p95 (default %(default)s)')
+    p.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                   help='Ignore slowdowns smaller than this (default %(default)s ms)')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        print('ERROR: unknown scenario(s):', ', '.join(unknown))
+        sys.exit(2)
+    try:
+        viewports = parse_viewports(args.viewports)
+    except ValueError as e:
+        print('ERROR:', e)
+        sys.exit(2)
+    result = run_bench(args.svgs, viewports, scenarios, args.warmup, args.repeat)
+
+    regressions = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance, args.min_delta_ms)
+        result['regressions'] = regressions
+
+    print('\nSummary:')
+    for name, stats in result['summary'].items():
+        print(f"  {name:<7} n={stats['n']} p50={stats['p50']:.2f}ms p95={stats['p95']:.2f}ms max={stats['max']:.2f}ms")
+    if args.out == '-':
+        print(json.dumps(result, indent=1))
+    else:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=1)
+        print('Results written to', args.out)
+
+    if regressions is not None:
+        if not regressions:
+            print('No regressions against', args.baseline)
+            return
+        print(f'\n{len(regressions)} regression(s) against {args.baseline}:')
+        for r in regressions:
+            print(f"  {r['svg']} {r['viewport']} {r['scenario']} {r['metric']}: "
+                  f"{r['baseline']:.2f}ms -> {r['current']:.2f}ms ({r['change'] * 100:+.0f}%)")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Keep a warm Chromium with the app preloaded for the smoke, benchmark and screenshot tools.
+
+Requires: playwright (python -m pip install playwright; python -m playwright install)
+
+Usage:
+    python tools/browser_daemon.py              # run in a separate terminal; Ctrl+C stops it
+    python tools/browser_daemon.py --status
+    python tools/browser_daemon.py --stop
+
+The daemon starts an in-process tools/dev_server.py and a persistent Chromium
+context with a DevTools port (--cdp-port), loads --pages copies of the app and
+waits for their first render, then writes tools/.browser_daemon.json with the
+DevTools and app URLs. tools/warm_browser.py (used by smoke_playwright.py,
+bench_render.py and visual_regress.py --capture) reads that file, attaches
+over CDP and leases one of the pages instead of launching a browser; leased
+pages are reset through MAFFIE.reset() when they are handed back, and the
+pool grows when every page is busy. The state file and the temporary profile
+are removed on exit.
+
+The DevTools port is bound to 127.0.0.1 only, but it has no authentication:
+while the daemon runs, any local process (any user on the machine) can
+attach to it and drive the browser, including reading pages and files it can
+reach. Run it only on a machine you trust, and stop it when you are done.
+"""
+from __future__ import annotations
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    from playwright.sync_api import sync_playwright
+except ImportError:  # pragma: no cover - user will install locally
+    print('This script requires playwright. Install with: pip install playwright')
+    raise
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from dev_server import ROOT, start_server, stop_server
+from warm_browser import DEFAULT_STATE_FILE, app_stamp, load_app, read_state, write_state
+
+DEFAULT_PAGES = 2
+DEFAULT_CDP_PORT = 9333
+DEFAULT_VIEWPORT = (1200, 800)
+
+
+def serve(pages: int, cdp_port: int, port: int, state_file: str, overlay: str | None = None) -> None:
+    server = start_server(ROOT, port=port, overlay=overlay)
+    profile = tempfile.mkdtemp(prefix='maffie-browser-')
+    try:
+        with sync_playwright() as p:
+            started = time.perf_counter()
+            context = p.chromium.launch_persistent_context(
+                profile, headless=True,
+                # no authentication on this port: keep it off the network
+                args=[f'--remote-debugging-port={cdp_port}', '--remote-debugging-address=127.0.0.1'],
+                viewport={'width': DEFAULT_VIEWPORT[0], 'height': DEFAULT_VIEWPORT[1]})
+            try:
+                stamp = app_stamp()
+                warm = list(context.pages)
+                while len(warm) < pages:
+                    warm.append(context.new_page())
+                for page in warm[:pages]:
+                    load_app(page, server.url, stamp)
+                write_state({
+                    'pid': os.getpid(),
+                    'cdp_url': f'http://127.0.0.1:{cdp_port}',
+                    'app_url': server.url,
+                    'pages': pages,
+                    'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                }, state_file)
+                print(f'Browser daemon ready in {time.perf_counter() - started:.1f}s: '
+                      f'{pages} page(s) of {server.url}, DevTools at http://127.0.0.1:{cdp_port}')
+                print('Ctrl+C (or --stop) to shut down')
+                # returns when the browser goes away (e.g. --stop sends Browser.close)
+                context.wait_for_event('close', timeout=0)
+            except KeyboardInterrupt:
+                pass
+            finally:
+                try:
+                    context.close()
+                except Exception:
+                    pass
+    finally:
+        state = read_state(state_file)
+        if state and state.get('pid') == os.getpid():
+            os.remove(state_file)
+        stop_server(server)
+        shutil.rmtree(profile, ignore_errors=True)
+        print('Browser daemon stopped')
+
+
+def status(state_file: str, stop: bool = False) -> int:
+    state = read_state(state_file)
+    if not state:
+        print('No browser daemon running (no state file)')
+        return 1
+    with sync_playwright() as p:
+        try:
+            browser = p.chromium.connect_over_cdp(state['cdp_url'], timeout=3000)
+        except Exception as e:
+            print(f"Browser daemon at {state['cdp_url']} not reachable ({e}); removing stale state file")
+            os.remove(state_file)
+            return 1
+        pages = browser.contexts[0].pages if browser.contexts else []
+        leased = 0
+        for page in pages:
+            try:
+                leased += bool(page.evaluate('() => !!window.__maffieLease'))
+            except Exception:
+                pass
+        print(f"Browser daemon pid {state['pid']} since {state['started']}: chromium {browser.version}, "
+              f"{len(pages)} page(s), {leased} leased, app at {state['app_url']}")
+        if stop:
+            browser.new_browser_cdp_session().send('Browser.close')
+            print('Stop requested')
+    return 0
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Warm Chromium with the app preloaded, shared over CDP')
+    p.add_argument('--pages', type=int, default=DEFAULT_PAGES, help='Pages to preload (default %(default)s)')
+    p.add_argument('--cdp-port', type=int, default=DEFAULT_CDP_PORT, help='DevTools port (default %(default)s)')
+    p.add_argument('--port', type=int, default=0, help='Dev server port (default: any free port)')
+    p.add_argument('--overlay', action='store_true', help='Serve build/ files in place of the originals')
+    p.add_argument('--state', default=DEFAULT_STATE_FILE, help='State file (default tools/.browser_daemon.json)')
+    p.add_argument('--status', action='store_true', help='Report on the running daemon and exit')
+    p.add_argument('--stop', action='store_true', help='Shut the running daemon down and exit')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.status or args.stop:
+        sys.exit(status(args.state, stop=args.stop))
+    if read_state(args.state):
+        print('A state file already exists; check with --status (a stale file is removed there)')
+        sys.exit(1)
+    serve(max(1, args.pages), args.cdp_port, args.port, args.state,
+          os.path.join(ROOT, 'build') if args.overlay else None)
+
+
+if __name__ == '__main__':
+    main()
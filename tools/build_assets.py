@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Copy the CSS/JS referenced by index.html to content-hashed filenames.
+
+Usage:
+    python tools/build_assets.py            # writes build/index.html, build/css, build/js
+
+Every local stylesheet (<link href>) and script (<script src>) referenced by
+index.html is copied into build/ as '<name>.<hash>.<ext>' (first 10 hex digits
+of its sha256) and build/index.html is rewritten to point at the copies. A
+changed file gets a new name, so hashed files can be served with a long-lived
+'Cache-Control: public, max-age=31536000, immutable' while index.html itself
+stays revalidated. A deploy then only invalidates the files that changed.
+
+build/asset-manifest.json maps each original path to its hashed copy. The
+uploader (tools/upload_sftp_dir.py) reads it from its build/ overlay: the
+hashed copies keep their extensions so the upload whitelist still applies, and
+the superseded originals (and the manifest itself) are not uploaded. Hashed
+copies from previous builds that are no longer referenced are removed.
+
+When build/thumbs/sprites.json exists (tools/build_thumb_sprites.py), a
+<meta name="maffie-sprites"> tag pointing at it is added to build/index.html
+so js/thumbnails.js paints the thumbnails from the sprite sheet. The thumbnail
+<img src> attributes there become data-src, so the SVGs are not fetched up
+front; each one gets a <noscript> copy with the real src, and a <noscript>
+style hides the lazy ones, so the page still shows its thumbnails without
+JavaScript. The source index.html is left as is: a plain checkout loads the
+SVGs straight away and never requests the map.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_OUT_DIR = os.path.join(ROOT, 'build')
+HTML_FILES = ['index.html']
+MANIFEST_NAME = 'asset-manifest.json'
+HASHED_EXTENSIONS = {'.css', '.js'}
+HASH_LENGTH = 10
+# sprite map written by tools/build_thumb_sprites.py, relative to the output dir
+SPRITE_MAP = 'thumbs/sprites.json'
+SPRITE_META = '<meta name="maffie-sprites" content="{}">'
+# without JavaScript the lazy thumbnails stay empty; their <noscript> copies show instead
+NOSCRIPT_STYLE = '<noscript><style>.thumb img[data-src] { display: none; }</style></noscript>'
+THUMB_IMG_RE = re.compile(r'(<div\s+class=["\']thumb["\']>\s*)<img\b([^>]*?)\ssrc(\s*=\s*["\'][^"\']*["\'][^>]*>)',
+                          re.IGNORECASE)
+
+ASSET_REF_RE = re.compile(r'(<(?:link|script)\b[^>]*?\b(?:href|src)\s*=\s*["\'])([^"\']+)(["\'])', re.IGNORECASE)
+
+
+def content_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(rel: str, digest: str) -> str:
+    stem, ext = posixpath.splitext(rel)
+    return f'{stem}.{digest}{ext}'
+
+
+def _is_local(url: str) -> bool:
+    return not (url.startswith(('/', '#', 'data:')) or '://' in url or url.startswith('//'))
+
+
+def build_assets(src_root: str, out_dir: str, html_files: list = HTML_FILES) -> dict:
+    """Hash the assets referenced by html_files and write the rewritten copies.
+
+    Returns the manifest dict ({'assets': {original: hashed}, 'html': [...]}).
+    """
+    assets = {}
+    os.makedirs(out_dir, exist_ok=True)
+
+    def rewrite(match):
+        url = match.group(2)
+        path_part, sep, suffix = url.partition('?')
+        rel = posixpath.normpath(path_part)
+        local = os.path.join(src_root, *rel.split('/'))
+        if not _is_local(path_part) or posixpath.splitext(rel)[1].lower() not in HASHED_EXTENSIONS \
+                or not os.path.isfile(local):
+            return match.group(0)
+        if rel not in assets:
+            target = hashed_name(rel, content_hash(local))
+            dest = os.path.join(out_dir, *target.split('/'))
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            if not os.path.exists(dest):
+                shutil.copyfile(local, dest)
+            assets[rel] = target
+        return match.group(1) + assets[rel] + (sep + suffix if sep else '') + match.group(3)
+
+    for html in html_files:
+        with open(os.path.join(src_root, html), 'r', encoding='utf-8') as f:
+            text = f.read()
+        text = ASSET_REF_RE.sub(rewrite, text)
+        if os.path.isfile(os.path.join(out_dir, *SPRITE_MAP.split('/'))) and 'name="maffie-sprites"' not in text:
+            text = text.replace('</head>', '    ' + SPRITE_META.format(SPRITE_MAP) + '\n    ' + NOSCRIPT_STYLE
+                                + '\n</head>', 1)
+            text = THUMB_IMG_RE.sub(r'\1<img\2 data-src\3<noscript><img\2 src\3</noscript>', text)
+        out_path = os.path.join(out_dir, html)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f).get('assets', {})
+    except (OSError, ValueError):
+        previous = {}
+    for rel, old in previous.items():
+        if assets.get(rel) != old:
+            stale = os.path.join(out_dir, *old.split('/'))
+            if os.path.exists(stale):
+                os.remove(stale)
+
+    manifest = {'assets': assets, 'html': list(html_files)}
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Copy CSS/JS to content-hashed names and rewrite index.html')
+    p.add_argument('--src', default=ROOT, help='Site root containing index.html (default: repo root)')
+    p.add_argument('--out', default=DEFAULT_OUT_DIR, help='Output directory (default build/)')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.isfile(os.path.join(args.src, HTML_FILES[0])):
+        print('ERROR: index.html not found in', args.src)
+        sys.exit(2)
+    manifest = build_assets(args.src, args.out)
+    for rel, target in sorted(manifest['assets'].items()):
+        print(f'{rel} -> {target}')
+    print('Manifest written to', os.path.join(args.out, MANIFEST_NAME))
+
+
+if __name__ == '__main__':
+    main()
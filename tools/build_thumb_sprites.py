@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Pre-render the SVG thumbnails into one sprite sheet plus a JSON coordinate map.
+
+Requires: playwright (only when tiles must be re-rendered) and Pillow.
+
+Usage:
+    python tools/build_thumb_sprites.py                 # svgs/ -> build/thumbs/
+    python tools/build_thumb_sprites.py --tile 160 --force
+
+Every SVG in svgs/ is rendered once by headless Chromium at 2x the tile size
+(contain-fit, transparent background) and downscaled for the 1x sheet. The
+tiles are packed into a grid and written as PNG and, when Pillow supports it,
+WebP:
+
+    build/thumbs/sprite.png, sprite@2x.png, sprite.webp, sprite@2x.webp
+    build/thumbs/sprites.json   (grid size, sheet files, per-SVG cell)
+
+js/thumbnails.js loads sprites.json and shows each thumbnail as a cell of the
+shared sheet, so the thumbnail column costs one image request and no SVG
+parsing; the SVG is only fetched when a thumbnail is clicked. The map is only
+requested when the page opts in with a <meta name="maffie-sprites"> tag,
+which tools/build_assets.py adds to build/index.html (run it afterwards).
+build/ is the uploader's overlay directory, so the files deploy as thumbs/...
+
+Rendered tiles are cached under build/thumbs/.tiles/ by content hash, so only
+new or changed SVGs are re-rendered (no browser is launched when nothing
+changed) and the sheets are only rewritten when the map changes.
+"""
+from __future__ import annotations
+import argparse
+import base64
+import hashlib
+import json
+import math
+import os
+import sys
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - user will install locally
+    print('This script requires Pillow. Install with: pip install pillow')
+    raise
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_SRC_DIR = os.path.join(ROOT, 'svgs')
+DEFAULT_OUT_DIR = os.path.join(ROOT, 'build', 'thumbs')
+# tile edge in CSS pixels (the 1x sheet); the 2x sheet doubles it
+DEFAULT_TILE = 192
+MAP_NAME = 'sprites.json'
+TILE_CACHE_DIR = '.tiles'
+# URL prefix of the SVGs as referenced by the thumbnails in index.html
+SVG_URL_PREFIX = 'svgs/'
+
+
+def svg_hash(data: bytes, tile: int) -> str:
+    h = hashlib.sha256(data)
+    h.update(f'@{tile}'.encode('ascii'))
+    return h.hexdigest()
+
+
+def render_tiles(svgs: list, tile: int, cache_dir: str) -> None:
+    """Render (data, digest) pairs to '<cache_dir>/<digest>.png' at 2x tile size."""
+    from playwright.sync_api import sync_playwright
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        context = browser.new_context(viewport={'width': tile, 'height': tile}, device_scale_factor=2)
+        page = context.new_page()
+        for data, digest in svgs:
+            uri = 'data:image/svg+xml;base64,' + base64.b64encode(data).decode('ascii')
+            page.set_content(
+                '<html><body style="margin:0;background:transparent">'
+                f'<img id="t" src="{uri}" style="display:block;width:{tile}px;height:{tile}px;object-fit:contain">'
+                '</body></html>')
+            page.evaluate("() => document.getElementById('t').decode().catch(() => null)")
+            page.locator('#t').screenshot(path=os.path.join(cache_dir, digest + '.png'), omit_background=True)
+        browser.close()
+
+
+def _save_sheet(im: Image.Image, path: str, fmt: str) -> bool:
+    try:
+        if fmt == 'WEBP':
+            im.save(path, fmt, quality=90, method=6)
+        else:
+            im.save(path, fmt, optimize=True)
+        return True
+    except (OSError, KeyError, ValueError) as e:
+        print(f'Skipping {os.path.basename(path)}: {e}')
+        return False
+
+
+def build_sprites(src_dir: str, out_dir: str, tile: int = DEFAULT_TILE, force: bool = False) -> dict:
+    """Build the sprite sheets and map; returns the map (unchanged maps are not rewritten)."""
+    names = sorted(n for n in os.listdir(src_dir) if n.lower().endswith('.svg'))
+    cache_dir = os.path.join(out_dir, TILE_CACHE_DIR)
+    entries = []
+    for name in names:
+        with open(os.path.join(src_dir, name), 'rb') as f:
+            data = f.read()
+        entries.append((name, data, svg_hash(data, tile)))
+
+    missing = [(data, digest) for _, data, digest in entries
+               if force or not os.path.exists(os.path.join(cache_dir, digest + '.png'))]
+    if missing:
+        print(f'Rendering {len(missing)} of {len(entries)} thumbnails')
+        render_tiles(missing, tile, cache_dir)
+    else:
+        print('All thumbnails up to date; no rendering needed')
+
+    cols = max(1, math.ceil(math.sqrt(len(entries))))
+    rows = max(1, math.ceil(len(entries) / cols))
+    sprite_map = {
+        'version': 1,
+        'tile': tile,
+        'cols': cols,
+        'rows': rows,
+        'sheets': {'png': {'1x': 'sprite.png', '2x': 'sprite@2x.png'}},
+        'items': {},
+    }
+    for index, (name, _, digest) in enumerate(entries):
+        col, row = index % cols, index // cols
+        sprite_map['items'][SVG_URL_PREFIX + name] = {
+            'col': col, 'row': row, 'x': col * tile, 'y': row * tile, 'sha256': digest}
+
+    map_path = os.path.join(out_dir, MAP_NAME)
+    try:
+        with open(map_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = None
+    sheets_exist = all(os.path.exists(os.path.join(out_dir, f)) for f in sprite_map['sheets']['png'].values())
+    if not force and previous and sheets_exist and previous.get('items') == sprite_map['items'] \
+            and previous.get('tile') == tile:
+        print('Sprite sheets unchanged')
+        return previous
+
+    sheet2 = Image.new('RGBA', (cols * tile * 2, rows * tile * 2), (0, 0, 0, 0))
+    for index, (_, _, digest) in enumerate(entries):
+        with Image.open(os.path.join(cache_dir, digest + '.png')) as im:
+            cell = im.convert('RGBA')
+            if cell.size != (tile * 2, tile * 2):
+                cell = cell.resize((tile * 2, tile * 2), Image.LANCZOS)
+        sheet2.paste(cell, ((index % cols) * tile * 2, (index // cols) * tile * 2))
+    sheet1 = sheet2.resize((cols * tile, rows * tile), Image.LANCZOS)
+
+    os.makedirs(out_dir, exist_ok=True)
+    _save_sheet(sheet1, os.path.join(out_dir, 'sprite.png'), 'PNG')
+    _save_sheet(sheet2, os.path.join(out_dir, 'sprite@2x.png'), 'PNG')
+    if _save_sheet(sheet1, os.path.join(out_dir, 'sprite.webp'), 'WEBP') and \
+            _save_sheet(sheet2, os.path.join(out_dir, 'sprite@2x.webp'), 'WEBP'):
+        sprite_map['sheets']['webp'] = {'1x': 'sprite.webp', '2x': 'sprite@2x.webp'}
+
+    with open(map_path, 'w', encoding='utf-8') as f:
+        json.dump(sprite_map, f, indent=1, sort_keys=True)
+    for fname in sorted(os.listdir(out_dir)):
+        path = os.path.join(out_dir, fname)
+        if os.path.isfile(path):
+            print(f'  - {fname}: {os.path.getsize(path)} bytes')
+    return sprite_map
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Build the thumbnail sprite sheet from svgs/')
+    p.add_argument('--src', default=DEFAULT_SRC_DIR, help='Directory with source SVGs (default svgs/)')
+    p.add_argument('--out', default=DEFAULT_OUT_DIR, help='Output directory (default build/thumbs/)')
+    p.add_argument('--tile', type=int, default=DEFAULT_TILE, help='Tile size in CSS pixels (default %(default)s)')
+    p.add_argument('--force', action='store_true', help='Re-render every tile and rewrite the sheets')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.isdir(args.src):
+        print('ERROR: source directory not found:', args.src)
+        sys.exit(2)
+    sprite_map = build_sprites(args.src, args.out, args.tile, args.force)
+    print(f"{len(sprite_map['items'])} thumbnails in a {sprite_map['cols']}x{sprite_map['rows']} grid -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
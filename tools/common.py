@@ -0,0 +1,65 @@
+"""Small helpers shared by the scripts in tools/ (standard library only).
+
+    from common import parse_viewports, percentile, summarize
+"""
+from __future__ import annotations
+import math
+
+# how long the page-side waits give a render to finish
+RENDER_TIMEOUT_MS = 10000
+# true once a render newer than `seen` has completed and none is in flight
+RENDERED_AFTER = '(seen) => { const s = window.MAFFIE.renderState(); return s.completed > seen && s.pending === 0; }'
+
+
+def percentile(values: list, pct: float):
+    """Nearest-rank percentile of values (None if empty).
+
+    The smallest value with at least pct% of the values at or below it:
+    rank ceil(pct/100 * n), so p95 of 20 samples is the 19th, not the max.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples: list) -> dict:
+    """n, p50, p95, max and mean of a list of timings (None values when empty)."""
+    return {
+        'n': len(samples),
+        'p50': percentile(samples, 50),
+        'p95': percentile(samples, 95),
+        'max': max(samples) if samples else None,
+        'mean': sum(samples) / len(samples) if samples else None,
+    }
+
+
+def parse_viewports(spec: str, default_dpr: float | None = 1) -> list:
+    """'1200x800,800x600@2x,800x600@1.5x' -> [(1200, 800, 1), (800, 600, 2), (800, 600, 1.5)].
+
+    Entries without '@<dpr>x' get default_dpr. Raises ValueError naming the
+    offending entry.
+    """
+    viewports = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        size, _, dpr = item.partition('@')
+        try:
+            w, h = (int(v) for v in size.split('x'))
+            scale = float(dpr[:-1]) if dpr else default_dpr
+            if (dpr and not dpr.endswith('x')) or w <= 0 or h <= 0 or (scale is not None and scale <= 0):
+                raise ValueError
+        except ValueError:
+            raise ValueError(f"bad viewport {item!r}: expected WxH or WxH@<dpr>x") from None
+        if scale is not None and scale == int(scale):
+            scale = int(scale)
+        viewports.append((w, h, scale))
+    return viewports
+
+
+def viewport_label(width: int, height: int, dpr: float = 1) -> str:
+    """(800, 600, 2) -> '800x600@2x'; the ratio is left out when it is 1."""
+    return f'{width}x{height}' + (f'@{dpr:g}x' if dpr != 1 else '')
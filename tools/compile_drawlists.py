@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""Compile the SVGs in svgs/ into draw lists for the canvas vector path.
+
+Usage:
+    python tools/compile_drawlists.py                  # svgs/ -> build/drawlists/
+    python tools/compile_drawlists.py --digits 4
+
+The vector fallback of drawSvgOnCanvas (js/canvas.js) parses the SVG, walks
+the DOM and resolves fill/stroke/stroke-width/color inheritance on every
+redraw. This compiler does that work once. Every shape the fallback draws
+(path, rect, circle, ellipse, line, polyline, polygon) becomes a run of
+absolute moveTo/lineTo/bezierCurveTo/quadraticCurveTo/closePath commands:
+arcs, circles, ellipses and rounded corners are converted to cubic curves
+and transforms are applied to the coordinates. Each run references a style
+with its inherited paint already resolved. The result is compact JSON:
+
+    {"version": 1, "width": W, "height": H,        # as the fallback sizes it
+     "styles": [[fill|null, stroke|null, lineWidth], ...],
+     "ops": [style, commandCount, ...],             # one pair per shape
+     "cmds": [0=M 1=L 2=C 3=Q 4=Z, ...],
+     "scale": 0.01,                                 # coordinate quantum
+     "coords": [dx, dy, ...]}                       # integer deltas
+
+Coordinates are quantized to --digits significant digits relative to the
+viewBox (like optimize_svgs) and stored as integer differences from the
+previous x or y, which keeps the JSON small; x = sum(dx) * scale.
+
+canvas.js turns cmds/coords into typed arrays and Path2D objects once, so a
+redraw only sets styles and fills/strokes. Files land in build/drawlists/
+<name>.json and deploy as drawlists/<name>.json through the uploader's
+build/ overlay; js/thumbnails.js registers them when a thumbnail is clicked.
+"""
+from __future__ import annotations
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from optimize_svgs import NUMBER_RE, SVG_NS, _split, _viewbox_decimals, parse_path
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_SRC_DIR = os.path.join(ROOT, 'svgs')
+DEFAULT_OUT_DIR = os.path.join(ROOT, 'build', 'drawlists')
+DEFAULT_DIGITS = 5
+FORMAT_VERSION = 1
+
+CMD_MOVE, CMD_LINE, CMD_CUBIC, CMD_QUAD, CMD_CLOSE = range(5)
+# containers whose children are never painted directly
+NON_RENDERED = {'defs', 'clipPath', 'mask', 'symbol', 'pattern', 'marker', 'linearGradient',
+                'radialGradient', 'filter', 'metadata', 'title', 'desc', 'style', 'script'}
+INHERITED = ('fill', 'stroke', 'stroke-width', 'color')
+# cubic control-point factor for a quarter circle
+KAPPA = 4 * (math.sqrt(2) - 1) / 3
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+TRANSFORM_RE = re.compile(r'(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)')
+LEADING_FLOAT_RE = re.compile(r'^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)')
+
+
+def _multiply(m, n):
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (a * a2 + c * b2, b * a2 + d * b2, a * c2 + c * d2, b * c2 + d * d2,
+            a * e2 + c * f2 + e, b * e2 + d * f2 + f)
+
+
+def parse_transform(value: str | None):
+    """Return the affine matrix (a, b, c, d, e, f) of an SVG transform list."""
+    m = IDENTITY
+    for name, args in TRANSFORM_RE.findall(value or ''):
+        v = [float(x) for x in NUMBER_RE.findall(args)]
+        if name == 'matrix' and len(v) == 6:
+            t = tuple(v)
+        elif name == 'translate' and v:
+            t = (1, 0, 0, 1, v[0], v[1] if len(v) > 1 else 0)
+        elif name == 'scale' and v:
+            t = (v[0], 0, 0, v[1] if len(v) > 1 else v[0], 0, 0)
+        elif name == 'rotate' and v:
+            r = math.radians(v[0])
+            t = (math.cos(r), math.sin(r), -math.sin(r), math.cos(r), 0, 0)
+            if len(v) == 3:
+                t = _multiply(_multiply((1, 0, 0, 1, v[1], v[2]), t), (1, 0, 0, 1, -v[1], -v[2]))
+        elif name == 'skewX' and v:
+            t = (1, 0, math.tan(math.radians(v[0])), 1, 0, 0)
+        elif name == 'skewY' and v:
+            t = (1, math.tan(math.radians(v[0])), 0, 1, 0, 0)
+        else:
+            continue
+        m = _multiply(m, t)
+    return m
+
+
+def _float(value, default: float = 0.0) -> float:
+    """parseFloat()-like: the leading number of value, else default."""
+    m = LEADING_FLOAT_RE.match(value or '')
+    return float(m.group(1)) if m else default
+
+
+def _arc_to_cubics(x1, y1, rx, ry, phi, large, sweep, x2, y2) -> list:
+    """Convert an SVG elliptical arc to cubic segments [(c1x, c1y, c2x, c2y, x, y), ...]."""
+    if (x1 == x2 and y1 == y2) or rx == 0 or ry == 0:
+        return [(x1, y1, x2, y2, x2, y2)] if (x1, y1) != (x2, y2) else []
+    rx, ry = abs(rx), abs(ry)
+    cos_p, sin_p = math.cos(math.radians(phi)), math.sin(math.radians(phi))
+    dx, dy = (x1 - x2) / 2, (y1 - y2) / 2
+    x1p, y1p = cos_p * dx + sin_p * dy, -sin_p * dx + cos_p * dy
+    lam = (x1p * x1p) / (rx * rx) + (y1p * y1p) / (ry * ry)
+    if lam > 1:
+        rx, ry = rx * math.sqrt(lam), ry * math.sqrt(lam)
+    num = rx * rx * ry * ry - rx * rx * y1p * y1p - ry * ry * x1p * x1p
+    den = rx * rx * y1p * y1p + ry * ry * x1p * x1p
+    coef = math.sqrt(max(0.0, num / den)) if den else 0.0
+    if large == sweep:
+        coef = -coef
+    cxp, cyp = coef * rx * y1p / ry, -coef * ry * x1p / rx
+    cx = cos_p * cxp - sin_p * cyp + (x1 + x2) / 2
+    cy = sin_p * cxp + cos_p * cyp + (y1 + y2) / 2
+
+    def angle(ux, uy, vx, vy):
+        return math.atan2(ux * vy - uy * vx, ux * vx + uy * vy)
+
+    theta1 = angle(1, 0, (x1p - cxp) / rx, (y1p - cyp) / ry)
+    delta = angle((x1p - cxp) / rx, (y1p - cyp) / ry, (-x1p - cxp) / rx, (-y1p - cyp) / ry)
+    if not sweep and delta > 0:
+        delta -= 2 * math.pi
+    elif sweep and delta < 0:
+        delta += 2 * math.pi
+    count = max(1, int(math.ceil(abs(delta) / (math.pi / 2) - 1e-9)))
+    step = delta / count
+    t = 4 / 3 * math.tan(step / 4)
+
+    def point(a):
+        return (cx + rx * math.cos(a) * cos_p - ry * math.sin(a) * sin_p,
+                cy + rx * math.cos(a) * sin_p + ry * math.sin(a) * cos_p)
+
+    segments = []
+    a = theta1
+    for _ in range(count):
+        b = a + step
+        ca, sa, cb, sb = math.cos(a), math.sin(a), math.cos(b), math.sin(b)
+        # derivative-scaled control points in the ellipse frame, then rotated
+        e1 = (ca - t * sa, sa + t * ca)
+        e2 = (cb + t * sb, sb - t * cb)
+        c1 = (cx + rx * e1[0] * cos_p - ry * e1[1] * sin_p, cy + rx * e1[0] * sin_p + ry * e1[1] * cos_p)
+        c2 = (cx + rx * e2[0] * cos_p - ry * e2[1] * sin_p, cy + rx * e2[0] * sin_p + ry * e2[1] * cos_p)
+        end = point(b)
+        segments.append((c1[0], c1[1], c2[0], c2[1], end[0], end[1]))
+        a = b
+    # land exactly on the requested end point
+    if segments:
+        c1x, c1y, c2x, c2y, _, _ = segments[-1]
+        segments[-1] = (c1x, c1y, c2x, c2y, x2, y2)
+    return segments
+
+
+def path_commands(d: str) -> list:
+    """Normalize path data to absolute [(CMD_*, [args...]), ...] using M/L/C/Q/Z."""
+    out = []
+    x = y = sx = sy = 0.0
+    prev_cmd = None
+    ctrl = None  # last cubic/quadratic control point, for S/T reflection
+    for cmd, p in parse_path(d):
+        rel = cmd.islower()
+        c = cmd.upper()
+        ox, oy = (x, y) if rel else (0.0, 0.0)
+        if c == 'M':
+            x, y = p[0] + ox, p[1] + oy
+            sx, sy = x, y
+            out.append((CMD_MOVE, [x, y]))
+            ctrl = None
+        elif c == 'L':
+            x, y = p[0] + ox, p[1] + oy
+            out.append((CMD_LINE, [x, y]))
+            ctrl = None
+        elif c == 'H':
+            x = p[0] + (x if rel else 0.0)
+            out.append((CMD_LINE, [x, y]))
+            ctrl = None
+        elif c == 'V':
+            y = p[0] + (y if rel else 0.0)
+            out.append((CMD_LINE, [x, y]))
+            ctrl = None
+        elif c in ('C', 'S'):
+            if c == 'C':
+                c1 = (p[0] + ox, p[1] + oy)
+                rest = p[2:]
+            else:
+                c1 = (2 * x - ctrl[0], 2 * y - ctrl[1]) if ctrl and prev_cmd in 'CS' else (x, y)
+                rest = p
+            c2 = (rest[0] + ox, rest[1] + oy)
+            x, y = rest[2] + ox, rest[3] + oy
+            out.append((CMD_CUBIC, [c1[0], c1[1], c2[0], c2[1], x, y]))
+            ctrl = c2
+        elif c in ('Q', 'T'):
+            if c == 'Q':
+                q = (p[0] + ox, p[1] + oy)
+                x, y = p[2] + ox, p[3] + oy
+            else:
+                q = (2 * x - ctrl[0], 2 * y - ctrl[1]) if ctrl and prev_cmd in 'QT' else (x, y)
+                x, y = p[0] + ox, p[1] + oy
+            out.append((CMD_QUAD, [q[0], q[1], x, y]))
+            ctrl = q
+        elif c == 'A':
+            ex, ey = p[5] + ox, p[6] + oy
+            for seg in _arc_to_cubics(x, y, p[0], p[1], p[2], p[3], p[4], ex, ey):
+                out.append((CMD_CUBIC, list(seg)))
+            x, y = ex, ey
+            ctrl = None
+        elif c == 'Z':
+            out.append((CMD_CLOSE, []))
+            x, y = sx, sy
+            ctrl = None
+        prev_cmd = c
+    return out
+
+
+def _ellipse_commands(cx, cy, rx, ry) -> list:
+    kx, ky = rx * KAPPA, ry * KAPPA
+    return [
+        (CMD_MOVE, [cx + rx, cy]),
+        (CMD_CUBIC, [cx + rx, cy + ky, cx + kx, cy + ry, cx, cy + ry]),
+        (CMD_CUBIC, [cx - kx, cy + ry, cx - rx, cy + ky, cx - rx, cy]),
+        (CMD_CUBIC, [cx - rx, cy - ky, cx - kx, cy - ry, cx, cy - ry]),
+        (CMD_CUBIC, [cx + kx, cy - ry, cx + rx, cy - ky, cx + rx, cy]),
+        (CMD_CLOSE, []),
+    ]
+
+
+def _rect_commands(x, y, w, h, r) -> list:
+    if not r:
+        return [(CMD_MOVE, [x, y]), (CMD_LINE, [x + w, y]), (CMD_LINE, [x + w, y + h]),
+                (CMD_LINE, [x, y + h]), (CMD_CLOSE, [])]
+    # the canvas fallback draws rounded corners with arcTo(r); clamp like arcTo would fit
+    r = min(r, abs(w) / 2, abs(h) / 2)
+    k = r * KAPPA
+    return [
+        (CMD_MOVE, [x + r, y]),
+        (CMD_LINE, [x + w - r, y]),
+        (CMD_CUBIC, [x + w - r + k, y, x + w, y + r - k, x + w, y + r]),
+        (CMD_LINE, [x + w, y + h - r]),
+        (CMD_CUBIC, [x + w, y + h - r + k, x + w - r + k, y + h, x + w - r, y + h]),
+        (CMD_LINE, [x + r, y + h]),
+        (CMD_CUBIC, [x + r - k, y + h, x, y + h - r + k, x, y + h - r]),
+        (CMD_LINE, [x, y + r]),
+        (CMD_CUBIC, [x, y + r - k, x + r - k, y, x + r, y]),
+        (CMD_CLOSE, []),
+    ]
+
+
+def shape_commands(tag: str, el: ET.Element) -> list | None:
+    """Commands for one element as the canvas fallback draws it (None = not a shape)."""
+    get = el.get
+    if tag == 'path':
+        d = get('d')
+        if not d:
+            return []
+        try:
+            return path_commands(d)
+        except (ValueError, IndexError, TypeError):
+            return []
+    if tag == 'rect':
+        x, y = _float(get('x')), _float(get('y'))
+        w, h = _float(get('width')), _float(get('height'))
+        rx = _float(get('rx'))
+        ry = _float(get('ry'), rx)
+        return _rect_commands(x, y, w, h, rx or ry)
+    if tag == 'circle':
+        r = _float(get('r'))
+        return _ellipse_commands(_float(get('cx')), _float(get('cy')), r, r)
+    if tag == 'ellipse':
+        return _ellipse_commands(_float(get('cx')), _float(get('cy')), _float(get('rx')), _float(get('ry')))
+    if tag == 'line':
+        return [(CMD_MOVE, [_float(get('x1')), _float(get('y1'))]),
+                (CMD_LINE, [_float(get('x2')), _float(get('y2'))])]
+    if tag in ('polyline', 'polygon'):
+        nums = [float(n) for n in NUMBER_RE.findall(get('points') or '')]
+        if len(nums) < 2:
+            return []
+        cmds = [(CMD_MOVE, nums[0:2])]
+        cmds.extend((CMD_LINE, nums[i:i + 2]) for i in range(2, len(nums) - 1, 2))
+        if tag == 'polygon':
+            cmds.append((CMD_CLOSE, []))
+        return cmds
+    return None
+
+
+def _own_prop(el: ET.Element, name: str, style_res: dict):
+    value = el.get(name)
+    if value and value.strip():
+        return value.strip()
+    style = el.get('style')
+    if style:
+        m = style_res[name].search(style)
+        if m and m.group(1):
+            return m.group(1).strip()
+    return None
+
+
+def svg_size(root: ET.Element) -> tuple:
+    """(width, height) as the canvas fallback computes them (viewBox size first)."""
+    vb = root.get('viewBox')
+    w = h = 0.0
+    if vb:
+        try:
+            parts = [float(p) for p in vb.split()]
+        except ValueError:
+            parts = []
+        if len(parts) == 4:
+            w, h = parts[2], parts[3]
+    if not w or not h:
+        w, h = _float(root.get('width')), _float(root.get('height'))
+    return w, h
+
+
+def compile_svg(data: bytes, digits: int = DEFAULT_DIGITS) -> dict:
+    """Compile SVG document bytes into the draw-list dict described in the module docstring."""
+    root = ET.fromstring(data)
+    decimals = _viewbox_decimals(root, digits)
+    quantum = 10 ** decimals
+    # same lookup as getInheritedProp() in canvas.js
+    style_res = {name: re.compile(re.escape(name) + r'\s*:\s*([^;]+)') for name in INHERITED}
+    styles, style_index = [], {}
+    ops, cmds, coords = [], [], []
+
+    def emit(commands, matrix, props):
+        fill = props['fill']
+        if fill in ('currentColor', 'currentcolor'):
+            fill = props['color'] or fill
+        fill = fill or 'black'
+        stroke = props['stroke']
+        if stroke in ('currentColor', 'currentcolor'):
+            stroke = props['color'] or stroke
+        a, b, c, d, _, _ = matrix
+        width = (_float(props['stroke-width'] or '1') or 1) * math.sqrt(abs(a * d - b * c))
+        key = (None if fill == 'none' else fill, None if not stroke or stroke == 'none' else stroke,
+               round(width, decimals))
+        if key not in style_index:
+            style_index[key] = len(styles)
+            styles.append(list(key))
+        ops.extend((style_index[key], len(commands)))
+        for code, args in commands:
+            cmds.append(code)
+            for i in range(0, len(args), 2):
+                px, py = args[i], args[i + 1]
+                if matrix is not IDENTITY:
+                    px, py = (matrix[0] * px + matrix[2] * py + matrix[4], matrix[1] * px + matrix[3] * py + matrix[5])
+                coords.append(round(px * quantum))
+                coords.append(round(py * quantum))
+
+    def walk(el, matrix, inherited):
+        ns, tag = _split(el.tag)
+        # the canvas fallback never paints text either
+        if (ns and ns != SVG_NS) or tag in NON_RENDERED or tag == 'text':
+            return
+        props = {name: _own_prop(el, name, style_res) or inherited[name] for name in INHERITED}
+        if el.get('transform'):
+            matrix = _multiply(matrix, parse_transform(el.get('transform')))
+        commands = shape_commands(tag, el)
+        if commands is None:
+            for child in el:
+                walk(child, matrix, props)
+            return
+        if tag == 'line':
+            # lines are only stroked
+            props = dict(props, fill='none')
+        if commands:
+            emit(commands, matrix, props)
+
+    top = {name: _own_prop(root, name, style_res) for name in INHERITED}
+    root_matrix = parse_transform(root.get('transform')) if root.get('transform') else IDENTITY
+    for child in root:
+        walk(child, root_matrix, top)
+
+    width, height = svg_size(root)
+    # delta-encode per axis
+    for i in range(len(coords) - 1, 1, -1):
+        coords[i] -= coords[i - 2]
+    return {
+        'version': FORMAT_VERSION,
+        'width': width,
+        'height': height,
+        'styles': styles,
+        'ops': ops,
+        'cmds': cmds,
+        'scale': 10 ** -decimals,
+        'coords': coords,
+    }
+
+
+def compile_dir(src_dir: str, out_dir: str, digits: int = DEFAULT_DIGITS) -> list:
+    """Compile every .svg in src_dir to out_dir/<name>.json; returns [(name, svg_bytes, json_bytes, shapes)]."""
+    os.makedirs(out_dir, exist_ok=True)
+    results = []
+    for name in sorted(os.listdir(src_dir)):
+        if not name.lower().endswith('.svg'):
+            continue
+        with open(os.path.join(src_dir, name), 'rb') as f:
+            data = f.read()
+        try:
+            compiled = compile_svg(data, digits)
+        except ET.ParseError as e:
+            print(f'Skipping {name}: {e}')
+            continue
+        out = json.dumps(compiled, separators=(',', ':')).encode('utf-8')
+        out_path = os.path.join(out_dir, os.path.splitext(name)[0] + '.json')
+        try:
+            with open(out_path, 'rb') as f:
+                unchanged = f.read() == out
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            with open(out_path, 'wb') as f:
+                f.write(out)
+        results.append((name, len(data), len(out), len(compiled['ops']) // 2))
+    return results
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Compile SVGs into canvas draw lists')
+    p.add_argument('--src', default=DEFAULT_SRC_DIR, help='Directory with source SVGs (default svgs/)')
+    p.add_argument('--out', default=DEFAULT_OUT_DIR, help='Output directory (default build/drawlists/)')
+    p.add_argument('--digits', type=int, default=DEFAULT_DIGITS,
+                   help='Significant digits relative to the viewBox size (default %(default)s)')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.isdir(args.src):
+        print('ERROR: source directory not found:', args.src)
+        sys.exit(2)
+    for name, before, after, shapes in compile_dir(args.src, args.out, args.digits):
+        print(f'{name}: {shapes} shapes, {before} -> {after} bytes')
+    print('Draw lists written to', args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""Threaded static file server for local development and previews.
+
+Usage:
+    python tools/dev_server.py                      # serve the repo root on :8080
+    python tools/dev_server.py --overlay --port 8000
+
+A drop-in replacement for 'python -m http.server 8080' that:
+
+- handles requests on a thread per connection (ThreadingHTTPServer)
+- sends ETag and Last-Modified and answers If-None-Match/If-Modified-Since
+  with 304 Not Modified
+- compresses text assets (.svg/.js/.css/.html/.json) with gzip, or brotli
+  when the 'brotli' package is installed, preferring precompressed
+  '<file>.br'/'<file>.gz' siblings; compressed bodies are cached in memory
+  until the file changes
+- sends a configurable Cache-Control, with a separate (long, immutable)
+  value for the content-hashed names written by tools/build_assets.py
+- logs every request with its status, size and duration
+
+With --overlay, files in build/ are served in place of the originals, the same
+way the uploader deploys them. Tests can run the server in-process:
+
+    server = start_server(root, port=0)     # ephemeral port, background thread
+    ...  # use server.url
+    stop_server(server)
+"""
+from __future__ import annotations
+import argparse
+import datetime
+import email.utils
+import gzip
+import http.server
+import os
+import posixpath
+import re
+import sys
+import threading
+import time
+import urllib.parse
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is used without it
+    brotli = None
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+DEFAULT_OVERLAY_DIR = 'build'
+DEFAULT_CACHE_CONTROL = 'no-cache'
+DEFAULT_HASHED_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# '<name>.<10 hex digits>.<ext>' as written by tools/build_assets.py
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{10}\.(?:css|js)$')
+COMPRESSIBLE_EXTENSIONS = {'.svg', '.js', '.css', '.html', '.json'}
+# files above this size are sent uncompressed instead of being compressed in memory
+MAX_COMPRESS_SIZE = 8 * 1024 * 1024
+MIN_COMPRESS_SIZE = 256
+
+MIME_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'text/javascript; charset=utf-8',
+    '.json': 'application/json',
+    '.svg': 'image/svg+xml',
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+}
+
+
+class EntityCache:
+    """Per-file ETag and compressed bodies, invalidated by mtime/size."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, st: os.stat_result) -> dict:
+        key = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry['key'] != key:
+                entry = {'key': key, 'etag': '"%x-%x"' % (st.st_mtime_ns, st.st_size), 'bodies': {}}
+                self._entries[path] = entry
+            return entry
+
+    def body(self, path: str, st: os.stat_result, encoding: str) -> bytes | None:
+        """Return the file's body in the given encoding (precompressed sibling or cached)."""
+        entry = self.get(path, st)
+        with self._lock:
+            if encoding in entry['bodies']:
+                return entry['bodies'][encoding]
+        sibling = path + ('.br' if encoding == 'br' else '.gz')
+        try:
+            sst = os.stat(sibling)
+        except OSError:
+            sst = None
+        if sst is not None and sst.st_mtime_ns >= st.st_mtime_ns:
+            with open(sibling, 'rb') as f:
+                data = f.read()
+        elif st.st_size <= MAX_COMPRESS_SIZE:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            if encoding == 'br':
+                data = brotli.compress(raw, quality=5)
+            else:
+                data = gzip.compress(raw, compresslevel=6, mtime=0)
+            if len(data) >= len(raw):
+                data = None
+        else:
+            data = None
+        with self._lock:
+            entry['bodies'][encoding] = data
+        return data
+
+
+def _accepted_encodings(header: str | None) -> set:
+    accepted = set()
+    for part in (header or '').split(','):
+        token, _, params = part.strip().partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if token and q > 0:
+            accepted.add(token.lower())
+    return accepted
+
+
+class DevRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Static handler with validators, compression, cache headers and timing."""
+
+    protocol_version = 'HTTP/1.1'
+    extensions_map = dict(http.server.SimpleHTTPRequestHandler.extensions_map, **MIME_TYPES)
+
+    # set per server by make_handler()
+    overlay = None
+    cache_control = DEFAULT_CACHE_CONTROL
+    hashed_cache_control = DEFAULT_HASHED_CACHE_CONTROL
+    entities = None
+    quiet = False
+
+    def handle_one_request(self):
+        self._started = time.perf_counter()
+        self._status = None
+        self._sent = 0
+        super().handle_one_request()
+        if self._status is not None and not self.quiet:
+            ms = (time.perf_counter() - self._started) * 1000
+            sys.stderr.write('%s %s %s %d %dB %.1fms\n' % (
+                self.address_string(), self.command, self.path, self._status, self._sent, ms))
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
+    def log_request(self, code='-', size='-'):
+        pass  # replaced by the timed line in handle_one_request
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _resolve(self, url_path: str) -> str:
+        """Map a URL path to a file, preferring the overlay directory."""
+        rel = posixpath.normpath(urllib.parse.unquote(url_path.split('?', 1)[0].split('#', 1)[0]))
+        # like SimpleHTTPRequestHandler.translate_path: keep plain names only, so
+        # '..', '..\x' or 'C:\x' (%5c decodes to a separator on Windows) cannot escape the root
+        parts = [p for p in rel.split('/')
+                 if p and p not in (os.curdir, os.pardir) and not os.path.dirname(p) and not os.path.splitdrive(p)[0]]
+        if self.overlay:
+            candidate = os.path.join(self.overlay, *parts)
+            if os.path.isfile(candidate) or (os.path.isdir(candidate)
+                                             and os.path.isfile(os.path.join(candidate, 'index.html'))):
+                return candidate
+        return os.path.join(self.directory, *parts)
+
+    def do_GET(self):
+        self._serve(head_only=False)
+
+    def do_HEAD(self):
+        self._serve(head_only=True)
+
+    def _serve(self, head_only: bool):
+        path = self._resolve(self.path)
+        if os.path.isdir(path):
+            url = urllib.parse.urlsplit(self.path)
+            if not url.path.endswith('/'):
+                self.send_response(301)
+                self.send_header('Location', urllib.parse.urlunsplit((url[0], url[1], url[2] + '/', url[3], url[4])))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            index = os.path.join(path, 'index.html')
+            if not os.path.isfile(index):
+                f = self.list_directory(path)
+                if f is not None:
+                    try:
+                        if not head_only:
+                            data = f.read()
+                            self.wfile.write(data)
+                            self._sent = len(data)
+                    finally:
+                        f.close()
+                return
+            path = index
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.send_error(404, 'File not found')
+            return
+
+        entity = self.entities.get(path, st)
+        ext = os.path.splitext(path)[1].lower()
+        compressible = ext in COMPRESSIBLE_EXTENSIONS
+        if HASHED_NAME_RE.search(path):
+            cache_control = self.hashed_cache_control
+        else:
+            cache_control = self.cache_control
+
+        body = None
+        encoding = None
+        if compressible and st.st_size >= MIN_COMPRESS_SIZE:
+            accepted = _accepted_encodings(self.headers.get('Accept-Encoding'))
+            for candidate in (('br',) if brotli is not None else ()) + ('gzip',):
+                if candidate in accepted:
+                    body = self.entities.body(path, st, candidate)
+                    if body is not None:
+                        encoding = candidate
+                        break
+        # compressed variants get their own validator so caches do not mix them up
+        etag = entity['etag'][:-1] + '-' + encoding + '"' if encoding else entity['etag']
+
+        if self._not_modified(etag, st):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            if cache_control:
+                self.send_header('Cache-Control', cache_control)
+            if compressible:
+                self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', self.guess_type(path))
+        self.send_header('Content-Length', str(len(body) if body is not None else st.st_size))
+        self.send_header('Last-Modified', self.date_time_string(st.st_mtime))
+        self.send_header('ETag', etag)
+        if cache_control:
+            self.send_header('Cache-Control', cache_control)
+        if compressible:
+            self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        if head_only:
+            return
+        if body is not None:
+            self.wfile.write(body)
+            self._sent = len(body)
+            return
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                self.wfile.write(chunk)
+                self._sent += len(chunk)
+
+    def _not_modified(self, etag: str, st: os.stat_result) -> bool:
+        inm = self.headers.get('If-None-Match')
+        if inm is not None:
+            # etag is the tag of the variant this request would get (weak comparison)
+            tags = [t.strip() for t in inm.split(',')]
+            return '*' in tags or any((t[2:] if t.startswith('W/') else t) == etag for t in tags)
+        ims = self.headers.get('If-Modified-Since')
+        if ims:
+            try:
+                since = email.utils.parsedate_to_datetime(ims)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=datetime.timezone.utc)
+            return int(st.st_mtime) <= since.timestamp()
+        return False
+
+
+def make_handler(root: str, overlay: str | None = None, cache_control: str = DEFAULT_CACHE_CONTROL,
+                 hashed_cache_control: str = DEFAULT_HASHED_CACHE_CONTROL, quiet: bool = False):
+    """Return a DevRequestHandler subclass bound to root (and optional overlay dir)."""
+    attrs = {
+        'overlay': os.path.abspath(overlay) if overlay else None,
+        'cache_control': cache_control,
+        'hashed_cache_control': hashed_cache_control,
+        'entities': EntityCache(),
+        'quiet': quiet,
+    }
+    handler = type('BoundDevRequestHandler', (DevRequestHandler,), attrs)
+    root = os.path.abspath(root)
+
+    def factory(*args, **kwargs):
+        return handler(*args, directory=root, **kwargs)
+    return factory
+
+
+def start_server(root: str = ROOT, port: int = 0, host: str = DEFAULT_HOST, overlay: str | None = None,
+                 cache_control: str = DEFAULT_CACHE_CONTROL, quiet: bool = True):
+    """Start a server in a daemon thread and return it; server.url is its base URL.
+
+    port=0 picks a free ephemeral port. Call stop_server() when done.
+    """
+    server = http.server.ThreadingHTTPServer(
+        (host, port), make_handler(root, overlay, cache_control, quiet=quiet))
+    server.daemon_threads = True
+    server.url = f'http://{host}:{server.server_address[1]}/'
+    thread = threading.Thread(target=server.serve_forever, name='dev-server', daemon=True)
+    thread.start()
+    server.thread = thread
+    return server
+
+
+def stop_server(server) -> None:
+    server.shutdown()
+    server.server_close()
+    server.thread.join(timeout=5)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Serve the site with caching validators and compression')
+    p.add_argument('--root', default=ROOT, help='Directory to serve (default: repo root)')
+    p.add_argument('--host', default=DEFAULT_HOST, help='Bind address (default %(default)s)')
+    p.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port (default %(default)s; 0 picks a free one)')
+    p.add_argument('--overlay', nargs='?', const=DEFAULT_OVERLAY_DIR, default=None,
+                   help='Serve files from this directory (default build/) in place of the originals')
+    p.add_argument('--cache-control', default=DEFAULT_CACHE_CONTROL,
+                   help="Cache-Control for regular files (default '%(default)s'; '' to omit)")
+    p.add_argument('--hashed-cache-control', default=DEFAULT_HASHED_CACHE_CONTROL,
+                   help="Cache-Control for content-hashed css/js (default '%(default)s')")
+    p.add_argument('--quiet', action='store_true', help='Disable the access log')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    overlay = None
+    if args.overlay:
+        overlay = args.overlay if os.path.isabs(args.overlay) else os.path.join(args.root, args.overlay)
+        if not os.path.isdir(overlay):
+            print(f'Warning: overlay directory {overlay} not found; serving {args.root} only')
+            overlay = None
+    handler = make_handler(args.root, overlay, args.cache_control, args.hashed_cache_control, args.quiet)
+    server = http.server.ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    host, port = server.server_address[:2]
+    print(f'Serving {args.root}' + (f' (overlay {overlay})' if overlay else '') + f' at http://{host}:{port}/')
+    print('Compression:', 'brotli, gzip' if brotli is not None else 'gzip')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('\nStopping')
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""Shared engine for tools/fix_indentation.py and tools/fix_frontend_indentation.py.
+
+Both tools rewrite leading indentation the same way: every leading group of 4
+spaces is replaced by 2 spaces until no line starts with 4 spaces. For a
+leading run of n spaces that is n -> 2 + n % 2 when n >= 4 (shorter runs are
+left alone), which this engine applies to each line in one regex pass; the
+result is verified in the same pass instead of re-walking the tree.
+
+Files are processed in a process pool. A cache (tools/.indent_cache.json)
+remembers the mtime, size and sha256 of files known to be clean, so unchanged
+files are skipped without being read and touched-but-identical files without
+being rescanned. --check never writes and exits with status 1 at the first
+offending line, printed as 'path:line'.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.indent_cache.json')
+# bump when the rewrite rule changes so cached "clean" entries are discarded
+ENGINE_VERSION = 1
+SKIP_DIRS = {'.git'}
+# below this many files the pool costs more than it saves
+MIN_PARALLEL_FILES = 32
+
+LEADING_RUN_RE = re.compile(r'(?m)^ {4,}')
+OFFENDING_RE = re.compile(r'(?m)^ {4}')
+
+
+def _shrink(match) -> str:
+    return '  ' if len(match.group(0)) % 2 == 0 else '   '
+
+
+def fix_text(text: str) -> tuple:
+    """Return (new_text, lines_changed) with every leading run of n >= 4 spaces -> 2 + n % 2."""
+    return LEADING_RUN_RE.subn(_shrink, text)
+
+
+def first_offense(text: str) -> int | None:
+    """1-based line number of the first line starting with 4 spaces, or None."""
+    m = OFFENDING_RE.search(text)
+    return text.count('\n', 0, m.start()) + 1 if m else None
+
+
+def process_file(path: str, check: bool = False, known_sha: str | None = None) -> dict:
+    """Fix (or in check mode, scan) one file; runs in a worker process."""
+    result = {'path': path}
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        sha = hashlib.sha256(raw).hexdigest()
+        if known_sha is not None and sha == known_sha:
+            result.update(clean=True, sha256=sha)
+            return result
+        text = raw.decode('utf-8')
+    except (OSError, UnicodeDecodeError):
+        # skip unreadable and non-text files
+        result['skipped'] = True
+        return result
+    if check:
+        line = first_offense(text)
+        result.update(clean=line is None, line=line, sha256=sha)
+        return result
+    new, count = fix_text(text)
+    if count and new != text:
+        data = new.encode('utf-8')
+        try:
+            with open(path, 'wb') as f:
+                f.write(data)
+        except OSError as e:
+            result['error'] = str(e)
+            return result
+        result['changed'] = True
+        sha = hashlib.sha256(data).hexdigest()
+    line = first_offense(new)
+    result.update(clean=line is None, line=line, sha256=sha)
+    return result
+
+
+def iter_files(root: str, exts: set):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for fn in sorted(filenames):
+            if os.path.splitext(fn)[1].lower() in exts:
+                yield os.path.join(dirpath, fn)
+
+
+def load_cache(path: str | None) -> dict:
+    if not path:
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get('files', {}) if data.get('version') == ENGINE_VERSION else {}
+
+
+def save_cache(path: str | None, files: dict) -> None:
+    if not path:
+        return
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': ENGINE_VERSION, 'files': files}, f, separators=(',', ':'), sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _results(paths: list, check: bool, shas: list, workers: int):
+    """Yield process_file results in path order, in a pool when worthwhile."""
+    if workers <= 1 or len(paths) < MIN_PARALLEL_FILES:
+        for path, sha in zip(paths, shas):
+            yield process_file(path, check, sha)
+        return
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        chunksize = max(1, len(paths) // (workers * 8))
+        yield from pool.map(process_file, paths, [check] * len(paths), shas, chunksize=chunksize)
+    finally:
+        # stops outstanding work when the consumer returns early (--check)
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def run(root: str, exts: set, check: bool = False, workers: int | None = None,
+        cache_file: str | None = DEFAULT_CACHE_FILE) -> dict:
+    """Fix or check every file under root with one of exts; returns a summary dict.
+
+    Summary keys: checked, skipped_cached, changed (paths), remaining (paths
+    still offending) and, in check mode, offense ((path, line) or None).
+    """
+    workers = workers or os.cpu_count() or 1
+    cache = load_cache(cache_file)
+    summary = {'checked': 0, 'skipped_cached': 0, 'changed': [], 'remaining': [], 'offense': None}
+    pending, shas, keys = [], [], {}
+    for path in iter_files(root, exts):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        key = os.path.abspath(path)
+        entry = cache.get(key)
+        keys[path] = key
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            summary['skipped_cached'] += 1
+            continue
+        pending.append(path)
+        # same size but new mtime: let the worker compare hashes before scanning
+        shas.append(entry[2] if entry and entry[1] == st.st_size else None)
+
+    try:
+        for result in _results(pending, check, shas, workers):
+            path = result['path']
+            key = keys[path]
+            if result.get('skipped'):
+                continue
+            summary['checked'] += 1
+            if result.get('error'):
+                print('Failed to write', path, result['error'])
+            if result.get('changed'):
+                summary['changed'].append(path)
+            if result.get('clean'):
+                try:
+                    st = os.stat(path)
+                    cache[key] = [st.st_mtime_ns, st.st_size, result['sha256']]
+                except OSError:
+                    cache.pop(key, None)
+                continue
+            cache.pop(key, None)
+            summary['remaining'].append(path)
+            if check:
+                summary['offense'] = (path, result.get('line'))
+                break
+    finally:
+        save_cache(cache_file, cache)
+    return summary
+
+
+def parse_args(argv=None, description: str = ''):
+    p = argparse.ArgumentParser(description=description)
+    p.add_argument('--root', default=ROOT, help='Tree to process (default: repo root)')
+    p.add_argument('--check', action='store_true', help='Do not write; exit 1 at the first offending line')
+    p.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    p.add_argument('--no-cache', action='store_true', help='Ignore and do not update the cache')
+    p.add_argument('--cache', default=DEFAULT_CACHE_FILE, help='Cache file (default tools/.indent_cache.json)')
+    return p.parse_args(argv)
+
+
+def main(exts: set, argv=None, description: str = 'Shrink leading 4-space indentation', label: str = ''):
+    args = parse_args(argv, description)
+    summary = run(args.root, exts, args.check, args.workers, None if args.no_cache else args.cache)
+    if args.check:
+        if summary['offense']:
+            path, line = summary['offense']
+            print(f'{os.path.relpath(path, args.root)}:{line}: line starts with 4 spaces')
+            sys.exit(1)
+        print(f"Indentation OK ({summary['checked']} checked, {summary['skipped_cached']} cached)")
+        return
+
+    print('Checked root:', args.root)
+    print('Files modified:', len(summary['changed']))
+    for p in summary['changed']:
+        print('  -', os.path.relpath(p, args.root))
+    print(f"Files scanned: {summary['checked']}, unchanged since last run: {summary['skipped_cached']}")
+    print('Files still containing lines that start with 4 spaces:', len(summary['remaining']))
+    for p in summary['remaining']:
+        print('  -', os.path.relpath(p, args.root))
+    if not summary['remaining']:
+        print('VERIFICATION PASS: no remaining leading-4-space lines found' + (f' in {label}' if label else ''))
+    else:
+        print('VERIFICATION FAIL: run grep to inspect remaining matches')
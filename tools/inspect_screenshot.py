@@ -1,70 +1,134 @@
-from PIL import Image, ImageStat
-import sys
+"""Summarize a screenshot: non-white coverage, its bounding box, colour stats.
+
+Usage:
+    python tools/inspect_screenshot.py [path] [--white-threshold 240] [--tile 512] [--json]
+
+The work is done with Pillow band operations (a lookup table via point(),
+histogram() and getbbox()) instead of per-pixel Python loops. With --tile the
+image is analysed in horizontal strips and the per-strip histograms and boxes
+are merged, so the RGBA/mask intermediates never exceed one strip.
+"""
+from __future__ import annotations
+import argparse
+import json
 import os
+import sys
+
+from PIL import Image, ImageChops, ImageStat
+
+DEFAULT_PATH = os.path.join('tools', 'smoke_screenshot.png')
+# a pixel is "white" when r, g and b are all above this value
+DEFAULT_WHITE_THRESHOLD = 240
+# pixels with alpha at or below this value are ignored
+DEFAULT_ALPHA_THRESHOLD = 0
+
+
+def _sample_coords(width: int, height: int) -> list:
+    inset = 10
+    right, bottom = max(0, width - inset), max(0, height - inset)
+    left, top = min(inset, width - 1), min(inset, height - 1)
+    return [(width // 2, height // 2), (left, top), (right, top), (left, bottom), (right, bottom)]
+
+
+def analyze_image(im: Image.Image | str, white_threshold: int = DEFAULT_WHITE_THRESHOLD,
+                  alpha_threshold: int = DEFAULT_ALPHA_THRESHOLD, tile: int | None = None,
+                  samples: list | None = None) -> dict:
+    """Return coverage and colour statistics for an image (or image path).
+
+    The result has size, non_white count and percent, bbox (inclusive
+    (minx, miny, maxx, maxy) of the non-white pixels, or None), mean/median
+    RGB over all pixels and the RGBA values at the sample coordinates
+    (default: center and the four corners inset by 10px). tile is the strip
+    height for tiled analysis; None analyses the image in one piece.
+    """
+    if isinstance(im, str):
+        im = Image.open(im)
+    width, height = im.size
+    # one LUT for all four bands: r/g/b -> 255 when "dark", alpha -> 255 when visible
+    dark = [255 if v <= white_threshold else 0 for v in range(256)]
+    visible = [255 if v > alpha_threshold else 0 for v in range(256)]
+    lut = dark * 3 + visible
+
+    strip = height if not tile or tile <= 0 else tile
+    non_white = 0
+    hist = [0] * 1024
+    box = None
+    for top in range(0, height, strip):
+        part = im.crop((0, top, width, min(height, top + strip))) if strip < height else im
+        rgba = part.convert('RGBA')
+        for i, count in enumerate(rgba.histogram()):
+            hist[i] += count
+        r, g, b, a = rgba.point(lut).split()
+        # non-white = (r or g or b dark) and visible
+        mask = ImageChops.darker(ImageChops.lighter(ImageChops.lighter(r, g), b), a)
+        non_white += mask.histogram()[255]
+        part_box = mask.getbbox()
+        if part_box:
+            l, t, rr, bb = part_box
+            part_box = (l, t + top, rr - 1, bb - 1 + top)
+            if box is None:
+                box = part_box
+            else:
+                box = (min(box[0], part_box[0]), min(box[1], part_box[1]),
+                       max(box[2], part_box[2]), max(box[3], part_box[3]))
+
+    stat = ImageStat.Stat(hist)
+    total = width * height
+    coords = samples if samples is not None else _sample_coords(width, height)
+    pixels = []
+    for x, y in coords:
+        px = im.getpixel((x, y))
+        if im.mode != 'RGBA':
+            px = Image.new(im.mode, (1, 1), px).convert('RGBA').getpixel((0, 0))
+        pixels.append({'x': x, 'y': y, 'rgba': list(px)})
+    return {
+        'size': [width, height],
+        'mode': im.mode,
+        'total_pixels': total,
+        'non_white_pixels': non_white,
+        'percent_non_white': non_white / total * 100 if total else 0.0,
+        'bbox': list(box) if box else None,
+        'mean_rgb': [round(v, 3) for v in stat.mean[:3]],
+        'median_rgb': stat.median[:3],
+        'samples': pixels,
+    }
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Summarize non-white coverage and colours of a screenshot')
+    p.add_argument('path', nargs='?', default=DEFAULT_PATH, help='Image to inspect (default %(default)s)')
+    p.add_argument('--white-threshold', type=int, default=DEFAULT_WHITE_THRESHOLD,
+                   help='Channels above this count as white (default %(default)s)')
+    p.add_argument('--alpha-threshold', type=int, default=DEFAULT_ALPHA_THRESHOLD,
+                   help='Pixels with alpha at or below this are ignored (default %(default)s)')
+    p.add_argument('--tile', type=int, default=None, help='Analyse in strips of this many rows')
+    p.add_argument('--json', action='store_true', help='Print the result as JSON')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(args.path):
+        print('ERROR: screenshot not found at', args.path)
+        sys.exit(2)
+    result = analyze_image(args.path, args.white_threshold, args.alpha_threshold, args.tile)
+    if args.json:
+        print(json.dumps(result, indent=1))
+        return
+
+    print('path:', args.path)
+    print('size:', result['size'][0], 'x', result['size'][1])
+    print('mode:', result['mode'])
+    print('total_pixels:', result['total_pixels'])
+    print('non_white_pixels:', result['non_white_pixels'])
+    print('percent_non_white: {:.3f}%'.format(result['percent_non_white']))
+    print('bounding_box_non_white:', tuple(result['bbox']) if result['bbox'] else None)
+    print('mean_rgb: {:.1f}, {:.1f}, {:.1f}'.format(*result['mean_rgb']))
+    print('median_rgb: {}'.format(result['median_rgb']))
+    for s in result['samples']:
+        print('pixel {},{}: rgba=({},{},{},{})'.format(s['x'], s['y'], *s['rgba']))
+    print('done')
+
 
-path = os.path.join('tools', 'smoke_screenshot.png')
-if not os.path.exists(path):
-    print('ERROR: screenshot not found at', path)
-    sys.exit(2)
-
-# Try to open image
-im = Image.open(path).convert('RGBA')
-width, height = im.size
-pixels = im.getdata()
-
-# Count non-white or non-transparent pixels
-non_white = 0
-for (r, g, b, a) in pixels:
-    if a == 0:
-        continue
-    # consider near-white as white
-    if not (r > 240 and g > 240 and b > 240):
-        non_white += 1
-
-total = width * height
-percent_non_white = non_white / total * 100
-
-# compute bounding box of non-white pixels
-bbox = None
-px = im.load()
-minx, miny = width, height
-maxx, maxy = 0, 0
-for y in range(height):
-    for x in range(width):
-        r, g, b, a = px[x, y]
-        if a == 0:
-            continue
-        if not (r > 240 and g > 240 and b > 240):
-            if x < minx: minx = x
-            if x > maxx: maxx = x
-            if y < miny: miny = y
-            if y > maxy: maxy = y
-
-if minx <= maxx and miny <= maxy:
-    bbox = (minx, miny, maxx, maxy)
-else:
-    bbox = None
-
-# basic color statistics
-stat = ImageStat.Stat(im)
-mean = stat.mean[:3]
-median = stat.median[:3] if hasattr(stat, 'median') else None
-
-print('path:', path)
-print('size:', width, 'x', height)
-print('mode:', im.mode)
-print('total_pixels:', total)
-print('non_white_pixels:', non_white)
-print('percent_non_white: {:.3f}%'.format(percent_non_white))
-print('bounding_box_non_white:', bbox)
-print('mean_rgb: {:.1f}, {:.1f}, {:.1f}'.format(*mean))
-if median:
-    print('median_rgb: {}'.format(median))
-
-# sample center pixel and a few coords
-coords = [ (width//2, height//2), (10,10), (width-10,10), (10,height-10), (width-10,height-10) ]
-for (x,y) in coords:
-    r,g,b,a = px[x,y]
-    print(f'pixel {x},{y}: rgba=({r},{g},{b},{a})')
-
-print('done')
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Turn background images into power-of-two mipmap pyramids for the canvas.
+
+Requires: Pillow (python -m pip install pillow)
+
+Usage:
+    python tools/mipmap_backgrounds.py photo.jpg              # -> build/backgrounds/photo/
+    python tools/mipmap_backgrounds.py photos/ --format jpeg --quality 85
+
+Every image (or every image in a given directory) is written as
+build/backgrounds/<name>/<w>x<h>.<ext>: the full-size image re-encoded, then
+each level half the size of the previous one (2x2 box filter, Image.reduce)
+until the longer edge is below --min-edge. index.json lists the levels,
+largest first, with the source size:
+
+    {"version": 1, "source": "photo.jpg", "width": 6000, "height": 4000,
+     "levels": [{"file": "6000x4000.webp", "width": 6000, "height": 4000, "bytes": ...}, ...]}
+
+MAFFIE.setBackgroundPyramid('backgrounds/<name>/index.json') in canvas.js then
+draws the smallest level that still covers the background's on-canvas size,
+so slider redraws resample about as many pixels as the canvas has instead of
+the whole photo. The files deploy as backgrounds/... through the build/
+overlay. Sources whose content and settings did not change are skipped.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # pragma: no cover - user will install locally
+    print('This script requires Pillow. Install with: pip install pillow')
+    raise
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_OUT_DIR = os.path.join(ROOT, 'build', 'backgrounds')
+DEFAULT_FORMAT = 'auto'
+DEFAULT_QUALITY = 82
+# stop halving once the longer edge would drop below this
+DEFAULT_MIN_EDGE = 256
+INDEX_NAME = 'index.json'
+INDEX_VERSION = 1
+IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.gif', '.tif', '.tiff'}
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg', 'png': 'png'}
+
+
+def pick_format(fmt: str, has_alpha: bool) -> str:
+    """'auto' -> webp when Pillow can write it, else jpeg (png for images with alpha)."""
+    if fmt != 'auto':
+        return fmt
+    if features.check('webp'):
+        return 'webp'
+    return 'png' if has_alpha else 'jpeg'
+
+
+def _save_level(im: Image.Image, path: str, fmt: str, quality: int) -> None:
+    tmp = path + '.tmp'
+    if fmt == 'webp':
+        im.save(tmp, 'WEBP', quality=quality, method=4)
+    elif fmt == 'jpeg':
+        im.convert('RGB').save(tmp, 'JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        im.save(tmp, 'PNG', optimize=True)
+    os.replace(tmp, path)
+
+
+def level_sizes(width: int, height: int, min_edge: int = DEFAULT_MIN_EDGE) -> list:
+    """[(w, h), ...] from full size down, halving (rounding up) while the longer edge stays >= min_edge."""
+    sizes = [(width, height)]
+    while True:
+        w, h = sizes[-1]
+        nw, nh = (w + 1) // 2, (h + 1) // 2
+        if max(nw, nh) < min_edge or (nw, nh) == (w, h):
+            return sizes
+        sizes.append((nw, nh))
+
+
+def build_pyramid(src: str, out_root: str, fmt: str = DEFAULT_FORMAT, quality: int = DEFAULT_QUALITY,
+                  min_edge: int = DEFAULT_MIN_EDGE, force: bool = False) -> dict | None:
+    """Write the pyramid of one image; returns its index (None when unchanged)."""
+    with open(src, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    name = os.path.splitext(os.path.basename(src))[0]
+    out_dir = os.path.join(out_root, name)
+    index_path = os.path.join(out_dir, INDEX_NAME)
+    settings = {'format': fmt, 'quality': quality, 'min_edge': min_edge}
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = None
+    if not force and previous and previous.get('sha256') == digest and previous.get('settings') == settings \
+            and all(os.path.exists(os.path.join(out_dir, lv['file'])) for lv in previous.get('levels', [])):
+        return None
+
+    with Image.open(src) as opened:
+        # browsers apply EXIF orientation to uploads; bake it in so levels match
+        im = ImageOps.exif_transpose(opened)
+        im.load()
+    has_alpha = im.mode in ('RGBA', 'LA', 'PA') or (im.mode == 'P' and 'transparency' in im.info)
+    im = im.convert('RGBA' if has_alpha else 'RGB')
+    level_fmt = pick_format(fmt, has_alpha)
+    ext = EXTENSIONS[level_fmt]
+
+    os.makedirs(out_dir, exist_ok=True)
+    levels = []
+    for i, (w, h) in enumerate(level_sizes(im.width, im.height, min_edge)):
+        if i:
+            # a 2x2 box filter is the exact average for a halving step
+            im = im.reduce(2)
+        file_name = f'{w}x{h}.{ext}'
+        path = os.path.join(out_dir, file_name)
+        _save_level(im, path, level_fmt, quality)
+        levels.append({'file': file_name, 'width': w, 'height': h, 'bytes': os.path.getsize(path)})
+
+    index = {
+        'version': INDEX_VERSION,
+        'source': os.path.basename(src),
+        'sha256': digest,
+        'settings': settings,
+        'width': levels[0]['width'],
+        'height': levels[0]['height'],
+        'levels': levels,
+    }
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1)
+    keep = {lv['file'] for lv in levels} | {INDEX_NAME}
+    for stale in sorted(os.listdir(out_dir)):
+        if stale not in keep and os.path.isfile(os.path.join(out_dir, stale)):
+            os.remove(os.path.join(out_dir, stale))
+    return index
+
+
+def iter_sources(paths: list):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTS:
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Build mipmap pyramids of background images')
+    p.add_argument('sources', nargs='+', help='Image files or directories of images')
+    p.add_argument('--out', default=DEFAULT_OUT_DIR, help='Output root (default build/backgrounds/)')
+    p.add_argument('--format', choices=['auto', 'webp', 'jpeg', 'png'], default=DEFAULT_FORMAT,
+                   help='Level encoding (default: webp when supported)')
+    p.add_argument('--quality', type=int, default=DEFAULT_QUALITY, help='WebP/JPEG quality (default %(default)s)')
+    p.add_argument('--min-edge', type=int, default=DEFAULT_MIN_EDGE,
+                   help='Smallest level keeps at least this long an edge (default %(default)s)')
+    p.add_argument('--force', action='store_true', help='Rebuild even when nothing changed')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    failed = 0
+    for src in iter_sources(args.sources):
+        try:
+            index = build_pyramid(src, args.out, args.format, args.quality, max(1, args.min_edge), args.force)
+        except (OSError, ValueError) as e:
+            print(f'Skipping {src}: {e}')
+            failed += 1
+            continue
+        if index is None:
+            print(f'{src}: unchanged')
+            continue
+        total = sum(lv['bytes'] for lv in index['levels'])
+        sizes = ', '.join(f"{lv['width']}x{lv['height']}" for lv in index['levels'])
+        print(f"{src}: {len(index['levels'])} levels ({sizes}), {total} bytes")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
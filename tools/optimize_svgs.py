@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""Optimize the SVG assets in svgs/ into a smaller copy for deployment.
+
+Usage:
+    python tools/optimize_svgs.py                      # svgs/ -> build/svgs/
+    python tools/optimize_svgs.py --digits 4 --src svgs --out build/svgs
+
+For every SVG the optimizer:
+  - strips editor metadata (sodipodi/inkscape/rdf/cc/dc elements and
+    attributes, <metadata>, data-name, comments and unreferenced ids)
+  - rounds coordinates to --digits significant digits relative to the
+    viewBox size (5 digits on a 767-unit drawing keeps 2 decimals, i.e. an
+    error far below one canvas pixel)
+  - collapses attribute-less groups, moves a lone child's group transform
+    onto the child and drops identity transforms
+  - rewrites path data compactly (no redundant separators, leading zeros or
+    repeated command letters)
+
+The output lands in build/svgs/ by default. build/ is the overlay directory
+of tools/upload_sftp_dir.py, so the uploader deploys the optimized copy in
+place of the original at svgs/<name>.svg. Only the standard library is used.
+"""
+from __future__ import annotations
+import argparse
+import math
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_SRC_DIR = os.path.join(ROOT, 'svgs')
+DEFAULT_OUT_DIR = os.path.join(ROOT, 'build', 'svgs')
+# significant digits kept relative to the largest viewBox dimension
+DEFAULT_DIGITS = 5
+
+SVG_NS = 'http://www.w3.org/2000/svg'
+XLINK_NS = 'http://www.w3.org/1999/xlink'
+EDITOR_NAMESPACES = {
+    'http://www.inkscape.org/namespaces/inkscape',
+    'http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd',
+    'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+    'http://creativecommons.org/ns#',
+    'http://purl.org/dc/elements/1.1/',
+    'http://ns.adobe.com/AdobeIllustrator/10.0/',
+    'http://ns.adobe.com/SaveForWeb/1.0/',
+}
+EDITOR_ATTRIBUTES = {'data-name'}
+# elements whose text content is significant (whitespace must be kept)
+TEXT_ELEMENTS = {'text', 'tspan', 'textPath', 'style', 'title', 'desc', 'script'}
+NUMERIC_ATTRIBUTES = {'x', 'y', 'width', 'height', 'cx', 'cy', 'r', 'rx', 'ry',
+                      'x1', 'y1', 'x2', 'y2', 'stroke-width', 'font-size'}
+
+ET.register_namespace('', SVG_NS)
+ET.register_namespace('xlink', XLINK_NS)
+
+NUMBER_RE = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+PLAIN_NUMBER_RE = re.compile(r'^\s*[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?\s*$')
+# parameters per path command; arcs (A) carry two single-character flags
+PATH_PARAMS = {'m': 2, 'l': 2, 'h': 1, 'v': 1, 'c': 6, 's': 4, 'q': 4, 't': 2, 'a': 7, 'z': 0}
+ID_REF_RE = re.compile(r'url\(\s*["\']?#([^)"\'\s]+)|#([A-Za-z_][\w.:-]*)')
+
+
+def _split(tag: str):
+    """Return (namespace, localname) for an ElementTree tag or attribute name."""
+    if tag.startswith('{'):
+        ns, _, local = tag[1:].partition('}')
+        return ns, local
+    return '', tag
+
+
+def format_number(value: float, decimals: int) -> str:
+    """Format value with at most decimals places and no redundant characters."""
+    text = f'{round(value, decimals):.{max(decimals, 0)}f}'
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    if text.startswith('0.'):
+        text = text[1:]
+    elif text.startswith('-0.'):
+        text = '-' + text[2:]
+    return '0' if text in ('-0', '', '-') else text
+
+
+def _join_numbers(parts: list) -> str:
+    """Concatenate formatted numbers, inserting a space only where required."""
+    out = ''
+    prev = ''
+    for part in parts:
+        if out and not (part.startswith('-') or (part.startswith('.') and '.' in prev and 'e' not in prev)):
+            out += ' '
+        out += part
+        prev = part
+    return out
+
+
+def parse_path(d: str) -> list:
+    """Parse path data into [(command, [params...]), ...].
+
+    Arc flags are returned as the ints 0/1. Raises ValueError on malformed data.
+    """
+    segments = []
+    i, n = 0, len(d)
+    cmd = None
+
+    def skip(i):
+        while i < n and (d[i].isspace() or d[i] == ','):
+            i += 1
+        return i
+
+    i = skip(i)
+    while i < n:
+        ch = d[i]
+        if ch.isalpha():
+            if ch.lower() not in PATH_PARAMS:
+                raise ValueError(f'unknown path command {ch!r}')
+            cmd = ch
+            i = skip(i + 1)
+            if cmd in 'zZ':
+                segments.append((cmd, []))
+                continue
+        elif cmd is None or cmd in 'zZ':
+            raise ValueError('path data must start with a command')
+        count = PATH_PARAMS[cmd.lower()]
+        params = []
+        for k in range(count):
+            i = skip(i)
+            if cmd in 'aA' and k in (3, 4):
+                if i >= n or d[i] not in '01':
+                    raise ValueError('bad arc flag')
+                params.append(int(d[i]))
+                i += 1
+                continue
+            m = NUMBER_RE.match(d, i)
+            if not m:
+                raise ValueError(f'expected number at {i}')
+            params.append(float(m.group()))
+            i = m.end()
+        segments.append((cmd, params))
+        # implicit repetition: extra coordinate pairs after M/m are lineto
+        if cmd == 'M':
+            cmd = 'L'
+        elif cmd == 'm':
+            cmd = 'l'
+        i = skip(i)
+    return segments
+
+
+def format_path(segments: list, decimals: int) -> str:
+    """Serialize parsed path data compactly."""
+    out = []
+    prev_cmd = None
+    last = None
+    for cmd, params in segments:
+        parts = [str(p) if (cmd in 'aA' and k in (3, 4)) else format_number(p, decimals)
+                 for k, p in enumerate(params)]
+        # a repeated command letter may be omitted, except after moveto where
+        # the implicit command is lineto
+        repeat = cmd == prev_cmd and cmd not in 'MmZz'
+        implicit_line = (prev_cmd == 'M' and cmd == 'L') or (prev_cmd == 'm' and cmd == 'l')
+        if (repeat or implicit_line) and last is not None:
+            # continues the previous number list: separate it like any other pair
+            out.append(_join_numbers([last] + parts)[len(last):])
+        else:
+            out.append(cmd + _join_numbers(parts))
+        last = parts[-1] if parts else None
+        prev_cmd = cmd if not implicit_line else prev_cmd
+    return ''.join(out)
+
+
+def round_numbers(text: str, decimals: int, sep: str | None = None) -> str:
+    """Round every number in a free-form value (points, transform, ...)."""
+    if sep is not None:
+        return sep.join(format_number(float(m.group()), decimals) for m in NUMBER_RE.finditer(text))
+    return NUMBER_RE.sub(lambda m: format_number(float(m.group()), decimals), text)
+
+
+IDENTITY_TRANSFORM_RE = re.compile(
+    r'\s*(?:translate\(\s*0(?:[\s,]+0)?\s*\)|scale\(\s*1(?:[\s,]+1)?\s*\)|rotate\(\s*0\s*\)'
+    r'|matrix\(\s*1[\s,]+0[\s,]+0[\s,]+1[\s,]+0[\s,]+0\s*\))\s*')
+
+
+def _referenced_ids(root: ET.Element) -> set:
+    refs = set()
+    for el in root.iter():
+        values = list(el.attrib.values())
+        if el.text and _split(el.tag)[1] == 'style':
+            values.append(el.text)
+        for value in values:
+            if '#' in value:
+                for m in ID_REF_RE.finditer(value):
+                    refs.add(m.group(1) or m.group(2))
+    return refs
+
+
+def _strip_editor_data(el: ET.Element, keep_ids: set) -> None:
+    for child in list(el):
+        if not isinstance(child.tag, str):
+            el.remove(child)  # comments / processing instructions
+            continue
+        ns, local = _split(child.tag)
+        if ns in EDITOR_NAMESPACES or local == 'metadata':
+            el.remove(child)
+            continue
+        _strip_editor_data(child, keep_ids)
+    for name in list(el.attrib):
+        ns, local = _split(name)
+        if ns in EDITOR_NAMESPACES or local in EDITOR_ATTRIBUTES:
+            del el.attrib[name]
+        elif local == 'id' and not ns and el.attrib[name] not in keep_ids:
+            del el.attrib[name]
+
+
+def _round_attributes(el: ET.Element, decimals: int, is_root: bool = False) -> None:
+    for name, value in list(el.attrib.items()):
+        ns, local = _split(name)
+        if ns:
+            continue
+        try:
+            if local == 'd':
+                el.attrib[name] = format_path(parse_path(value), decimals)
+            elif local == 'points':
+                el.attrib[name] = round_numbers(value, decimals, sep=' ')
+            elif local in ('transform', 'gradientTransform', 'patternTransform'):
+                value = IDENTITY_TRANSFORM_RE.sub(' ', value).strip()
+                if value:
+                    el.attrib[name] = round_numbers(value, decimals)
+                else:
+                    del el.attrib[name]
+            elif local in NUMERIC_ATTRIBUTES and not is_root and PLAIN_NUMBER_RE.match(value):
+                el.attrib[name] = format_number(float(value), decimals)
+        except ValueError:
+            # leave values we can't parse untouched
+            continue
+    for child in el:
+        _round_attributes(child, decimals)
+
+
+def _collapse_groups(el: ET.Element) -> None:
+    for child in list(el):
+        _collapse_groups(child)
+    index = 0
+    while index < len(el):
+        child = el[index]
+        if _split(child.tag)[1] != 'g' or (child.text and child.text.strip()):
+            index += 1
+            continue
+        attrs = dict(child.attrib)
+        if not len(child):
+            el.remove(child)
+            continue
+        if not attrs:
+            # hoist the children of an attribute-less group
+            el.remove(child)
+            for offset, grandchild in enumerate(list(child)):
+                el.insert(index + offset, grandchild)
+            continue
+        if list(attrs) == ['transform'] and len(child) == 1:
+            only = child[0]
+            inner = only.get('transform')
+            only.set('transform', attrs['transform'] + (' ' + inner if inner else ''))
+            el.remove(child)
+            el.insert(index, only)
+            continue
+        index += 1
+
+
+def _strip_whitespace(el: ET.Element) -> None:
+    if _split(el.tag)[1] in TEXT_ELEMENTS:
+        return
+    if el.text and not el.text.strip():
+        el.text = None
+    for child in el:
+        if child.tail and not child.tail.strip():
+            child.tail = None
+        _strip_whitespace(child)
+
+
+def _viewbox_decimals(root: ET.Element, digits: int) -> int:
+    size = 0.0
+    vb = root.get('viewBox')
+    if vb:
+        nums = [float(m.group()) for m in NUMBER_RE.finditer(vb)]
+        if len(nums) == 4:
+            size = max(abs(nums[2]), abs(nums[3]))
+    if not size:
+        for name in ('width', 'height'):
+            m = NUMBER_RE.match(root.get(name, '') or '')
+            if m:
+                size = max(size, abs(float(m.group())))
+    if not size:
+        return max(0, digits - 3)
+    return max(0, digits - int(math.floor(math.log10(size))) - 1)
+
+
+def optimize_svg(data: bytes, digits: int = DEFAULT_DIGITS) -> bytes:
+    """Return an optimized serialization of the SVG document in data."""
+    root = ET.fromstring(data)
+    keep_ids = _referenced_ids(root)
+    _strip_editor_data(root, keep_ids)
+    decimals = _viewbox_decimals(root, digits)
+    _round_attributes(root, decimals, is_root=True)
+    _collapse_groups(root)
+    _strip_whitespace(root)
+    return ET.tostring(root, encoding='utf-8', xml_declaration=False)
+
+
+def optimize_dir(src_dir: str, out_dir: str, digits: int = DEFAULT_DIGITS) -> list:
+    """Optimize every .svg in src_dir into out_dir.
+
+    Returns [(name, original_bytes, optimized_bytes), ...].
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    results = []
+    for name in sorted(os.listdir(src_dir)):
+        if not name.lower().endswith('.svg'):
+            continue
+        with open(os.path.join(src_dir, name), 'rb') as f:
+            data = f.read()
+        try:
+            out = optimize_svg(data, digits)
+        except ET.ParseError as e:
+            print(f'Skipping {name}: {e}')
+            continue
+        with open(os.path.join(out_dir, name), 'wb') as f:
+            f.write(out)
+        results.append((name, len(data), len(out)))
+    return results
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Optimize SVG assets for deployment')
+    p.add_argument('--src', default=DEFAULT_SRC_DIR, help='Directory with source SVGs (default svgs/)')
+    p.add_argument('--out', default=DEFAULT_OUT_DIR, help='Output directory (default build/svgs/)')
+    p.add_argument('--digits', type=int, default=DEFAULT_DIGITS,
+                   help='Significant digits relative to the viewBox size (default %(default)s)')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.isdir(args.src):
+        print('ERROR: source directory not found:', args.src)
+        sys.exit(2)
+    results = optimize_dir(args.src, args.out, args.digits)
+    total_in = total_out = 0
+    for name, before, after in results:
+        total_in += before
+        total_out += after
+        saved = (1 - after / before) * 100 if before else 0.0
+        print(f'{name}: {before} -> {after} bytes ({saved:.1f}% saved)')
+    if total_in:
+        print(f'Total: {total_in} -> {total_out} bytes ({(1 - total_out / total_in) * 100:.1f}% saved)')
+    print('Optimized SVGs written to', args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""Batch-export SVG + background + scale combinations through a pool of warm pages.
+
+Requires: playwright (python -m pip install playwright; python -m playwright install)
+
+Usage:
+    # every SVG in svgs/, with and without a background, at two scales
+    python tools/render_farm.py --svg "svgs/*.svg" --background none --background photo.jpg \\
+        --scales 100,150 --sizes 1200x800 --pages 8
+    # explicit jobs (JSON list or JSON lines); '-' reads JSON lines from stdin as a service
+    python tools/render_farm.py --jobs jobs.jsonl
+
+A job is {"svg": path, "background": path|null, "scale": 100, "offset": [x, y],
+"width": 1200, "height": 800, "out": "name.png"}; everything except svg or
+background is optional. Each page of the pool has index.html loaded from an
+in-process tools/dev_server.py and lives in its own browser context (so in its
+own renderer process); --browsers spreads the pages over several Chromium
+processes. Workers take jobs from a bounded queue (--queue, so a large or
+streaming job list never runs ahead of the pool), size the canvas, install
+the SVG text and the decoded background through W.MAFFIE, render with
+drawSvgOnCanvas (or requestRedraw for background-only jobs) and read the
+canvas back with toBlob, bypassing the download button. SVG texts and decoded
+backgrounds are cached per page, so repeated inputs are sent only once.
+
+Images and report.json (per-job queue/render/encode/transfer timings plus
+throughput) go to --out; the exit status is 1 when any job fails.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import base64
+import glob
+import json
+import math
+import os
+import sys
+import time
+from collections import OrderedDict
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:  # pragma: no cover - user will install locally
+    print('This script requires playwright. Install with: pip install playwright')
+    raise
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import summarize
+from dev_server import ROOT, start_server, stop_server
+
+DEFAULT_OUT_DIR = os.path.join(ROOT, 'tools', 'render_farm')
+DEFAULT_PAGES = max(1, min(8, os.cpu_count() or 1))
+DEFAULT_BROWSERS = 1
+DEFAULT_SIZE = (1200, 800)
+DEFAULT_SCALE = 100
+DEFAULT_FORMAT = 'png'
+FORMATS = {'png': 'image/png', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+# per-page cache of SVG texts and decoded backgrounds
+PAGE_CACHE_SIZE = 8
+JOB_TIMEOUT_MS = 30000
+BG_TYPES = {'.png': 'image/png', '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.webp': 'image/webp',
+            '.gif': 'image/gif', '.bmp': 'image/bmp', '.avif': 'image/avif'}
+
+# Renders one job in the page and returns the encoded canvas as base64.
+RENDER_JS = """async (job) => {
+    const M = window.MAFFIE;
+    const farm = window.__maffieFarm || (window.__maffieFarm = { assets: new Map() });
+    const canvas = document.getElementById('main-canvas');
+    const slider = document.getElementById('additional-image-scaler');
+    const t0 = performance.now();
+    job.evict.forEach(key => {
+        const old = farm.assets.get(key);
+        if (old && typeof old.close === 'function') old.close();
+        farm.assets.delete(key);
+    });
+    if (job.svgText !== null) farm.assets.set(job.svgKey, job.svgText);
+    if (job.bgData !== null) {
+        const blob = await (await fetch('data:' + job.bgType + ';base64,' + job.bgData)).blob();
+        farm.assets.set(job.bgKey, await createImageBitmap(blob));
+    }
+    await M.whenIdle();
+
+    // size the backing store through the page's own resizeMainCanvas logic
+    Object.assign(canvas.style, { width: job.width + 'px', height: job.height + 'px',
+        maxWidth: 'none', maxHeight: 'none', flex: 'none' });
+    M.resizeMainCanvas();
+    if (canvas.width !== job.width || canvas.height !== job.height) {
+        // borders/padding/box-sizing: correct by the measured difference once
+        canvas.style.width = (2 * job.width - canvas.width) + 'px';
+        canvas.style.height = (2 * job.height - canvas.height) + 'px';
+        M.resizeMainCanvas();
+    }
+
+    const svg = job.svgKey ? farm.assets.get(job.svgKey) : null;
+    M._bgImage = job.bgKey ? farm.assets.get(job.bgKey) : null;
+    M._bgOffset = { x: job.offset[0], y: job.offset[1] };
+    slider.value = String(job.scale);
+    M.setLastSvg(svg);
+    const t1 = performance.now();
+    if (svg) await M.drawSvgOnCanvas(svg, canvas);
+    else M.requestRedraw();
+    await M.whenIdle();
+    const t2 = performance.now();
+
+    const out = await new Promise(resolve => canvas.toBlob(resolve, job.type, job.quality));
+    if (!out) throw new Error('canvas.toBlob failed');
+    const data = await new Promise((resolve, reject) => {
+        const reader = new FileReader();
+        reader.onload = () => resolve(reader.result.slice(reader.result.indexOf(',') + 1));
+        reader.onerror = () => reject(reader.error);
+        reader.readAsDataURL(out);
+    });
+    const t3 = performance.now();
+    return { data: data, width: canvas.width, height: canvas.height,
+             setup_ms: t1 - t0, render_ms: t2 - t1, encode_ms: t3 - t2 };
+}"""
+
+
+def parse_size(spec: str) -> tuple:
+    w, h = spec.lower().split('x')
+    return int(w), int(h)
+
+
+def job_name(job: dict, ext: str) -> str:
+    svg = os.path.splitext(os.path.basename(job['svg']))[0] if job.get('svg') else 'nosvg'
+    bg = os.path.splitext(os.path.basename(job['background']))[0] if job.get('background') else 'nobg'
+    return f"{svg}_{bg}_s{job['scale']:g}_{job['width']}x{job['height']}.{ext}"
+
+
+def normalize_job(raw: dict, ext: str) -> dict:
+    """Fill in defaults; raises ValueError for jobs that cannot be rendered."""
+    if not isinstance(raw, dict):
+        raise ValueError('job must be an object')
+    if not raw.get('svg') and not raw.get('background'):
+        raise ValueError('job needs an svg or a background')
+    offset = raw.get('offset') or (0, 0)
+    if not isinstance(offset, (list, tuple)) or len(offset) != 2:
+        raise ValueError('offset must be [x, y]')
+    job = {
+        'svg': raw.get('svg') or None,
+        'background': raw.get('background') or None,
+        'scale': float(raw.get('scale', DEFAULT_SCALE)),
+        'offset': [float(v) for v in offset],
+        'width': int(raw.get('width', DEFAULT_SIZE[0])),
+        'height': int(raw.get('height', DEFAULT_SIZE[1])),
+    }
+    if job['width'] <= 0 or job['height'] <= 0:
+        raise ValueError('width and height must be positive')
+    if not all(math.isfinite(v) for v in job['offset']):
+        raise ValueError('offset must be finite')
+    if not (math.isfinite(job['scale']) and job['scale'] > 0):
+        raise ValueError('scale must be a positive number')
+    job['out'] = raw.get('out') or job_name(job, ext)
+    return job
+
+
+def grid_jobs(svg_patterns: list, backgrounds: list, scales: list, sizes: list):
+    """Cartesian product of the --svg/--background/--scales/--sizes options."""
+    svgs = sorted({p for pattern in svg_patterns for p in glob.glob(pattern)}) if svg_patterns else [None]
+    bgs = [None if b.lower() == 'none' else b for b in backgrounds] if backgrounds else [None]
+    for svg in svgs:
+        for bg in bgs:
+            for scale in scales:
+                for w, h in sizes:
+                    if svg or bg:
+                        yield {'svg': svg, 'background': bg, 'scale': scale, 'width': w, 'height': h}
+
+
+def read_jobs_file(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if text.lstrip().startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class PageSlot:
+    """One warm page plus a mirror of its asset cache, so each input is sent once.
+
+    open_page is a coroutine function returning a fresh page; it replaces a
+    page that was dropped after a timed-out job.
+    """
+
+    def __init__(self, index: int, page, open_page=None):
+        self.index = index
+        self.page = page
+        self.open_page = open_page
+        self.assets = OrderedDict()
+
+    async def drop_page(self) -> None:
+        """Close the page (and its context); the next job opens a new one."""
+        page, self.page = self.page, None
+        self.assets.clear()
+        try:
+            await page.context.close()
+        except Exception:
+            pass
+
+    def plan(self, key: str | None) -> tuple:
+        """(send, evicted_keys) for an asset key, updating the mirrored LRU."""
+        if key is None:
+            return False, []
+        if key in self.assets:
+            self.assets.move_to_end(key)
+            return False, []
+        self.assets[key] = True
+        evicted = []
+        while len(self.assets) > PAGE_CACHE_SIZE:
+            evicted.append(self.assets.popitem(last=False)[0])
+        return True, evicted
+
+
+def _asset_key(path: str | None) -> str | None:
+    if not path:
+        return None
+    st = os.stat(path)
+    return f'{os.path.abspath(path)}:{st.st_mtime_ns}:{st.st_size}'
+
+
+def _read_inputs(job: dict, send_svg: bool, send_bg: bool) -> tuple:
+    svg_text = bg_data = None
+    if send_svg:
+        with open(job['svg'], 'r', encoding='utf-8') as f:
+            svg_text = f.read()
+    if send_bg:
+        with open(job['background'], 'rb') as f:
+            bg_data = base64.b64encode(f.read()).decode('ascii')
+    return svg_text, bg_data
+
+
+def _write_output(path: str, data: str) -> int:
+    raw = base64.b64decode(data)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(raw)
+    os.replace(tmp, path)
+    return len(raw)
+
+
+async def render_job(slot: PageSlot, job: dict, mime: str, quality: float | None, out_dir: str) -> dict:
+    started = time.perf_counter()
+    if slot.page is None:
+        # the last job on this slot timed out and its page was closed
+        slot.page = await slot.open_page()
+    svg_key = _asset_key(job['svg'])
+    bg_key = _asset_key(job['background'])
+    send_svg, evict_svg = slot.plan(svg_key)
+    send_bg, evict_bg = slot.plan(bg_key)
+    evict = [k for k in evict_svg + evict_bg if k not in (svg_key, bg_key)]
+    try:
+        svg_text, bg_data = await asyncio.to_thread(_read_inputs, job, send_svg, send_bg)
+        bg_type = BG_TYPES.get(os.path.splitext(job['background'])[1].lower(), 'application/octet-stream') \
+            if job['background'] else None
+        sent = time.perf_counter()
+        out = await asyncio.wait_for(slot.page.evaluate(RENDER_JS, {
+            'svgKey': svg_key, 'svgText': svg_text, 'bgKey': bg_key, 'bgData': bg_data, 'bgType': bg_type,
+            'evict': evict, 'scale': job['scale'], 'offset': job['offset'],
+            'width': job['width'], 'height': job['height'], 'type': mime, 'quality': quality,
+        }), JOB_TIMEOUT_MS / 1000)
+        returned = time.perf_counter()
+        size = await asyncio.to_thread(_write_output, os.path.join(out_dir, job['out']), out['data'])
+    except asyncio.TimeoutError:
+        # wait_for only stops waiting: the render keeps running in the page and
+        # would overlap the next job, so the page is closed and replaced
+        await slot.drop_page()
+        raise
+    except BaseException:
+        # the page-side cache state is unknown after a failure; start over
+        slot.assets.clear()
+        await _reset_page_cache(slot)
+        raise
+    in_page = out['setup_ms'] + out['render_ms'] + out['encode_ms']
+    return {
+        'page': slot.index,
+        'width': out['width'],
+        'height': out['height'],
+        'bytes': size,
+        'setup_ms': round(out['setup_ms'], 2),
+        'render_ms': round(out['render_ms'], 2),
+        'encode_ms': round(out['encode_ms'], 2),
+        # round trip minus in-page work: argument/result serialization over the protocol
+        'transfer_ms': round(max(0.0, (returned - sent) * 1000 - in_page), 2),
+        'total_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+async def _reset_page_cache(slot: PageSlot) -> None:
+    try:
+        await slot.page.evaluate('() => { if (window.__maffieFarm) window.__maffieFarm.assets.clear(); }')
+    except Exception:
+        pass
+
+
+async def worker(slot: PageSlot, queue: asyncio.Queue, results: list, mime: str, quality, out_dir: str) -> None:
+    while True:
+        item = await queue.get()
+        try:
+            if item is None:
+                return
+            queued_at, job = item
+            result = {'job': job, 'queue_ms': round((time.perf_counter() - queued_at) * 1000, 2)}
+            try:
+                result.update(await render_job(slot, job, mime, quality, out_dir))
+                result['status'] = 'pass'
+                print(f"ok   {job['out']} {result['total_ms']:.0f}ms (page {slot.index})")
+            except Exception as e:
+                result.update(status='fail', exception=str(e) or type(e).__name__)
+                print(f"FAIL {job['out']}: {result['exception']}")
+            results.append(result)
+        finally:
+            queue.task_done()
+
+
+class JobDecodeError(ValueError):
+    """A stdin line that is not valid JSON; run_farm records it as a rejected job."""
+
+    def __init__(self, line: str, error: Exception):
+        super().__init__(f'bad JSON: {error}')
+        self.line = line
+
+
+async def _stdin_jobs():
+    while True:
+        line = await asyncio.to_thread(sys.stdin.readline)
+        if not line:
+            return
+        if not line.strip():
+            continue
+        try:
+            raw = json.loads(line)
+        except ValueError as e:
+            # one malformed line must not stop the service
+            raw = JobDecodeError(line.strip(), e)
+        yield raw
+
+
+async def _iter_jobs(source):
+    if hasattr(source, '__aiter__'):
+        async for raw in source:
+            yield raw
+    else:
+        for raw in source:
+            yield raw
+
+
+async def _new_page(browser, url: str, index: int, errors: list):
+    context = await browser.new_context(viewport={'width': 1280, 'height': 900})
+    page = await context.new_page()
+    page.on('pageerror', lambda exc: errors.append(f'page {index}: {exc}'))
+    await page.goto(url, wait_until='networkidle', timeout=15000)
+    await page.evaluate('() => window.MAFFIE.whenIdle()')
+    return page
+
+
+async def open_page(browser, url: str, index: int, errors: list):
+    page = await _new_page(browser, url, index, errors)
+    return PageSlot(index, page, lambda: _new_page(browser, url, index, errors))
+
+
+async def run_farm(url: str, jobs, pages: int, browsers: int, queue_size: int, fmt: str,
+                   quality: float | None, out_dir: str) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    mime = FORMATS[fmt]
+    results = []
+    rejected = []
+    page_errors = []
+    async with async_playwright() as p:
+        launched = await asyncio.gather(*(p.chromium.launch(headless=True) for _ in range(max(1, browsers))))
+        try:
+            warm_started = time.perf_counter()
+            slots = await asyncio.gather(*(open_page(launched[i % len(launched)], url, i, page_errors)
+                                           for i in range(pages)))
+            warm_s = time.perf_counter() - warm_started
+            # bounded: the producer waits whenever every page is busy and the queue is full
+            queue = asyncio.Queue(maxsize=queue_size)
+            tasks = [asyncio.create_task(worker(slot, queue, results, mime, quality, out_dir)) for slot in slots]
+            started = time.perf_counter()
+            async for raw in _iter_jobs(jobs):
+                try:
+                    if isinstance(raw, JobDecodeError):
+                        raise raw
+                    job = normalize_job(raw, 'jpg' if fmt == 'jpeg' else fmt)
+                except (ValueError, TypeError) as e:
+                    rejected.append({'job': getattr(e, 'line', raw), 'status': 'fail', 'exception': f'invalid job: {e}'})
+                    print('FAIL invalid job:', e)
+                    continue
+                await queue.put((time.perf_counter(), job))
+            for _ in tasks:
+                await queue.put(None)
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+        finally:
+            await asyncio.gather(*(b.close() for b in launched), return_exceptions=True)
+
+    results = rejected + results
+    done = [r for r in results if r['status'] == 'pass']
+    return {
+        'url': url,
+        'pages': pages,
+        'browsers': len(launched),
+        'queue': queue_size,
+        'format': fmt,
+        'warmup_seconds': round(warm_s, 3),
+        'seconds': round(elapsed, 3),
+        'jobs': len(results),
+        'failed': len(results) - len(done),
+        'jobs_per_second': round(len(done) / elapsed, 2) if elapsed > 0 else None,
+        'timing': {key: summarize([r[key] for r in done])
+                   for key in ('queue_ms', 'render_ms', 'encode_ms', 'transfer_ms', 'total_ms')},
+        'page_errors': page_errors,
+        'results': results,
+    }
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Batch-export canvas renders through a pool of warm pages')
+    p.add_argument('--jobs', help="JSON list or JSON-lines job file ('-' streams JSON lines from stdin)")
+    p.add_argument('--svg', action='append', default=[], help='SVG path or glob (repeatable)')
+    p.add_argument('--background', action='append', default=[], help="Background image path, or 'none' (repeatable)")
+    p.add_argument('--scales', default=str(DEFAULT_SCALE), help='Comma-separated scaler values in percent (default %(default)s)')
+    p.add_argument('--sizes', default='%dx%d' % DEFAULT_SIZE, help='Comma-separated WxH output sizes (default %(default)s)')
+    p.add_argument('--pages', type=int, default=DEFAULT_PAGES, help='Warm pages in the pool (default %(default)s)')
+    p.add_argument('--browsers', type=int, default=DEFAULT_BROWSERS, help='Chromium processes to spread pages over (default %(default)s)')
+    p.add_argument('--queue', type=int, default=None, help='Queued jobs before the producer waits (default 2 x pages)')
+    p.add_argument('--format', choices=sorted(FORMATS), default=DEFAULT_FORMAT, help='Output encoding (default %(default)s)')
+    p.add_argument('--quality', type=float, default=None, help='Encoder quality 0..1 for webp/jpeg')
+    p.add_argument('--url', help='Use an already running server instead of an in-process dev server')
+    p.add_argument('--out', default=DEFAULT_OUT_DIR, help='Output directory (default tools/render_farm/)')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.jobs == '-':
+        jobs = _stdin_jobs()
+    elif args.jobs:
+        jobs = read_jobs_file(args.jobs)
+    else:
+        try:
+            scales = [float(s) for s in args.scales.split(',') if s.strip()]
+            sizes = [parse_size(s) for s in args.sizes.split(',') if s.strip()]
+        except ValueError as e:
+            print('ERROR:', e)
+            sys.exit(2)
+        if not all(math.isfinite(s) and s > 0 for s in scales):
+            print(f'ERROR: --scales must be positive numbers: {args.scales}')
+            sys.exit(2)
+        jobs = list(grid_jobs(args.svg, args.background, scales, sizes))
+        if not jobs:
+            print('ERROR: no jobs; pass --jobs or --svg/--background')
+            sys.exit(2)
+    pages = max(1, args.pages)
+    server = None
+    url = args.url
+    if not url:
+        server = start_server(ROOT, port=0)
+        url = server.url
+    try:
+        report = asyncio.run(run_farm(url, jobs, pages, args.browsers, max(1, args.queue or 2 * pages),
+                                      args.format, args.quality, args.out))
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    report_path = os.path.join(args.out, 'report.json')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1)
+    total = report['timing']['total_ms']
+    print(f"{report['jobs']} jobs, {report['failed']} failed, {report['seconds']:.2f}s "
+          f"({report['jobs_per_second']} jobs/s) on {report['pages']} pages / {report['browsers']} browser(s)"
+          + (f", total p50={total['p50']:.0f}ms p95={total['p95']:.0f}ms" if total['n'] else ''))
+    for line in report['page_errors'][:10]:
+        print('   ', line)
+    print('Report written to', report_path)
+    if report['failed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
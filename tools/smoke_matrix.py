@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Smoke-test every thumbnail at several viewports and device-pixel ratios concurrently.
+
+Requires: playwright (python -m pip install playwright; python -m playwright install)
+
+Usage:
+    python tools/smoke_matrix.py
+    python tools/smoke_matrix.py --viewports 1200x800,390x844 --dprs 1,2,3 --concurrency 8
+
+One Chromium process serves the whole matrix. Each (viewport, dpr) cell is a
+job: it borrows a browser context from a pool (at most --concurrency contexts,
+reused between cells with the same device-pixel ratio), opens the page from an
+in-process tools/dev_server.py, then clicks every thumbnail in turn. After each
+click it waits for the render to finish (MAFFIE.renderState()), checks that the
+canvas is not blank and saves a canvas screenshot named
+'<svg>_<width>x<height>[@<dpr>x].png' (the naming tools/visual_regress.py
+reads). Console errors and page errors are attributed to the thumbnail being
+tested. Everything ends up in one report.json; the exit status is 1 when any
+check fails.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:  # pragma: no cover - user will install locally
+    print('This script requires playwright. Install with: pip install playwright')
+    raise
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import RENDER_TIMEOUT_MS, RENDERED_AFTER, parse_viewports, viewport_label
+from dev_server import ROOT, start_server, stop_server
+
+DEFAULT_OUT_DIR = os.path.join(ROOT, 'tools', 'smoke_matrix')
+DEFAULT_VIEWPORTS = '1200x800,800x600,390x844'
+DEFAULT_DPRS = '1,2'
+DEFAULT_CONCURRENCY = 4
+# share of sampled canvas pixels that are painted (alpha > 0)
+CANVAS_COVERAGE_JS = """() => {
+    const c = document.getElementById('main-canvas');
+    if (!c || !c.width || !c.height) return 0;
+    const data = c.getContext('2d').getImageData(0, 0, c.width, c.height).data;
+    const step = 4 * 7;
+    let painted = 0, total = 0;
+    for (let i = 3; i < data.length; i += step) { total++; if (data[i] > 0) painted++; }
+    return total ? painted / total : 0;
+}"""
+MIN_COVERAGE = 0.001
+
+
+def capture_name(svg: str, width: int, height: int, dpr: float) -> str:
+    stem = os.path.splitext(os.path.basename(svg))[0]
+    return f'{stem}_{viewport_label(width, height, dpr)}.png'
+
+
+class ContextPool:
+    """At most `size` browser contexts, reused between jobs with the same device-pixel ratio."""
+
+    def __init__(self, browser, size: int):
+        self.browser = browser
+        self.size = size
+        self._idle = []
+        self._total = 0
+        self._slots = asyncio.Semaphore(size)
+        self.created = 0
+
+    async def acquire(self, dpr: float):
+        await self._slots.acquire()
+        for i, (idle_dpr, context) in enumerate(self._idle):
+            if idle_dpr == dpr:
+                del self._idle[i]
+                return context
+        if self._total >= self.size and self._idle:
+            # every slot has a context; recycle an idle one with another ratio
+            _, stale = self._idle.pop(0)
+            self._total -= 1
+            await stale.close()
+        self._total += 1
+        self.created += 1
+        return await self.browser.new_context(device_scale_factor=dpr)
+
+    def release(self, dpr: float, context) -> None:
+        self._idle.append((dpr, context))
+        self._slots.release()
+
+    async def close(self) -> None:
+        for _, context in self._idle:
+            await context.close()
+        self._idle = []
+
+
+async def run_cell(pool: ContextPool, url: str, width: int, height: int, dpr: float, out_dir: str) -> list:
+    """Test every thumbnail in one (viewport, dpr) cell; returns one result per thumbnail."""
+    context = await pool.acquire(dpr)
+    results = []
+    errors = []
+    page = None
+    try:
+        page = await context.new_page()
+        page.on('console', lambda msg: errors.append(f'console.{msg.type}: {msg.text}') if msg.type == 'error' else None)
+        page.on('pageerror', lambda exc: errors.append(f'pageerror: {exc}'))
+        await page.set_viewport_size({'width': width, 'height': height})
+        await page.goto(url, wait_until='networkidle', timeout=15000)
+        # the first thumbnail is selected on load; let that render finish first
+        await page.wait_for_function(RENDERED_AFTER, arg=0, timeout=RENDER_TIMEOUT_MS)
+        thumbs = page.locator('.thumb')
+        names = await thumbs.evaluate_all(
+            "els => els.map(t => { const img = t.querySelector('img'); "
+            "return img ? (img.getAttribute('data-src') || img.getAttribute('src') || '') : ''; })")
+        for index, src in enumerate(names):
+            errors.clear()
+            result = {'svg': os.path.basename(src or f'thumb{index}'), 'viewport': f'{width}x{height}', 'dpr': dpr}
+            started = time.perf_counter()
+            try:
+                seen = await page.evaluate('() => window.MAFFIE.renderState().completed')
+                await thumbs.nth(index).click()
+                await page.wait_for_function(RENDERED_AFTER, arg=seen, timeout=RENDER_TIMEOUT_MS)
+                result['render_ms'] = await page.evaluate(
+                    "() => { const m = performance.getEntriesByType('measure')"
+                    ".filter(e => e.name.startsWith('maffie:render:')).pop(); return m ? m.duration : null; }")
+                result['coverage'] = await page.evaluate(CANVAS_COVERAGE_JS)
+                name = capture_name(result['svg'], width, height, dpr)
+                await page.locator('#main-canvas').screenshot(path=os.path.join(out_dir, name))
+                result['screenshot'] = name
+            except Exception as e:
+                result['exception'] = str(e)
+            result['ms'] = round((time.perf_counter() - started) * 1000, 1)
+            result['console_errors'] = list(errors)
+            problems = []
+            if result.get('exception'):
+                problems.append('exception')
+            if result.get('coverage', 0) < MIN_COVERAGE:
+                problems.append('blank canvas')
+            if errors:
+                problems.append('console errors')
+            result['status'] = 'fail' if problems else 'pass'
+            if problems:
+                result['problems'] = problems
+            results.append(result)
+    except Exception as e:
+        results.append({'svg': None, 'viewport': f'{width}x{height}', 'dpr': dpr, 'status': 'fail',
+                        'problems': ['page'], 'exception': str(e), 'console_errors': list(errors)})
+    finally:
+        if page is not None:
+            await page.close()
+        pool.release(dpr, context)
+    return results
+
+
+async def run_matrix(url: str, viewports: list, dprs: list, concurrency: int, out_dir: str) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    started = time.perf_counter()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        pool = ContextPool(browser, concurrency)
+        # viewports without their own '@<dpr>x' run at every --dprs ratio;
+        # grouped by ratio so pooled contexts are reused by the following cells
+        cells = sorted(((w, h, dpr) for w, h, fixed in viewports for dpr in ([fixed] if fixed else dprs)),
+                       key=lambda cell: cell[2])
+        try:
+            cell_results = await asyncio.gather(*(run_cell(pool, url, w, h, dpr, out_dir) for w, h, dpr in cells))
+        finally:
+            await pool.close()
+            await browser.close()
+    results = [r for cell in cell_results for r in cell]
+    failed = [r for r in results if r['status'] != 'pass']
+    render_ms = sorted(r['render_ms'] for r in results if r.get('render_ms') is not None)
+    return {
+        'url': url,
+        'cells': len(cells),
+        'checks': len(results),
+        'failed': len(failed),
+        'concurrency': concurrency,
+        'contexts_created': pool.created,
+        'seconds': round(time.perf_counter() - started, 3),
+        'render_ms_max': render_ms[-1] if render_ms else None,
+        'results': results,
+    }
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Concurrent smoke test over thumbnails x viewports x DPRs')
+    p.add_argument('--url', help='Test an already running server instead of an in-process dev server')
+    p.add_argument('--viewports', default=DEFAULT_VIEWPORTS, help="Comma-separated WxH[@<dpr>x] list; entries without a ratio use --dprs (default '%(default)s')")
+    p.add_argument('--dprs', default=DEFAULT_DPRS, help="Comma-separated device-pixel ratios (default '%(default)s')")
+    p.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                   help='Browser contexts in use at once (default %(default)s)')
+    p.add_argument('--out', default=DEFAULT_OUT_DIR, help='Screenshot and report directory (default tools/smoke_matrix/)')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        viewports = parse_viewports(args.viewports, default_dpr=None)
+        dprs = [float(d) for d in args.dprs.split(',') if d.strip()]
+    except ValueError as e:
+        print('ERROR:', e)
+        sys.exit(2)
+    server = None
+    url = args.url
+    if not url:
+        server = start_server(ROOT, port=0)
+        url = server.url
+    try:
+        report = asyncio.run(run_matrix(url, viewports, dprs, max(1, args.concurrency), args.out))
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    report_path = os.path.join(args.out, 'report.json')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1)
+    for r in report['results']:
+        if r['status'] != 'pass':
+            print(f"FAIL {r['svg']} {r['viewport']} @{r['dpr']:g}x: {', '.join(r.get('problems', []))}"
+                  + (f" ({r['exception']})" if r.get('exception') else ''))
+            for line in r.get('console_errors', []):
+                print('   ', line)
+    print(f"{report['checks']} checks in {report['cells']} cells, {report['failed']} failed, "
+          f"{report['seconds']:.2f}s with {report['concurrency']} concurrent contexts")
+    print('Report written to', report_path)
+    if report['failed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
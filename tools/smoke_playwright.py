@@ -1,48 +1,52 @@
 from playwright.sync_api import sync_playwright
-import time
 import os
 from PIL import Image
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import RENDER_TIMEOUT_MS, RENDERED_AFTER
+from warm_browser import AppBrowser
+
 OUT = 'tools/smoke_screenshot.png'
-URL = 'http://localhost:8080/'
+# set SMOKE_URL to test an already running server instead of an in-process one.
+# With tools/browser_daemon.py running, a warm page is leased from it instead of
+# launching a browser (MAFFIE_NO_DAEMON=1 always launches one).
+URL = os.environ.get('SMOKE_URL')
 
 console_msgs = []
 
-with sync_playwright() as p:
-  browser = p.chromium.launch(headless=True)
-  context = browser.new_context(viewport={"width": 1200, "height": 800})
-  page = context.new_page()
 
-  def on_console(msg):
-    try:
-      console_msgs.append(f"{msg.type}: {msg.text}")
-    except Exception as e:
-      console_msgs.append(f"console callback error: {e}")
+def on_console(msg):
+  try:
+    console_msgs.append(f"{msg.type}: {msg.text}")
+  except Exception as e:
+    console_msgs.append(f"console callback error: {e}")
 
-  page.on('console', on_console)
 
-  print('navigating to', URL)
-  page.goto(URL, wait_until='networkidle', timeout=15000)
+with sync_playwright() as p, AppBrowser(p, url=URL) as app:
+  # the page comes back with the app loaded and its first render finished
+  with app.page(1200, 800, setup=lambda page: page.on('console', on_console)) as page:
+    print('testing', app.url, '(warm page from the browser daemon)' if app.warm else '')
 
-  # wait for thumbnails to appear
-  page.wait_for_selector('.thumb', timeout=5000)
+    # wait for thumbnails to appear
+    page.wait_for_selector('.thumb', timeout=5000)
 
-  # click first thumbnail
-  print('clicking first thumbnail')
-  page.click('.thumb')
-  # give the canvas some time to draw
-  time.sleep(0.5)
+    # click first thumbnail and wait for the resulting render
+    print('clicking first thumbnail')
+    seen = page.evaluate('() => window.MAFFIE.renderState().completed')
+    page.click('.thumb')
+    page.wait_for_function(RENDERED_AFTER, arg=seen, timeout=RENDER_TIMEOUT_MS)
 
-  # resize viewport to force redraw
-  print('resizing viewport to 800x600')
-  page.set_viewport_size({'width': 800, 'height': 600})
-  time.sleep(0.5)
+    # resize viewport to force redraw (debounced in canvas.js)
+    print('resizing viewport to 800x600')
+    seen = page.evaluate('() => window.MAFFIE.renderState().completed')
+    page.set_viewport_size({'width': 800, 'height': 600})
+    page.wait_for_function(RENDERED_AFTER, arg=seen, timeout=RENDER_TIMEOUT_MS)
 
-  # capture screenshot
-  os.makedirs(os.path.dirname(OUT), exist_ok=True)
-  page.screenshot(path=OUT, full_page=False)
-  print('screenshot saved to', OUT)
+    # capture screenshot
+    os.makedirs(os.path.dirname(OUT), exist_ok=True)
+    page.screenshot(path=OUT, full_page=False)
+    print('screenshot saved to', OUT)
 
   # open screenshot and assert center pixel is not near-white
   try:
@@ -66,10 +70,9 @@ with sync_playwright() as p:
   print('\nConsole messages:')
   for m in console_msgs:
     print(m)
-  browser.close()
 
-  if not assertion_passed:
-    print('\nSmoke test RESULT: FAIL')
-    sys.exit(2)
+if not assertion_passed:
+  print('\nSmoke test RESULT: FAIL')
+  sys.exit(2)
 
 print('Smoke test RESULT: PASS')
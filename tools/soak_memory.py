@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Memory soak test: repeat UI cycles and fail when the JS heap or DOM keeps growing.
+
+Requires: playwright (python -m pip install playwright; python -m playwright install)
+
+Usage:
+    python tools/soak_memory.py                          # every phase, 1000 cycles each
+    python tools/soak_memory.py --phases click,background --cycles 3000
+
+Each phase exercises one code path in a fresh page so growth can be attributed
+to it:
+
+- click: click the thumbnails round-robin (fetch + drawSvgOnCanvas)
+- resize: alternate the viewport between two sizes (handleResize redraw)
+- slider: 'input' events on #additional-image-scaler over a background image
+- background: load two generated images into #additional-image-input in turn,
+  then clear them (Image/object URL handling and MAFFIE._bgImage)
+- download: click #download-canvas (toBlob + object URL + <a> element)
+
+After --warmup cycles, and then every --sample-every cycles, a garbage
+collection is forced (HeapProfiler.collectGarbage) and the Chrome DevTools
+Protocol Performance.getMetrics values are sampled: JSHeapUsedSize, Nodes,
+JSEventListeners and Documents. The growth per cycle is the least-squares
+slope over those samples; a phase fails when the heap grows faster than
+--max-heap-per-cycle bytes or the DOM node / listener counts grow faster than
+--max-nodes-per-cycle. All samples and slopes go to tools/soak_memory.json and
+the exit status is 1 when any phase fails.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+
+try:
+    from playwright.sync_api import sync_playwright
+except ImportError:  # pragma: no cover - user will install locally
+    print('This script requires playwright. Install with: pip install playwright')
+    raise
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import RENDER_TIMEOUT_MS, RENDERED_AFTER
+from dev_server import ROOT, start_server, stop_server
+
+DEFAULT_OUT = os.path.join(ROOT, 'tools', 'soak_memory.json')
+PHASES = ('click', 'resize', 'slider', 'background', 'download')
+DEFAULT_CYCLES = 1000
+DEFAULT_WARMUP = 50
+DEFAULT_SAMPLE_EVERY = 50
+# failure thresholds: sustained growth per cycle after GC
+DEFAULT_MAX_HEAP_PER_CYCLE = 1024
+DEFAULT_MAX_NODES_PER_CYCLE = 0.01
+METRICS = ('JSHeapUsedSize', 'Nodes', 'JSEventListeners', 'Documents')
+# the two viewports the resize phase alternates between
+RESIZE_VIEWPORTS = ({'width': 1200, 'height': 800}, {'width': 900, 'height': 700})
+
+# Runs `count` cycles of one in-page phase, starting at cycle index `start`.
+CYCLE_JS = """async ({ phase, start, count, timeout }) => {
+    const M = window.MAFFIE;
+    const soak = window.__maffieSoak || (window.__maffieSoak = {});
+    const input = document.getElementById('additional-image-input');
+    const slider = document.getElementById('additional-image-scaler');
+
+    function rendered(seen) {
+        return new Promise((resolve, reject) => {
+            const timer = setTimeout(() => {
+                window.removeEventListener('maffie:rendered', check);
+                reject(new Error(phase + ': no render within ' + timeout + 'ms'));
+            }, timeout);
+            function check() {
+                const s = M.renderState();
+                if (s.completed > seen && s.pending === 0) {
+                    clearTimeout(timer);
+                    window.removeEventListener('maffie:rendered', check);
+                    resolve();
+                }
+            }
+            window.addEventListener('maffie:rendered', check);
+            check();
+        });
+    }
+
+    async function cycle(trigger) {
+        const seen = M.renderState().completed;
+        trigger();
+        await rendered(seen);
+    }
+
+    async function imageBlob(w, h, hue) {
+        const c = new OffscreenCanvas(w, h);
+        const g = c.getContext('2d');
+        const grad = g.createLinearGradient(0, 0, w, h);
+        grad.addColorStop(0, 'hsl(' + hue + ', 70%, 60%)');
+        grad.addColorStop(1, 'hsl(' + (hue + 120) + ', 70%, 40%)');
+        g.fillStyle = grad;
+        g.fillRect(0, 0, w, h);
+        return c.convertToBlob({ type: 'image/png' });
+    }
+
+    async function setBackground(blob, name) {
+        const dt = new DataTransfer();
+        dt.items.add(new File([blob], name, { type: 'image/png' }));
+        input.files = dt.files;
+        await cycle(() => input.dispatchEvent(new Event('change')));
+    }
+
+    if ((phase === 'background' || phase === 'slider') && !soak.images) {
+        soak.images = [await imageBlob(2400, 1600, 20), await imageBlob(1600, 2400, 200)];
+    }
+    if (phase === 'slider' && !M._bgImage) {
+        await setBackground(soak.images[0], 'soak-0.png');
+    }
+
+    const thumbs = document.querySelectorAll('.thumb');
+    for (let i = start; i < start + count; i++) {
+        if (phase === 'click') {
+            await cycle(() => thumbs[i % thumbs.length].click());
+        } else if (phase === 'slider') {
+            await cycle(() => {
+                slider.value = String(50 + (i * 7) % 151);
+                slider.dispatchEvent(new Event('input'));
+            });
+        } else if (phase === 'background') {
+            if (i % 3 === 2) {
+                await cycle(() => document.getElementById('clear-additional-image').click());
+            } else {
+                await setBackground(soak.images[i % 3], 'soak-' + (i % 3) + '.png');
+            }
+        } else if (phase === 'download') {
+            // the handler appends (and removes) an <a download> once toBlob completes
+            await new Promise((resolve, reject) => {
+                const timer = setTimeout(() => { mo.disconnect(); reject(new Error('download: no link within ' + timeout + 'ms')); }, timeout);
+                const mo = new MutationObserver(() => { clearTimeout(timer); mo.disconnect(); resolve(); });
+                mo.observe(document.body, { childList: true });
+                document.getElementById('download-canvas').click();
+            });
+        } else {
+            throw new Error('unknown phase ' + phase);
+        }
+    }
+    return M.renderState().completed;
+}"""
+
+
+def sample_metrics(cdp) -> dict:
+    """Force a GC, then return the METRICS values from Performance.getMetrics."""
+    cdp.send('HeapProfiler.collectGarbage')
+    values = {m['name']: m['value'] for m in cdp.send('Performance.getMetrics')['metrics']}
+    return {name: values.get(name) for name in METRICS}
+
+
+def slope(points: list):
+    """Least-squares slope of [(x, y), ...] (None with fewer than two distinct x)."""
+    n = len(points)
+    if n < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    if not sxx:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / sxx
+
+
+def run_cycles(page, phase: str, start: int, count: int) -> None:
+    if phase != 'resize':
+        page.evaluate(CYCLE_JS, {'phase': phase, 'start': start, 'count': count, 'timeout': RENDER_TIMEOUT_MS})
+        return
+    for i in range(start, start + count):
+        seen = page.evaluate('() => window.MAFFIE.renderState().completed')
+        # the page opens at RESIZE_VIEWPORTS[0], so cycle 0 moves to the other size
+        page.set_viewport_size(RESIZE_VIEWPORTS[(i + 1) % 2])
+        page.wait_for_function(RENDERED_AFTER, arg=seen, timeout=RENDER_TIMEOUT_MS)
+
+
+def run_phase(context, url: str, phase: str, cycles: int, warmup: int, sample_every: int) -> dict:
+    """Soak one phase in a fresh page; returns its samples and per-cycle slopes."""
+    page = context.new_page()
+    errors = []
+    page.on('pageerror', lambda exc: errors.append(f'pageerror: {exc}'))
+    page.on('console', lambda msg: errors.append(f'console.{msg.type}: {msg.text}') if msg.type == 'error' else None)
+    started = time.perf_counter()
+    samples = []
+    try:
+        page.set_viewport_size(RESIZE_VIEWPORTS[0])
+        page.goto(url, wait_until='networkidle', timeout=15000)
+        page.wait_for_function(RENDERED_AFTER, arg=0, timeout=RENDER_TIMEOUT_MS)
+        cdp = context.new_cdp_session(page)
+        cdp.send('Performance.enable')
+        run_cycles(page, phase, 0, warmup)
+        done = 0
+        samples.append(dict(sample_metrics(cdp), cycle=0))
+        while done < cycles:
+            batch = min(sample_every, cycles - done)
+            run_cycles(page, phase, warmup + done, batch)
+            done += batch
+            samples.append(dict(sample_metrics(cdp), cycle=done))
+    except Exception as e:
+        errors.append(f'exception: {e}')
+    finally:
+        page.close()
+
+    result = {'phase': phase, 'cycles': samples[-1]['cycle'] if samples else 0,
+              'seconds': round(time.perf_counter() - started, 2), 'samples': samples, 'errors': errors}
+    result['per_cycle'] = {name: slope([(s['cycle'], s[name]) for s in samples if s.get(name) is not None])
+                           for name in METRICS}
+    if samples:
+        result['growth'] = {name: samples[-1][name] - samples[0][name] for name in METRICS
+                            if samples[0].get(name) is not None and samples[-1].get(name) is not None}
+    return result
+
+
+def judge(result: dict, max_heap: float, max_nodes: float) -> list:
+    """Names of the limits a phase result exceeds."""
+    problems = []
+    per_cycle = result['per_cycle']
+    if result['errors']:
+        problems.append('errors')
+    if len(result['samples']) < 2:
+        problems.append('no samples')
+        return problems
+    if (per_cycle.get('JSHeapUsedSize') or 0) > max_heap:
+        problems.append('heap')
+    for name in ('Nodes', 'JSEventListeners', 'Documents'):
+        if (per_cycle.get(name) or 0) > max_nodes:
+            problems.append(name)
+    return problems
+
+
+def run_soak(url: str, phases, cycles: int, warmup: int, sample_every: int,
+             max_heap: float, max_nodes: float) -> dict:
+    results = []
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        # downloads are cancelled, only the page-side work is under test
+        context = browser.new_context(accept_downloads=False)
+        try:
+            for phase in phases:
+                print(f'{phase}: {warmup} warmup + {cycles} cycles...')
+                result = run_phase(context, url, phase, cycles, warmup, sample_every)
+                result['problems'] = judge(result, max_heap, max_nodes)
+                result['status'] = 'fail' if result['problems'] else 'pass'
+                results.append(result)
+            version = browser.version
+        finally:
+            context.close()
+            browser.close()
+    return {
+        'version': 1,
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'browser': f'chromium {version}',
+            'url': url,
+            'cycles': cycles,
+            'warmup': warmup,
+            'sample_every': sample_every,
+            'max_heap_per_cycle': max_heap,
+            'max_nodes_per_cycle': max_nodes,
+        },
+        'failed': sum(1 for r in results if r['status'] != 'pass'),
+        'results': results,
+    }
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Soak the page with repeated UI cycles and detect memory growth')
+    p.add_argument('--url', help='Test an already running server instead of an in-process dev server')
+    p.add_argument('--phases', default=','.join(PHASES), help="Comma-separated subset of %(default)s")
+    p.add_argument('--cycles', type=int, default=DEFAULT_CYCLES, help='Measured cycles per phase (default %(default)s)')
+    p.add_argument('--warmup', type=int, default=DEFAULT_WARMUP, help='Unmeasured cycles per phase (default %(default)s)')
+    p.add_argument('--sample-every', type=int, default=DEFAULT_SAMPLE_EVERY,
+                   help='Cycles between GC + metric samples (default %(default)s)')
+    p.add_argument('--max-heap-per-cycle', type=float, default=DEFAULT_MAX_HEAP_PER_CYCLE,
+                   help='Allowed JS heap growth per cycle in bytes (default %(default)s)')
+    p.add_argument('--max-nodes-per-cycle', type=float, default=DEFAULT_MAX_NODES_PER_CYCLE,
+                   help='Allowed DOM node / listener / document growth per cycle (default %(default)s)')
+    p.add_argument('--out', default=DEFAULT_OUT, help='JSON output path (default tools/soak_memory.json; - for stdout)')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    phases = [s.strip() for s in args.phases.split(',') if s.strip()]
+    unknown = [s for s in phases if s not in PHASES]
+    if unknown:
+        print('ERROR: unknown phase(s):', ', '.join(unknown))
+        sys.exit(2)
+    server = None
+    url = args.url
+    if not url:
+        server = start_server(ROOT, port=0)
+        url = server.url
+    try:
+        report = run_soak(url, phases, args.cycles, args.warmup, max(1, args.sample_every),
+                          args.max_heap_per_cycle, args.max_nodes_per_cycle)
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    print('\nGrowth per cycle (after GC):')
+    for r in report['results']:
+        pc = r['per_cycle']
+        heap = pc.get('JSHeapUsedSize')
+        nodes = pc.get('Nodes')
+        listeners = pc.get('JSEventListeners')
+        print(f"  {r['phase']:<10} {r['status'].upper():<4} heap={heap if heap is None else f'{heap:+.1f}B'} "
+              f"nodes={nodes if nodes is None else f'{nodes:+.3f}'} "
+              f"listeners={listeners if listeners is None else f'{listeners:+.3f}'} "
+              f"({r['cycles']} cycles, {r['seconds']:.1f}s)"
+              + (f" [{', '.join(r['problems'])}]" if r['problems'] else ''))
+        for line in r['errors'][:5]:
+            print('     ', line)
+    if args.out == '-':
+        print(json.dumps(report, indent=1))
+    else:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+        print('Results written to', args.out)
+    if report['failed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -16,11 +16,22 @@ and uploads files in binary mode.
 """
 from __future__ import annotations
 import argparse
+import concurrent.futures
+import contextlib
+import datetime
 import getpass
+import hashlib
+import json
 import os
 import posixpath
+import queue
+import shlex
+import socket
 import sys
 import stat
+import tarfile
+import threading
+import time
 
 try:
     import paramiko
@@ -28,6 +39,14 @@ except ImportError:  # pragma: no cover - user will install locally
     print('This script requires paramiko. Install with: pip install paramiko')
     raise
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import percentile
+
+try:
+    from watchdog.observers import Observer
+except ImportError:  # optional; --watch polls the tree without it
+    Observer = None
+
 
 # Optional defaults: set these here to avoid passing CLI args.
 # Example:
@@ -57,15 +76,113 @@ DEFAULT_FILE_EXTENSIONS_TO_UPLOAD = [
     'svg'
     ]
 
+# Extensions allowed in addition to the whitelist above, but only below these
+# subdirectories of the build overlay (DEFAULT_OVERLAY_DIR): the images and
+# JSON maps the build tools generate there. A stray screenshot or JSON file
+# elsewhere in the checkout is never uploaded.
+DEFAULT_OVERLAY_EXTENSIONS = {
+    # tools/build_thumb_sprites.py: sprite sheets and sprites.json
+    'thumbs': ['png', 'webp', 'json'],
+    # tools/mipmap_backgrounds.py: pyramid levels and index.json
+    'backgrounds': ['webp', 'jpg', 'png', 'json'],
+    # tools/compile_drawlists.py
+    'drawlists': ['json'],
+    }
+
 # Optional list of directory names to skip when walking the local tree.
 # Example: DEFAULT_SKIP_DIRS = ['.git', '__pycache__']
 # Names are matched case-insensitively against directory basenames and will
 # prevent os.walk from descending into those directories.
 DEFAULT_SKIP_DIRS = [
     '.git',
-    'tools'
+    'tools',
+    # build tool caches (e.g. build/thumbs/.tiles)
+    '.tiles',
+    # local environments and dependencies
+    'venv',
+    '.venv',
+    'node_modules',
+    '__pycache__'
     ]
 
+# Optional build overlay directory, relative to the local root. Files under it
+# replace the file at the same relative path (e.g. build/svgs/x.svg is uploaded
+# as svgs/x.svg) and files that only exist there are added. The build tools in
+# tools/ (optimize_svgs.py, ...) write their output here. The overlay itself is
+# never uploaded as a subdirectory. None disables it.
+DEFAULT_OVERLAY_DIR = 'build'
+# Manifest written into the overlay by tools/build_assets.py, mapping original
+# asset paths to their content-hashed copies. The superseded originals and the
+# manifest itself are not uploaded.
+DEFAULT_ASSET_MANIFEST = 'asset-manifest.json'
+
+# Incremental sync: when enabled, only new or changed files are uploaded and
+# remote files that no longer exist locally are deleted, instead of wiping the
+# remote directory first. The manifest records what the last sync deployed
+# (relative path -> size, mtime, sha256). A relative manifest path is resolved
+# against this script's directory so it never ends up inside the uploaded tree.
+DEFAULT_SYNC = False
+DEFAULT_MANIFEST_FILE = '.sftp_manifest.json'
+
+# Number of concurrent uploads. Each worker gets its own SFTP channel over the
+# single SSH transport, so many small files are not serialized behind one
+# channel's round trips. Set to 1 for strictly sequential uploads.
+DEFAULT_WORKERS = 4
+
+# Transfer mode for full (non --sync) deploys:
+#   'files' - upload file by file over SFTP
+#   'tar'   - stream all whitelisted files as a single tar archive into
+#             `tar -x` on the server (one exec_command pipe instead of an
+#             open/write/close per file). Falls back to 'files' when the
+#             server does not allow running commands (e.g. SFTP-only chroots).
+DEFAULT_TRANSFER_MODE = 'files'
+# gzip-compress the tar stream (cheap for text assets like html/css/js/svg)
+DEFAULT_TAR_GZIP = True
+
+# Files at least DEFAULT_LARGE_FILE_THRESHOLD bytes are uploaded by
+# put_large_file() instead of sftp.put(): pipelined writes of
+# DEFAULT_CHUNK_SIZE bytes into '<name>.part', resumed from the existing
+# partial file when it matches the local prefix, then renamed into place.
+# Window/packet sizes apply to the dedicated SFTP channel opened for each
+# large file (None keeps paramiko's defaults: 2 MiB window, 32 KiB packets).
+DEFAULT_LARGE_FILE_THRESHOLD = 4 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 256 * 1024
+DEFAULT_WINDOW_SIZE = 16 * 1024 * 1024
+DEFAULT_MAX_PACKET_SIZE = None
+PARTIAL_SUFFIX = '.part'
+
+# Staged deploys: upload into a fresh release directory next to the live one
+# ('<remote>.releases/incoming-<stamp>') and then swap it in with two renames
+# (live -> '<remote>.releases/<stamp>', incoming -> live), so the live path is
+# only missing for the instant between the renames. The DEFAULT_KEEP_RELEASES
+# most recent previous releases are kept for --rollback.
+# The releases directory sits next to the live one, so when the live directory
+# is itself inside the web root (e.g. httpdocs/app) old releases are publicly
+# reachable as httpdocs/app.releases/... Point DEFAULT_RELEASES_DIR
+# (--releases-dir) somewhere outside the web root instead; it must be on the
+# same server filesystem as the live directory, since the swap is a rename.
+DEFAULT_STAGED = False
+DEFAULT_KEEP_RELEASES = 3
+DEFAULT_RELEASES_DIR = None
+RELEASES_SUFFIX = '.releases'
+INCOMING_PREFIX = 'incoming-'
+
+# Watch mode (--watch): after an initial --sync the SSH session stays open
+# (with keepalives every DEFAULT_KEEPALIVE_INTERVAL seconds) and local changes
+# are pushed as they happen. Changes are detected through watchdog when it is
+# installed (inotify on Linux, ReadDirectoryChangesW on Windows) and by
+# polling the file list every DEFAULT_WATCH_POLL_INTERVAL seconds otherwise.
+# A batch is sent once the tree has been quiet for DEFAULT_WATCH_DEBOUNCE
+# seconds, or DEFAULT_WATCH_MAX_DELAY seconds after its first change. A batch
+# that fails (or leaves failed files) is retried after DEFAULT_WATCH_RETRY_MIN
+# seconds, doubling up to DEFAULT_WATCH_RETRY_MAX while it keeps failing.
+DEFAULT_WATCH_DEBOUNCE = 0.15
+DEFAULT_WATCH_MAX_DELAY = 1.0
+DEFAULT_WATCH_POLL_INTERVAL = 0.5
+DEFAULT_WATCH_RETRY_MIN = 1.0
+DEFAULT_WATCH_RETRY_MAX = 60.0
+DEFAULT_KEEPALIVE_INTERVAL = 15
+
 def parse_args(argv=None):
     p = argparse.ArgumentParser(description='Upload a local directory via SFTP (Paramiko)')
     p.add_argument('--host', required=False, help='SFTP host')
@@ -76,35 +193,441 @@ def parse_args(argv=None):
     p.add_argument('--local', required=False, help='Local directory to upload')
     p.add_argument('--remote', required=False, help='Remote target directory (posix style)')
     p.add_argument('--allow-missing-host-key', action='store_true', help='Automatically add unknown host keys (less secure)')
+    p.add_argument('--sync', action='store_true', help='Upload only new/changed files and delete remote files missing locally')
+    p.add_argument('--manifest', help='Path of the local sync manifest (default: DEFAULT_MANIFEST_FILE next to this script)')
+    p.add_argument('--workers', type=int, default=None, help='Concurrent upload channels (default DEFAULT_WORKERS)')
+    p.add_argument('--transfer', choices=['files', 'tar'], default=None,
+                   help='Transfer mode for full deploys (default DEFAULT_TRANSFER_MODE)')
+    p.add_argument('--no-gzip', action='store_true', help='Send the tar stream uncompressed')
+    p.add_argument('--large-file-threshold', type=int, default=None,
+                   help='Size in bytes from which files use the resumable pipelined path')
+    p.add_argument('--chunk-size', type=int, default=None, help='Read/write chunk size for large files')
+    p.add_argument('--window-size', type=int, default=None, help='SSH channel window size for large files')
+    p.add_argument('--max-packet-size', type=int, default=None, help='SSH max packet size for large files')
+    p.add_argument('--staged', action='store_true', help='Upload into a release directory and swap it in with renames')
+    p.add_argument('--keep-releases', type=int, default=None,
+                   help='Previous releases to keep for rollback (default DEFAULT_KEEP_RELEASES)')
+    p.add_argument('--releases-dir',
+                   help="Remote directory for staged and previous releases (default: '<remote>.releases')")
+    p.add_argument('--rollback', action='store_true', help='Swap the live directory with the most recent kept release')
+    p.add_argument('--report', help="Write a JSON deploy report (timings, per-file stats) to this path ('-' for stdout)")
+    p.add_argument('--dry-run', action='store_true', help='Print the planned operations without connecting to the server')
+    p.add_argument('--watch', action='store_true',
+                   help='After an initial --sync, keep the session open and push local changes as they happen')
+    p.add_argument('--debounce', type=float, default=None,
+                   help='Seconds of quiet before a watch batch is sent (default DEFAULT_WATCH_DEBOUNCE)')
+    p.add_argument('--poll', action='store_true', help='Watch by polling even when watchdog is installed')
     return p.parse_args(argv)
 
 
-def ensure_remote_dir(sftp: paramiko.SFTPClient, remote_dir: str) -> None:
-    """Create remote directory and parents as needed (posix-style path)."""
+def _extension_set(extensions) -> set:
+    wl = set()
+    for e in extensions:
+        if not e:
+            continue
+        ee = e.lower()
+        if not ee.startswith('.'):
+            ee = '.' + ee
+        wl.add(ee)
+    return wl
+
+
+def _extension_whitelist():
+    """Return DEFAULT_FILE_EXTENSIONS_TO_UPLOAD as a set of '.ext' strings, or None."""
+    if not DEFAULT_FILE_EXTENSIONS_TO_UPLOAD:
+        return None
+    return _extension_set(DEFAULT_FILE_EXTENSIONS_TO_UPLOAD)
+
+
+def _overlay_whitelist(subdir: str):
+    """Return the whitelist for files below DEFAULT_OVERLAY_DIR/subdir (None: everything)."""
+    wl = _extension_whitelist()
+    extra = (DEFAULT_OVERLAY_EXTENSIONS or {}).get(subdir)
+    if wl is None or not extra:
+        return wl
+    return wl | _extension_set(extra)
+
+
+def _skip_dir_set():
+    """Return DEFAULT_SKIP_DIRS as a lowercase set, or None."""
+    if not DEFAULT_SKIP_DIRS:
+        return None
+    return set([d.lower() for d in DEFAULT_SKIP_DIRS if d])
+
+
+def _passes_filters(parts: list, overlay: bool = False) -> bool:
+    """True when the file at path parts (relative to the local root, or to the
+    overlay root when overlay is set) passes the skip-dir and extension filters
+    that _walk_filtered() applies."""
+    skip_set = _skip_dir_set()
+    if skip_set and any(part.lower() in skip_set for part in parts[:-1]):
+        return False
+    wl = _overlay_whitelist(parts[0]) if overlay and len(parts) > 1 else _extension_whitelist()
+    return wl is None or os.path.splitext(parts[-1])[1].lower() in wl
+
+
+def _walk_filtered(root: str, exclude_top: str | None = None, overlay: bool = False):
+    """Yield (path, rel) for whitelisted files under root.
+
+    overlay: root is the build overlay, so DEFAULT_OVERLAY_EXTENSIONS applies
+    to its subdirectories.
+    """
+    skip_set = _skip_dir_set()
+    for dirpath, dirnames, filenames in os.walk(root):
+        if skip_set:
+            dirnames[:] = [d for d in dirnames if d.lower() not in skip_set]
+        if exclude_top and dirpath == root:
+            dirnames[:] = [d for d in dirnames if d != exclude_top]
+        rel = os.path.relpath(dirpath, root)
+        rel_parts = [] if rel == '.' else rel.split(os.sep)
+        wl = _overlay_whitelist(rel_parts[0]) if overlay and rel_parts else _extension_whitelist()
+        for fname in filenames:
+            if wl is not None and os.path.splitext(fname)[1].lower() not in wl:
+                continue
+            yield os.path.join(dirpath, fname), posixpath.join(*rel_parts, fname)
+
+
+def iter_local_files(local_root: str, warn: bool = True):
+    """Yield (local_path, rel_path) for every file that passes the upload filters.
+
+    rel_path is posix-style and relative to local_root. Files from the
+    DEFAULT_OVERLAY_DIR build overlay take precedence over the originals, and
+    originals replaced by content-hashed copies (DEFAULT_ASSET_MANIFEST) are
+    left out. An overlay file older than its original (edited after the last
+    build) is stale: the original is used instead, with a warning. If a hashed
+    asset or the html referencing it is stale, the whole manifest is ignored so
+    the original html and assets go out together. Results are sorted by
+    rel_path. warn=False leaves out the stale-overlay warning.
+    """
+    overlay = DEFAULT_OVERLAY_DIR.strip('/\\') if DEFAULT_OVERLAY_DIR else None
+    files = dict((rel, path) for path, rel in _walk_filtered(local_root, exclude_top=overlay))
+    originals = dict(files)
+    stale = []
+    overlay_root = os.path.join(local_root, overlay) if overlay else None
+    if overlay_root and os.path.isdir(overlay_root):
+        for path, rel in _walk_filtered(overlay_root, overlay=True):
+            if rel in originals and _modified_after(originals[rel], path):
+                stale.append(rel)
+                continue
+            files[rel] = path
+        if DEFAULT_ASSET_MANIFEST:
+            try:
+                with open(os.path.join(overlay_root, DEFAULT_ASSET_MANIFEST), 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = {}
+            hashed = manifest.get('assets', {})
+            outdated = [original for original, target in hashed.items()
+                        if original in originals and target in files and not _hash_matches(originals[original], target)]
+            if outdated or any(html in stale for html in manifest.get('html', [])):
+                stale.extend(outdated)
+                for html in manifest.get('html', []):
+                    if html in originals:
+                        files[html] = originals[html]
+                for target in hashed.values():
+                    files.pop(target, None)
+            else:
+                for original, target in hashed.items():
+                    if target in files:
+                        files.pop(original, None)
+            files.pop(DEFAULT_ASSET_MANIFEST, None)
+    if stale and warn:
+        print(f"Warning: {overlay}/ is older than {', '.join(sorted(set(stale)))}; "
+              f'uploading the original(s) instead (re-run the build tools)')
+    for rel in sorted(files):
+        yield files[rel], rel
+
+
+def _modified_after(original: str, built: str) -> bool:
+    """True when original was modified after its build overlay copy was written."""
+    try:
+        return os.path.getmtime(original) > os.path.getmtime(built)
+    except OSError:
+        return False
+
+
+def _hash_matches(original: str, target: str) -> bool:
+    """True when the content hash in a hashed asset name ('css/style.<hash>.css') is that of original."""
+    digest = posixpath.splitext(posixpath.splitext(target)[0])[1].lstrip('.')
+    return bool(digest) and file_sha256(original).startswith(digest)
+
+
+# SFTP client methods that each cost (at least) one request/response exchange
+# with the server. CountingSFTP tallies calls to these.
+COUNTED_SFTP_OPS = {
+    'stat', 'lstat', 'mkdir', 'rmdir', 'remove', 'rename', 'posix_rename',
+    'listdir', 'listdir_attr', 'put', 'get', 'open', 'chmod', 'utime', 'normalize',
+}
+
+
+class SFTPOpCounter:
+    """Thread-safe tally of SFTP operations (count and time) by method name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+        self.seconds = {}
+
+    def add(self, name: str, seconds: float = 0.0) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def summary(self) -> str:
+        detail = ', '.join(f'{k} {v}' for k, v in sorted(self.counts.items()))
+        return f'{self.total} ({detail})' if detail else '0'
+
+
+class CountingSFTP:
+    """Proxy around a paramiko SFTPClient that counts remote operations.
+
+    Every call listed in COUNTED_SFTP_OPS is recorded on the shared counter;
+    everything else is passed through untouched. put() is counted once even
+    though paramiko pipelines its writes.
+    """
+
+    def __init__(self, sftp: paramiko.SFTPClient, counter: SFTPOpCounter):
+        self._sftp = sftp
+        self.counter = counter
+
+    def wrap(self, sftp: paramiko.SFTPClient) -> 'CountingSFTP':
+        """Wrap another client (e.g. an extra channel) with the same counter."""
+        return CountingSFTP(sftp, self.counter)
+
+    def __getattr__(self, name):
+        attr = getattr(self._sftp, name)
+        if name not in COUNTED_SFTP_OPS or not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self.counter.add(name, time.perf_counter() - started)
+        return counted
+
+
+# percentiles reported for per-file latency and throughput
+REPORT_PERCENTILES = (('p50', 50), ('p90', 90), ('p95', 95), ('p99', 99), ('max', 100))
+
+
+class DeployStats:
+    """Phase timings and per-file transfer records for the deploy report.
+
+    Phases are wall-clock and may repeat (time accumulates per name). File
+    records are appended from upload worker threads. Everything is a couple
+    of perf_counter() calls per operation, cheap enough to leave on.
+    """
+
+    def __init__(self, counter: SFTPOpCounter | None = None):
+        self._lock = threading.Lock()
+        self.counter = counter
+        self.phases = {}
+        self.files = []
+        self.started = time.time()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def record_file(self, path: str, nbytes: int, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            self.files.append({'path': path, 'bytes': nbytes, 'seconds': round(seconds, 6), 'ok': ok})
+
+    def report(self) -> dict:
+        done = [f for f in self.files if f['ok']]
+        latencies = [f['seconds'] for f in done]
+        rates = [round(f['bytes'] / f['seconds']) for f in done if f['seconds'] > 0]
+        total_bytes = sum(f['bytes'] for f in done)
+        put_seconds = self.phases.get('put', 0.0)
+        report = {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'phases': {k: round(v, 6) for k, v in self.phases.items()},
+            'files': {
+                'uploaded': len(done),
+                'failed': len(self.files) - len(done),
+                'bytes': total_bytes,
+                'throughput_bps': round(total_bytes / put_seconds) if put_seconds > 0 else None,
+                'latency_s': {p: percentile(latencies, n) for p, n in REPORT_PERCENTILES},
+                'file_throughput_bps': {p: percentile(rates, n) for p, n in REPORT_PERCENTILES},
+            },
+            'transfers': self.files,
+        }
+        if self.counter is not None:
+            report['sftp_ops'] = {
+                'total': self.counter.total,
+                'counts': dict(self.counter.counts),
+                'seconds': {k: round(v, 6) for k, v in self.counter.seconds.items()},
+            }
+        return report
+
+
+def _phase(stats: DeployStats | None, name: str):
+    return stats.phase(name) if stats is not None else contextlib.nullcontext()
+
+
+def write_report(report: dict, path: str) -> None:
+    """Write a JSON report to path, or to stdout when path is '-'."""
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if path == '-':
+        print(text)
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text + '\n')
+    print(f'Report written to {path}')
+
+
+class RemoteTree:
+    """In-memory view of the remote directory tree.
+
+    Directory listings are cached the first time they are fetched and kept up
+    to date as this script creates, uploads and removes entries, so existence
+    checks, clearing and pruning are answered from memory instead of with
+    repeated stat()/listdir_attr() round trips. Paths are posix-normalized.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # directories known to exist
+        self.dirs = set()
+        # directory path -> {name: SFTPAttributes} for fully listed directories
+        self.listings = {}
+
+    def _mark_dir(self, path: str) -> None:
+        # a directory's ancestors necessarily exist as well
+        while path not in self.dirs and path not in ('', '/', '.'):
+            self.dirs.add(path)
+            path = posixpath.dirname(path)
+
+    def exists(self, path: str):
+        """Return True/False if path is known to be/not be a directory, None if unknown."""
+        path = posixpath.normpath(path)
+        with self._lock:
+            if path in self.dirs:
+                return True
+            listing = self.listings.get(posixpath.dirname(path))
+            if listing is None:
+                return None
+            entry = listing.get(posixpath.basename(path))
+            return entry is not None and entry.st_mode is not None and stat.S_ISDIR(entry.st_mode)
+
+    def listdir_attr(self, sftp: paramiko.SFTPClient, path: str) -> list:
+        """Return the (cached) listdir_attr() of path; raises IOError if it is missing."""
+        path = posixpath.normpath(path)
+        with self._lock:
+            listing = self.listings.get(path)
+        if listing is None:
+            entries = sftp.listdir_attr(path)
+            with self._lock:
+                listing = self.listings[path] = {e.filename: e for e in entries}
+                self._mark_dir(path)
+                for e in entries:
+                    if e.st_mode is not None and stat.S_ISDIR(e.st_mode):
+                        self.dirs.add(posixpath.join(path, e.filename))
+        return list(listing.values())
+
+    def mark_dir(self, path: str) -> None:
+        """Record that path exists as a directory (e.g. after a successful stat)."""
+        with self._lock:
+            self._mark_dir(posixpath.normpath(path))
+
+    def added(self, path: str, attrs=None, is_dir: bool = False) -> None:
+        """Record a file or directory that was just created/uploaded at path."""
+        path = posixpath.normpath(path)
+        if attrs is None:
+            attrs = paramiko.SFTPAttributes()
+            attrs.st_mode = (stat.S_IFDIR | 0o755) if is_dir else (stat.S_IFREG | 0o644)
+        attrs.filename = posixpath.basename(path)
+        with self._lock:
+            parent = self.listings.get(posixpath.dirname(path))
+            if parent is not None:
+                parent[attrs.filename] = attrs
+            if is_dir:
+                self._mark_dir(path)
+                # a directory we just created is known to be empty
+                self.listings.setdefault(path, {})
+
+    def invalidate(self, path: str) -> None:
+        """Drop cached listings at and below path (changed outside SFTP)."""
+        path = posixpath.normpath(path)
+        prefix = path + '/'
+        with self._lock:
+            for key in [k for k in self.listings if k == path or k.startswith(prefix)]:
+                del self.listings[key]
+
+    def removed(self, path: str) -> None:
+        """Forget a file or directory that was just removed."""
+        path = posixpath.normpath(path)
+        with self._lock:
+            parent = self.listings.get(posixpath.dirname(path))
+            if parent is not None:
+                parent.pop(posixpath.basename(path), None)
+            prefix = path + '/'
+            self.dirs = set(d for d in self.dirs if d != path and not d.startswith(prefix))
+            for key in [k for k in self.listings if k == path or k.startswith(prefix)]:
+                del self.listings[key]
+
+
+def _listdir_attr(sftp: paramiko.SFTPClient, path: str, tree: RemoteTree | None) -> list:
+    return tree.listdir_attr(sftp, path) if tree is not None else sftp.listdir_attr(path)
+
+
+def ensure_remote_dir(sftp: paramiko.SFTPClient, remote_dir: str, tree: RemoteTree | None = None) -> None:
+    """Create remote directory and parents as needed (posix-style path).
+
+    With a RemoteTree, prefixes already known to exist cost no round trip and
+    prefixes known to be missing are created without a preliminary stat().
+    """
     # Normalize
     parts = [p for p in remote_dir.split('/') if p]
     if not parts:
         return
-    cur = ''
+    cur = '/' if remote_dir.startswith('/') else ''
     for part in parts:
         cur = posixpath.join(cur, part)
-        try:
-            sftp.stat(cur)
-        except IOError:
+        known = tree.exists(cur) if tree is not None else None
+        if known:
+            continue
+        if known is None:
             try:
-                sftp.mkdir(cur)
-            except Exception as e:
-                print(f'Warning: could not create remote dir {cur}: {e}')
+                sftp.stat(cur)
+                if tree is not None:
+                    tree.mark_dir(cur)
+                continue
+            except IOError:
+                pass
+        try:
+            sftp.mkdir(cur)
+            if tree is not None:
+                tree.added(cur, is_dir=True)
+        except Exception as e:
+            print(f'Warning: could not create remote dir {cur}: {e}')
 
 
-def clear_remote_dir(sftp: paramiko.SFTPClient, remote_dir: str) -> None:
+def clear_remote_dir(sftp: paramiko.SFTPClient, remote_dir: str, tree: RemoteTree | None = None,
+                     keep: set | None = None) -> bool:
     """Recursively remove files and directories under remote_dir.
 
     This will remove files and recursively remove subdirectories, but will
-    leave the top-level remote_dir itself (so it can be reused).
+    leave the top-level remote_dir itself (so it can be reused). Files whose
+    remote path is in keep (partial uploads that can still be resumed, see
+    partial_paths()) stay, together with the directories holding them.
+    Returns False if anything was kept.
     """
+    emptied = True
     try:
-        for entry in sftp.listdir_attr(remote_dir):
+        for entry in _listdir_attr(sftp, remote_dir, tree):
             name = entry.filename
             path = posixpath.join(remote_dir, name)
             try:
@@ -119,22 +642,31 @@ def clear_remote_dir(sftp: paramiko.SFTPClient, remote_dir: str) -> None:
 
             if stat.S_ISDIR(mode):
                 # recurse into directory
-                clear_remote_dir(sftp, path)
+                if not clear_remote_dir(sftp, path, tree, keep):
+                    emptied = False
+                    continue
                 try:
                     sftp.rmdir(path)
+                    if tree is not None:
+                        tree.removed(path)
                 except Exception as e:
                     print(f'Warning: could not remove remote dir {path}: {e}')
+            elif keep and path in keep:
+                emptied = False
             else:
                 try:
                     sftp.remove(path)
+                    if tree is not None:
+                        tree.removed(path)
                 except Exception as e:
                     print(f'Warning: could not remove remote file {path}: {e}')
     except IOError:
         # remote_dir may not exist yet
-        return
+        return True
+    return emptied
 
 
-def remove_empty_remote_dirs(sftp: paramiko.SFTPClient, remote_dir: str) -> bool:
+def remove_empty_remote_dirs(sftp: paramiko.SFTPClient, remote_dir: str, tree: RemoteTree | None = None) -> bool:
     """Recursively remove empty subdirectories under remote_dir.
 
     Returns True if remote_dir is empty after cleanup, False otherwise.
@@ -142,7 +674,7 @@ def remove_empty_remote_dirs(sftp: paramiko.SFTPClient, remote_dir: str) -> bool
     remove empty child directories under it.
     """
     try:
-        entries = sftp.listdir_attr(remote_dir)
+        entries = _listdir_attr(sftp, remote_dir, tree)
     except IOError:
         return True
 
@@ -162,11 +694,13 @@ def remove_empty_remote_dirs(sftp: paramiko.SFTPClient, remote_dir: str) -> bool
 
         if stat.S_ISDIR(mode):
             # Recurse into child directory
-            child_empty = remove_empty_remote_dirs(sftp, path)
+            child_empty = remove_empty_remote_dirs(sftp, path, tree)
             # If child is empty, try to remove it
             if child_empty:
                 try:
                     sftp.rmdir(path)
+                    if tree is not None:
+                        tree.removed(path)
                     print(f'Removed empty remote dir {path}')
                 except Exception as e:
                     print(f'Warning: could not remove remote dir {path}: {e}')
@@ -179,53 +713,1053 @@ def remove_empty_remote_dirs(sftp: paramiko.SFTPClient, remote_dir: str) -> bool
     return is_empty
 
 
-def upload_dir(sftp: paramiko.SFTPClient, local_root: str, remote_root: str) -> None:
+class TransferSettings:
+    """Tunables for the large-file upload path (see DEFAULT_LARGE_FILE_THRESHOLD)."""
+
+    def __init__(self, large_file_threshold: int | None = None, chunk_size: int | None = None,
+                 window_size: int | None = None, max_packet_size: int | None = None):
+        self.large_file_threshold = large_file_threshold or DEFAULT_LARGE_FILE_THRESHOLD
+        self.chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        self.window_size = window_size or DEFAULT_WINDOW_SIZE
+        self.max_packet_size = max_packet_size or DEFAULT_MAX_PACKET_SIZE
+
+
+def open_sftp_channels(sftp: paramiko.SFTPClient, count: int, window_size: int | None = None,
+                       max_packet_size: int | None = None) -> list:
+    """Open up to count additional SFTP channels over sftp's SSH transport.
+
+    Servers may cap the number of sessions per connection; channels that
+    cannot be opened are reported and the returned list is simply shorter.
+    """
+    transport = sftp.get_channel().get_transport()
+    wrap = sftp.wrap if isinstance(sftp, CountingSFTP) else (lambda client: client)
+    channels = []
+    for _ in range(count):
+        try:
+            channels.append(wrap(paramiko.SFTPClient.from_transport(
+                transport, window_size=window_size, max_packet_size=max_packet_size)))
+        except Exception as e:
+            print(f'Warning: could not open extra SFTP channel ({len(channels) + 1} open): {e}')
+            break
+    return channels
+
+
+def _remote_prefix_matches(sftp: paramiko.SFTPClient, remote_path: str, local_file: str, length: int,
+                           chunk_size: int) -> bool:
+    """Return True if the first length bytes of remote_path equal those of local_file.
+
+    Uses the server-side 'check-file' hash extension when available and
+    otherwise reads the remote range back with prefetching.
+    """
+    local = hashlib.sha1()
+    with open(local_file, 'rb') as f:
+        remaining = length
+        while remaining:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                return False
+            local.update(chunk)
+            remaining -= len(chunk)
+
+    with sftp.open(remote_path, 'rb') as rf:
+        try:
+            return rf.check('sha1', 0, length, 0) == local.digest()
+        except Exception:
+            pass
+        remote = hashlib.sha1()
+        rf.prefetch(length)
+        remaining = length
+        while remaining:
+            chunk = rf.read(min(chunk_size, remaining))
+            if not chunk:
+                return False
+            remote.update(chunk)
+            remaining -= len(chunk)
+    return remote.digest() == local.digest()
+
+
+def put_large_file(sftp: paramiko.SFTPClient, local_file: str, remote_file: str,
+                   settings: TransferSettings | None = None):
+    """Upload a large file with pipelined writes, resuming an interrupted upload.
+
+    Data goes to remote_file + PARTIAL_SUFFIX on a dedicated channel with the
+    configured window/packet sizes. If that partial file already exists and
+    its content is a prefix of the local file, the upload continues from its
+    current size. The partial file is renamed over remote_file only once it
+    is complete. Returns the SFTPAttributes of the uploaded file.
+    """
+    settings = settings or TransferSettings()
+    size = os.path.getsize(local_file)
+    part = remote_file + PARTIAL_SUFFIX
+    opened = open_sftp_channels(sftp, 1, settings.window_size, settings.max_packet_size)
+    client = opened[0] if opened else sftp
+    try:
+        offset = 0
+        try:
+            partial_size = client.stat(part).st_size or 0
+        except IOError:
+            partial_size = 0
+        if 0 < partial_size <= size and _remote_prefix_matches(
+                client, part, local_file, partial_size, settings.chunk_size):
+            offset = partial_size
+            print(f'Resuming {remote_file} at {offset}/{size} bytes')
+
+        with open(local_file, 'rb') as lf, client.open(part, 'r+b' if offset else 'wb') as rf:
+            rf.set_pipelined(True)
+            if offset:
+                lf.seek(offset)
+                rf.seek(offset)
+            for chunk in iter(lambda: lf.read(settings.chunk_size), b''):
+                rf.write(chunk)
+
+        attrs = client.stat(part)
+        if attrs.st_size != size:
+            raise IOError(f'size mismatch after upload of {part}: {attrs.st_size} != {size}')
+        try:
+            client.posix_rename(part, remote_file)
+        except Exception:
+            # server lacks posix-rename: plain SFTP rename refuses to overwrite
+            try:
+                client.remove(remote_file)
+            except IOError:
+                pass
+            client.rename(part, remote_file)
+        return attrs
+    finally:
+        for c in opened:
+            c.close()
+
+
+def partial_paths(local_root: str, remote_root: str, settings: TransferSettings | None = None) -> set:
+    """Return the remote '.part' paths an interrupted upload of local_root to remote_root may have left.
+
+    Only files that go through put_large_file() have partial files. Clears
+    that precede a re-upload keep these so the transfer resumes.
+    """
+    settings = settings or TransferSettings()
+    return set(posixpath.join(remote_root, rel) + PARTIAL_SUFFIX
+               for local_file, rel in iter_local_files(os.path.abspath(local_root))
+               if os.path.getsize(local_file) >= settings.large_file_threshold)
+
+
+def put_files(sftp: paramiko.SFTPClient, jobs: list, workers: int = 1, tree: RemoteTree | None = None,
+              settings: TransferSettings | None = None, stats: DeployStats | None = None) -> dict:
+    """Upload (local_file, remote_file) pairs, optionally over several channels.
+
+    Remote parent directories must already exist. With workers > 1 the files
+    are spread across extra SFTP channels opened on the same transport; sftp
+    itself serves as one of them. Files of at least
+    settings.large_file_threshold bytes go through put_large_file(). Returns
+    {remote_file: exception} for the uploads that failed (each failure is
+    also printed).
+    """
+    settings = settings or TransferSettings()
+    failures = {}
+    if not jobs:
+        return failures
+
+    print_lock = threading.Lock()
+
+    def put_one(client, local_file, remote_file):
+        with print_lock:
+            print(f'Uploading {local_file} -> {remote_file}')
+        started = time.perf_counter()
+        size = 0
+        try:
+            size = os.path.getsize(local_file)
+            if size >= settings.large_file_threshold:
+                attrs = put_large_file(client, local_file, remote_file, settings)
+            else:
+                attrs = client.put(local_file, remote_file)
+            if tree is not None:
+                tree.added(remote_file, attrs)
+            if stats is not None:
+                stats.record_file(remote_file, size, time.perf_counter() - started)
+        except Exception as e:
+            with print_lock:
+                print(f'Error uploading {local_file}: {e}')
+            failures[remote_file] = e
+            if stats is not None:
+                stats.record_file(remote_file, size, time.perf_counter() - started, ok=False)
+
+    workers = max(1, min(workers or 1, len(jobs)))
+    extra = open_sftp_channels(sftp, workers - 1) if workers > 1 else []
+    if not extra:
+        with _phase(stats, 'put'):
+            for local_file, remote_file in jobs:
+                put_one(sftp, local_file, remote_file)
+        return failures
+
+    pool = queue.Queue()
+    for client in [sftp] + extra:
+        pool.put(client)
+
+    def run(job):
+        client = pool.get()
+        try:
+            put_one(client, *job)
+        finally:
+            pool.put(client)
+
+    try:
+        with _phase(stats, 'put'), concurrent.futures.ThreadPoolExecutor(max_workers=len(extra) + 1) as executor:
+            list(executor.map(run, jobs))
+    finally:
+        for client in extra:
+            try:
+                client.close()
+            except Exception:
+                pass
+    return failures
+
+
+def upload_dir(sftp: paramiko.SFTPClient, local_root: str, remote_root: str, workers: int = 1,
+               tree: RemoteTree | None = None, settings: TransferSettings | None = None,
+               stats: DeployStats | None = None) -> dict:
+    """Upload the whitelisted files under local_root to remote_root.
+
+    The file list comes from iter_local_files() (whitelist, skip dirs and build
+    overlay applied). All remote directories are created first, then the
+    files are uploaded (concurrently when workers > 1). Returns the failures
+    from put_files().
+    """
+    local_root = os.path.abspath(local_root)
+    if not os.path.isdir(local_root):
+        raise SystemExit(f'Local path is not a directory: {local_root}')
+
+    jobs = []
+    created = set()
+    with _phase(stats, 'mkdir'):
+        for local_file, rel in iter_local_files(local_root):
+            remote_file = posixpath.join(remote_root, rel)
+            remote_dir = posixpath.dirname(remote_file)
+            if remote_dir not in created:
+                ensure_remote_dir(sftp, remote_dir, tree)
+                created.add(remote_dir)
+            jobs.append((local_file, remote_file))
+
+    return put_files(sftp, jobs, workers, tree, settings, stats)
+
+
+def remote_can_exec(ssh: paramiko.SSHClient, command: str = 'tar --version') -> bool:
+    """Return True if the server runs command over exec_command and it exits 0."""
+    try:
+        _, stdout, _ = ssh.exec_command(command, timeout=15)
+        stdout.read()
+        return stdout.channel.recv_exit_status() == 0
+    except Exception:
+        return False
+
+
+def _tar_filter(info: tarfile.TarInfo) -> tarfile.TarInfo:
+    # normalize ownership/permissions so the archive extracts cleanly on the
+    # server regardless of the local platform
+    info.uid = info.gid = 0
+    info.uname = info.gname = ''
+    info.mode = 0o755 if info.isdir() else 0o644
+    return info
+
+
+class _CountingWriter:
+    """File-like wrapper that counts the bytes written through it."""
+
+    def __init__(self, f):
+        self._f = f
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+        return self._f.write(data)
+
+
+def upload_dir_tar(ssh: paramiko.SSHClient, local_root: str, remote_root: str, gzip: bool = True,
+                   stats: DeployStats | None = None) -> bool:
+    """Stream the whitelisted files under local_root into `tar -x` on the server.
+
+    The archive is written straight into the stdin of a remote exec_command
+    (no temporary file on either side). Returns False without transferring
+    anything if the server can't exec commands, and False if extraction
+    fails; callers then fall back to upload_dir().
+    """
+    local_root = os.path.abspath(local_root)
+    if not os.path.isdir(local_root):
+        raise SystemExit(f'Local path is not a directory: {local_root}')
+    if not remote_can_exec(ssh):
+        print('Remote side cannot exec tar; falling back to per-file upload')
+        return False
+
+    files = list(iter_local_files(local_root))
+    quoted = shlex.quote(remote_root)
+    cmd = f'mkdir -p {quoted} && tar -x{"z" if gzip else ""}f - -C {quoted}'
+    print(f'Streaming {len(files)} files as tar{".gz" if gzip else ""} -> {remote_root}')
+    started = time.perf_counter()
+    writer = None
+    try:
+        with _phase(stats, 'put'):
+            stdin, stdout, stderr = ssh.exec_command(cmd)
+            writer = _CountingWriter(stdin)
+            with tarfile.open(fileobj=writer, mode='w|gz' if gzip else 'w|') as tar:
+                for local_file, rel in files:
+                    tar.add(local_file, arcname=rel, recursive=False, filter=_tar_filter)
+            stdin.flush()
+            stdin.channel.shutdown_write()
+            status = stdout.channel.recv_exit_status()
+    except Exception as e:
+        print(f'Error streaming tar archive: {e}')
+        status = None
+    ok = status == 0
+    if stats is not None:
+        stats.record_file(remote_root + '/<tar stream>', writer.bytes if writer else 0,
+                          time.perf_counter() - started, ok=ok)
+    if status:
+        err = stderr.read().decode('utf-8', 'replace').strip()
+        print(f'Error: remote tar exited with status {status}: {err}')
+    return ok
+
+
+def releases_dir(remote_root: str, releases: str | None = None) -> str:
+    """Return the directory holding staged and previous releases (default: a sibling of remote_root)."""
+    if releases:
+        return releases.rstrip('/') or '/'
+    return remote_root.rstrip('/') + RELEASES_SUFFIX
+
+
+def release_name(sftp: paramiko.SFTPClient, rel_dir: str, prefix: str = '') -> str:
+    """Return a fresh prefix + timestamp path under rel_dir.
+
+    The stamp has microsecond resolution (names sort chronologically), and a
+    counter is appended if the name is taken anyway, so a rollback or deploy
+    in the same second as the previous swap does not collide on rename.
+    """
+    base = posixpath.join(rel_dir, prefix + datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f'))
+    path, n = base, 1
+    while True:
+        try:
+            sftp.stat(path)
+        except IOError:
+            return path
+        path, n = f'{base}-{n}', n + 1
+
+
+def remove_remote_tree(sftp: paramiko.SFTPClient, path: str, tree: RemoteTree | None = None) -> None:
+    """Remove a remote directory and everything below it."""
+    clear_remote_dir(sftp, path, tree)
+    try:
+        sftp.rmdir(path)
+        if tree is not None:
+            tree.removed(path)
+    except Exception as e:
+        print(f'Warning: could not remove remote dir {path}: {e}')
+
+
+def list_releases(sftp: paramiko.SFTPClient, remote_root: str, tree: RemoteTree | None = None,
+                  releases: str | None = None) -> list:
+    """Return the names of the kept previous releases, oldest first."""
+    try:
+        entries = _listdir_attr(sftp, releases_dir(remote_root, releases), tree)
+    except IOError:
+        return []
+    return sorted(e.filename for e in entries
+                  if e.st_mode is not None and stat.S_ISDIR(e.st_mode)
+                  and not e.filename.startswith(INCOMING_PREFIX))
+
+
+def _swap_into_live(sftp: paramiko.SFTPClient, new_dir: str, remote_root: str, tree: RemoteTree | None,
+                    releases: str | None = None) -> str | None:
+    """Rename live -> releases/<stamp>, then new_dir -> live.
+
+    Returns the path the previous live directory was moved to (None if there
+    was no live directory). If the second rename fails the previous release
+    is moved back.
+    """
+    rel_dir = releases_dir(remote_root, releases)
+    retired = release_name(sftp, rel_dir)
+    try:
+        sftp.stat(remote_root)
+        live_exists = True
+    except IOError:
+        live_exists = False
+
+    started = time.perf_counter()
+    if live_exists:
+        sftp.rename(remote_root, retired)
+    try:
+        sftp.rename(new_dir, remote_root)
+    except Exception:
+        if live_exists:
+            sftp.rename(retired, remote_root)
+        raise
+    print(f'Switched {remote_root} to {new_dir} in {(time.perf_counter() - started) * 1000:.0f} ms')
+
+    if tree is not None:
+        # renamed directories: forget the old paths and re-list parents lazily
+        for path in (remote_root, new_dir):
+            tree.removed(path)
+        tree.invalidate(rel_dir)
+        tree.invalidate(posixpath.dirname(remote_root.rstrip('/')))
+        tree.mark_dir(remote_root)
+    return retired if live_exists else None
+
+
+def prune_releases(sftp: paramiko.SFTPClient, remote_root: str, keep: int, tree: RemoteTree | None = None,
+                   releases: str | None = None) -> None:
+    """Delete all but the keep most recent previous releases."""
+    names = list_releases(sftp, remote_root, tree, releases)
+    for name in names[:max(0, len(names) - keep)]:
+        path = posixpath.join(releases_dir(remote_root, releases), name)
+        print(f'Removing old release {path}')
+        remove_remote_tree(sftp, path, tree)
+
+
+def deploy_staged(ssh: paramiko.SSHClient, sftp: paramiko.SFTPClient, local_root: str, remote_root: str,
+                  keep: int, transfer: str = 'files', gzip: bool = True, workers: int = 1,
+                  tree: RemoteTree | None = None, settings: TransferSettings | None = None,
+                  stats: DeployStats | None = None, releases: str | None = None) -> bool:
+    """Upload into a new release directory and swap it in for remote_root.
+
+    The live directory is left untouched until the upload completed without
+    errors. Returns True if the new release went live.
+    """
+    rel_dir = releases_dir(remote_root, releases)
+    # leftovers of interrupted staged deploys: the newest one is reused (its
+    # partial large files resume, everything else is cleared), older ones go
+    with _phase(stats, 'clear'):
+        try:
+            incoming = sorted(e.filename for e in _listdir_attr(sftp, rel_dir, tree)
+                              if e.filename.startswith(INCOMING_PREFIX))
+        except IOError:
+            incoming = []
+        for name in incoming[:-1]:
+            remove_remote_tree(sftp, posixpath.join(rel_dir, name), tree)
+        if incoming:
+            staging = posixpath.join(rel_dir, incoming[-1])
+            print(f'Continuing the unfinished release in {staging}')
+            clear_remote_dir(sftp, staging, tree, keep=partial_paths(local_root, staging, settings))
+        else:
+            staging = release_name(sftp, rel_dir, INCOMING_PREFIX)
+    with _phase(stats, 'mkdir'):
+        ensure_remote_dir(sftp, staging, tree)
+    if transfer == 'tar' and upload_dir_tar(ssh, local_root, staging, gzip=gzip, stats=stats):
+        if tree is not None:
+            tree.invalidate(staging)
+    else:
+        failures = upload_dir(sftp, local_root, staging, workers=workers, tree=tree, settings=settings, stats=stats)
+        if failures:
+            print(f'{len(failures)} uploads failed; live directory left unchanged (staged copy in {staging})')
+            return False
+    with _phase(stats, 'prune'):
+        remove_empty_remote_dirs(sftp, staging, tree)
+
+    with _phase(stats, 'swap'):
+        _swap_into_live(sftp, staging, remote_root, tree, releases)
+    with _phase(stats, 'prune'):
+        prune_releases(sftp, remote_root, keep, tree, releases)
+    return True
+
+
+def rollback_release(sftp: paramiko.SFTPClient, remote_root: str, tree: RemoteTree | None = None,
+                     releases: str | None = None) -> bool:
+    """Swap the live directory with the most recent kept release.
+
+    The current live directory becomes the newest kept release, so running
+    the rollback again undoes it.
+    """
+    names = list_releases(sftp, remote_root, tree, releases)
+    if not names:
+        print(f'No previous releases under {releases_dir(remote_root, releases)}')
+        return False
+    previous = posixpath.join(releases_dir(remote_root, releases), names[-1])
+    print(f'Rolling back to {previous}')
+    _swap_into_live(sftp, previous, remote_root, tree, releases)
+    return True
+
+
+def file_sha256(path: str) -> str:
+    """Return the hex sha256 of a local file."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def resolve_manifest_path(path: str | None) -> str:
+    """Resolve the sync manifest path (relative paths are next to this script)."""
+    path = path or DEFAULT_MANIFEST_FILE
+    if os.path.isabs(path):
+        return path
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+
+
+def load_manifest(path: str, host: str, remote_root: str) -> dict:
+    """Load the files recorded by the last sync to host:remote_root.
+
+    Returns an empty dict when the manifest is missing, unreadable or was
+    written for a different target (which forces a full comparison).
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('host') != host or data.get('remote') != remote_root:
+        return {}
+    files = data.get('files')
+    return files if isinstance(files, dict) else {}
+
+
+def save_manifest(path: str, host: str, remote_root: str, files: dict) -> None:
+    """Write the sync manifest atomically (temp file + replace)."""
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'host': host, 'remote': remote_root, 'files': files}, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def scan_local_files(local_root: str, previous: dict) -> dict:
+    """Return {rel_path: {'size', 'mtime', 'sha256'}} for the uploadable local files.
+
+    Hashes from the previous manifest are reused when size and mtime are
+    unchanged, so an unchanged tree is scanned without reading file contents.
+    """
+    files = {}
+    for local_file, rel in iter_local_files(local_root):
+        st = os.stat(local_file)
+        prev = previous.get(rel)
+        if prev and prev.get('size') == st.st_size and prev.get('mtime') == st.st_mtime_ns:
+            digest = prev.get('sha256')
+        else:
+            digest = file_sha256(local_file)
+        files[rel] = {'size': st.st_size, 'mtime': st.st_mtime_ns, 'sha256': digest}
+    return files
+
+
+def list_remote_files(sftp: paramiko.SFTPClient, remote_root: str, tree: RemoteTree | None = None) -> dict:
+    """Recursively list remote files as {rel_path: SFTPAttributes}.
+
+    A missing remote_root yields an empty dict.
+    """
+    result = {}
+    pending = ['']
+    while pending:
+        rel_dir = pending.pop()
+        path = posixpath.join(remote_root, rel_dir) if rel_dir else remote_root
+        try:
+            entries = _listdir_attr(sftp, path, tree)
+        except IOError:
+            continue
+        for entry in entries:
+            rel = posixpath.join(rel_dir, entry.filename) if rel_dir else entry.filename
+            if entry.st_mode is not None and stat.S_ISDIR(entry.st_mode):
+                pending.append(rel)
+            else:
+                result[rel] = entry
+    return result
+
+
+def sync_dir(sftp: paramiko.SFTPClient, local_root: str, remote_root: str, manifest_path: str, host: str,
+             workers: int = 1, tree: RemoteTree | None = None, settings: TransferSettings | None = None,
+             stats: DeployStats | None = None) -> dict:
+    """Make remote_root mirror the uploadable files under local_root.
+
+    A file is uploaded when it is missing remotely, its remote size differs
+    from the local size, or its content hash differs from the one recorded in
+    the manifest. Remote files with no local counterpart are deleted. Returns a
+    summary dict with 'uploaded', 'deleted', 'unchanged' and 'failed' lists.
+    """
     local_root = os.path.abspath(local_root)
     if not os.path.isdir(local_root):
         raise SystemExit(f'Local path is not a directory: {local_root}')
-    # Normalize whitelist (if any) to a set of lowercase extensions with a leading dot
-    wl = None
-    if DEFAULT_FILE_EXTENSIONS_TO_UPLOAD:
-        wl = set()
-        for e in DEFAULT_FILE_EXTENSIONS_TO_UPLOAD:
-            if not e:
+
+    previous = load_manifest(manifest_path, host, remote_root)
+    with _phase(stats, 'scan'):
+        local_files = scan_local_files(local_root, previous)
+    with _phase(stats, 'list'):
+        remote_files = list_remote_files(sftp, remote_root, tree)
+
+    summary = {'uploaded': [], 'deleted': [], 'unchanged': [], 'failed': []}
+    deployed = {}
+    to_upload = []
+    for rel, entry in sorted(local_files.items()):
+        remote = remote_files.get(rel)
+        prev = previous.get(rel)
+        if (remote is None or remote.st_size != entry['size']
+                or prev is None or prev.get('sha256') != entry['sha256']):
+            to_upload.append(rel)
+        else:
+            summary['unchanged'].append(rel)
+            deployed[rel] = entry
+
+    # keep partial uploads of files about to be uploaded so they can resume
+    resumable = set(rel + PARTIAL_SUFFIX for rel in to_upload)
+    with _phase(stats, 'clear'):
+        for rel in sorted(set(remote_files) - set(local_files) - resumable):
+            path = posixpath.join(remote_root, rel)
+            print(f'Deleting {path}')
+            try:
+                sftp.remove(path)
+                if tree is not None:
+                    tree.removed(path)
+                summary['deleted'].append(rel)
+            except Exception as e:
+                print(f'Warning: could not remove remote file {path}: {e}')
+
+    created = set()
+    jobs = []
+    with _phase(stats, 'mkdir'):
+        for rel in to_upload:
+            remote_file = posixpath.join(remote_root, rel)
+            remote_dir = posixpath.dirname(remote_file)
+            if remote_dir not in created:
+                ensure_remote_dir(sftp, remote_dir, tree)
+                created.add(remote_dir)
+            jobs.append((os.path.join(local_root, *rel.split('/')), remote_file))
+    failures = put_files(sftp, jobs, workers, tree, settings, stats)
+    for rel in to_upload:
+        if posixpath.join(remote_root, rel) in failures:
+            summary['failed'].append(rel)
+        else:
+            summary['uploaded'].append(rel)
+            deployed[rel] = local_files[rel]
+
+    # Only successfully deployed files are recorded, so failures retry next run.
+    try:
+        save_manifest(manifest_path, host, remote_root, deployed)
+    except OSError as e:
+        print(f'Warning: could not write sync manifest {manifest_path}: {e}')
+
+    print('Sync: {} uploaded, {} deleted, {} unchanged, {} failed'.format(
+        len(summary['uploaded']), len(summary['deleted']), len(summary['unchanged']), len(summary['failed'])))
+    return summary
+
+
+class LocalWatcher:
+    """Signal changes to uploadable files under a local root.
+
+    Uses a watchdog observer when available (this object is its event
+    handler), otherwise a thread that polls the iter_local_files() list for
+    size/mtime changes. Events in skipped directories and files outside the
+    extension whitelist are ignored.
+    """
+
+    def __init__(self, root: str, poll: bool = False, poll_interval: float = DEFAULT_WATCH_POLL_INTERVAL):
+        self.root = os.path.abspath(root)
+        self.mode = 'polling' if poll or Observer is None else 'events'
+        self.poll_interval = poll_interval
+        self._changed = threading.Event()
+        self._stop = threading.Event()
+        self._first = None
+        self._observer = None
+        self._thread = None
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._paths = set()
+        self._rescan = False
+
+    def start(self) -> None:
+        if self.mode == 'events':
+            self._observer = Observer()
+            self._observer.schedule(self, self.root, recursive=True)
+            self._observer.start()
+        else:
+            self._snapshot = self._scan()
+            self._thread = threading.Thread(target=self._poll, name='sftp-watch-poll', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _signal(self) -> None:
+        if not self._changed.is_set():
+            self._first = time.monotonic()
+        self._changed.set()
+
+    def _relevant(self, path: str, is_dir: bool) -> bool:
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        if rel == '.' or rel.startswith('..'):
+            return False
+        parts = rel.split(os.sep)
+        if is_dir:
+            skip_set = _skip_dir_set()
+            return not (skip_set and any(part.lower() in skip_set for part in parts))
+        overlay = DEFAULT_OVERLAY_DIR.strip('/\\') if DEFAULT_OVERLAY_DIR else None
+        if overlay and len(parts) > 1 and parts[0] == overlay:
+            return _passes_filters(parts[1:], overlay=True)
+        return _passes_filters(parts)
+
+    def _add(self, paths, rescan: bool = False) -> None:
+        """Record changed paths (posix, relative to root) and signal a batch."""
+        with self._lock:
+            self._paths.update(paths)
+            self._rescan = self._rescan or rescan
+        self._signal()
+
+    def dispatch(self, event) -> None:
+        """watchdog event handler entry point."""
+        if event.is_directory and event.event_type == 'modified':
+            return
+        paths = [p for p in (event.src_path, getattr(event, 'dest_path', None))
+                 if p and self._relevant(p, event.is_directory)]
+        if paths:
+            # a created, moved or deleted directory can hold any number of files
+            self._add([os.path.relpath(os.path.abspath(p), self.root).replace(os.sep, '/') for p in paths],
+                      rescan=event.is_directory)
+
+    def _scan(self) -> dict:
+        snapshot = {}
+        # quiet: polled every DEFAULT_WATCH_POLL_INTERVAL seconds
+        for local_file, rel in iter_local_files(self.root, warn=False):
+            try:
+                st = os.stat(local_file)
+            except OSError:
                 continue
-            ee = e.lower()
-            if not ee.startswith('.'):
-                ee = '.' + ee
-            wl.add(ee)
-
-    # Normalize skip directory names (if any) to a lowercase set for quick checks.
-    skip_set = None
-    if DEFAULT_SKIP_DIRS:
-        skip_set = set([d.lower() for d in DEFAULT_SKIP_DIRS if d])
-
-    for dirpath, dirnames, filenames in os.walk(local_root):
-        # If skip_set is configured, mutate dirnames in-place so os.walk will
-        # not descend into those directories.
-        if skip_set:
-            dirnames[:] = [d for d in dirnames if d.lower() not in skip_set]
-        rel = os.path.relpath(dirpath, local_root)
-        if rel == '.':
-            remote_dir = remote_root
+            snapshot[rel] = (local_file, st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            snapshot = self._scan()
+            if snapshot != self._snapshot:
+                changed = set()
+                for rel in set(snapshot) | set(self._snapshot):
+                    old, new = self._snapshot.get(rel), snapshot.get(rel)
+                    if old != new:
+                        changed.update(entry[0] for entry in (old, new) if entry)
+                self._snapshot = snapshot
+                self._add(os.path.relpath(path, self.root).replace(os.sep, '/') for path in changed)
+
+    def wait_batch(self, debounce: float = DEFAULT_WATCH_DEBOUNCE, max_delay: float = DEFAULT_WATCH_MAX_DELAY,
+                   timeout: float | None = None):
+        """Block until a batch of changes has settled.
+
+        Returns (first, paths): when the batch's first change was seen
+        (monotonic) and the changed paths, posix and relative to root, or None
+        for paths when a directory changed and the whole tree needs a rescan.
+        Returns None when timeout seconds pass without a change.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # short waits keep Ctrl+C responsive on Windows
+        while not self._changed.wait(0.5 if deadline is None else max(0.0, min(0.5, deadline - time.monotonic()))):
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+        first = self._first
+        while True:
+            self._changed.clear()
+            remaining = max_delay - (time.monotonic() - first)
+            if remaining <= 0 or not self._changed.wait(min(debounce, remaining)):
+                break
+        with self._lock:
+            paths = None if self._rescan else self._paths
+            self._paths, self._rescan = set(), False
+        return first, paths
+
+
+def changed_rels(local_root: str, paths: set) -> set | None:
+    """Remote-relative paths affected by changes to the given local paths.
+
+    paths are posix and relative to local_root; a file under the build
+    overlay maps to the path it overlays. Returns None when the whole tree has
+    to be rescanned: a change to the asset manifest or to a file it names can
+    swap which files are deployed under several other paths.
+    """
+    overlay = DEFAULT_OVERLAY_DIR.strip('/\\') if DEFAULT_OVERLAY_DIR else None
+    named = set()
+    if overlay and DEFAULT_ASSET_MANIFEST:
+        try:
+            with open(os.path.join(local_root, overlay, DEFAULT_ASSET_MANIFEST), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        hashed = manifest.get('assets', {})
+        named = set(hashed) | set(hashed.values()) | set(manifest.get('html', [])) | {DEFAULT_ASSET_MANIFEST}
+    rels = set()
+    for path in paths:
+        parts = path.split('/')
+        if overlay and parts[0] == overlay:
+            if len(parts) == 1:
+                return None
+            parts = parts[1:]
+        rel = '/'.join(parts)
+        if rel in named:
+            return None
+        rels.add(rel)
+    return rels
+
+
+def _local_source(local_root: str, rel: str) -> str | None:
+    """The local file deployed as rel (its build overlay copy or the original),
+    or None; iter_local_files() for a single path, without the asset manifest."""
+    overlay = DEFAULT_OVERLAY_DIR.strip('/\\') if DEFAULT_OVERLAY_DIR else None
+    parts = rel.split('/')
+    if overlay and parts[0] == overlay:
+        return None
+    original = os.path.join(local_root, *parts)
+    if not (os.path.isfile(original) and _passes_filters(parts)):
+        original = None
+    if overlay:
+        built = os.path.join(local_root, overlay, *parts)
+        if os.path.isfile(built) and _passes_filters(parts, overlay=True) and not (
+                original and _modified_after(original, built)):
+            return built
+    return original
+
+
+def scan_changed_files(local_root: str, rels: set, previous: dict) -> dict:
+    """scan_local_files() for just rels: {rel: entry, or None when rel is no longer uploadable}."""
+    files = {}
+    for rel in sorted(rels):
+        local_file = _local_source(local_root, rel)
+        try:
+            st = os.stat(local_file) if local_file else None
+        except OSError:
+            st = None
+        if st is None:
+            files[rel] = None
+            continue
+        prev = previous.get(rel)
+        if prev and prev.get('size') == st.st_size and prev.get('mtime') == st.st_mtime_ns:
+            digest = prev.get('sha256')
         else:
-            remote_dir = posixpath.join(remote_root, *rel.split(os.sep))
-        ensure_remote_dir(sftp, remote_dir)
-        # upload files
-        for fname in filenames:
-            # If a whitelist is configured, skip files whose extension isn't listed
-            if wl is not None:
-                ext = os.path.splitext(fname)[1].lower()
-                if ext not in wl:
-                    continue
+            digest = file_sha256(local_file)
+        files[rel] = {'size': st.st_size, 'mtime': st.st_mtime_ns, 'sha256': digest}
+    return files
 
-            local_file = os.path.join(dirpath, fname)
-            remote_file = posixpath.join(remote_dir, fname)
-            print(f'Uploading {local_file} -> {remote_file}')
+
+def push_changes(sftp: paramiko.SFTPClient, local_root: str, remote_root: str, deployed: dict,
+                 workers: int = 1, tree: RemoteTree | None = None, settings: TransferSettings | None = None,
+                 rels: set | None = None) -> dict:
+    """Upload/delete whatever differs between the local tree and `deployed`.
+
+    deployed is the manifest-style {rel_path: {'size', 'mtime', 'sha256'}} of
+    what is live; it is updated in place for every successful operation, so
+    failed files can be retried. rels limits the comparison to those paths
+    (see changed_rels()); None scans the whole tree. The same filters as a
+    full upload apply (iter_local_files()). Returns a summary dict with
+    'uploaded', 'deleted' and 'failed' lists.
+    """
+    if rels is None:
+        local_files = scan_local_files(local_root, deployed)
+        gone = set(deployed) - set(local_files)
+    else:
+        scanned = scan_changed_files(local_root, rels, deployed)
+        local_files = {rel: entry for rel, entry in scanned.items() if entry is not None}
+        gone = {rel for rel, entry in scanned.items() if entry is None and rel in deployed}
+    to_upload = []
+    for rel, entry in sorted(local_files.items()):
+        if deployed.get(rel, {}).get('sha256') != entry['sha256']:
+            to_upload.append(rel)
+        else:
+            # touched but identical: remember the new mtime so it is not rehashed
+            deployed[rel] = entry
+
+    summary = {'uploaded': [], 'deleted': [], 'failed': []}
+    for rel in sorted(gone):
+        path = posixpath.join(remote_root, rel)
+        print(f'Deleting {path}')
+        try:
+            sftp.remove(path)
+        except IOError as e:
+            if getattr(e, 'errno', None) != 2:
+                print(f'Warning: could not remove remote file {path}: {e}')
+                summary['failed'].append(rel)
+                continue
+        if tree is not None:
+            tree.removed(path)
+        deployed.pop(rel, None)
+        summary['deleted'].append(rel)
+
+    created = set()
+    jobs = []
+    for rel in to_upload:
+        remote_file = posixpath.join(remote_root, rel)
+        remote_dir = posixpath.dirname(remote_file)
+        if remote_dir not in created:
+            ensure_remote_dir(sftp, remote_dir, tree)
+            created.add(remote_dir)
+        jobs.append((os.path.join(local_root, *rel.split('/')), remote_file))
+    failures = put_files(sftp, jobs, workers, tree, settings)
+    for rel in to_upload:
+        if posixpath.join(remote_root, rel) in failures:
+            summary['failed'].append(rel)
+        else:
+            summary['uploaded'].append(rel)
+            deployed[rel] = local_files[rel]
+    return summary
+
+
+def _next_retry(delay: float | None) -> float:
+    """Backoff for watch retries: DEFAULT_WATCH_RETRY_MIN, doubling up to DEFAULT_WATCH_RETRY_MAX."""
+    return DEFAULT_WATCH_RETRY_MIN if delay is None else min(delay * 2, DEFAULT_WATCH_RETRY_MAX)
+
+
+def watch_dir(connect, ssh: paramiko.SSHClient, sftp: paramiko.SFTPClient, local_root: str, remote_root: str,
+              manifest_path: str, host: str, workers: int = 1, settings: TransferSettings | None = None,
+              debounce: float = DEFAULT_WATCH_DEBOUNCE, poll: bool = False) -> None:
+    """Push local changes to remote_root over one long-lived session until Ctrl+C.
+
+    Starts from what the sync manifest records as deployed (run sync_dir()
+    first). connect() must return a fresh (ssh, sftp) pair; it is used only
+    when the session drops. Each batch compares only the paths the watcher
+    reported. A failed reconnect or batch, and files that failed to upload or
+    delete, are retried on a backoff timer (DEFAULT_WATCH_RETRY_MIN..MAX)
+    without waiting for another change. Every batch updates the manifest, so
+    a later --sync run starts from the watched state.
+    """
+    local_root = os.path.abspath(local_root)
+    deployed = load_manifest(manifest_path, host, remote_root)
+    tree = RemoteTree()
+    watcher = LocalWatcher(local_root, poll=poll)
+    owned = None
+    ssh.get_transport().set_keepalive(DEFAULT_KEEPALIVE_INTERVAL)
+    watcher.start()
+    print(f'Watching {local_root} ({watcher.mode}); Ctrl+C to stop')
+    # paths still to push: pending, or everything when rescan is set
+    pending = set()
+    rescan = False
+    retry = None
+    try:
+        while True:
+            batch = watcher.wait_batch(debounce, timeout=retry)
+            if batch is None:
+                first = time.monotonic()
+                print('Retrying the failed watch batch')
+            else:
+                first, paths = batch
+                rels = changed_rels(local_root, paths) if paths is not None else None
+                if rels is None:
+                    rescan = True
+                else:
+                    pending |= rels
+            started = time.monotonic()
+            transport = ssh.get_transport()
+            if transport is None or not transport.is_active():
+                print('SSH session lost; reconnecting')
+                if owned is not None:
+                    owned[1].close()
+                    owned[0].close()
+                try:
+                    ssh, sftp = owned = connect()
+                except Exception as e:
+                    owned = None
+                    retry = _next_retry(retry)
+                    print(f'Reconnect failed, retrying in {retry:g}s:', e)
+                    continue
+                ssh.get_transport().set_keepalive(DEFAULT_KEEPALIVE_INTERVAL)
+                tree = RemoteTree()
             try:
-                sftp.put(local_file, remote_file)
+                summary = push_changes(sftp, local_root, remote_root, deployed, workers, tree, settings,
+                                       None if rescan else pending)
             except Exception as e:
-                print(f'Error uploading {local_file}: {e}')
+                # e.g. the connection dropped mid-batch: cached remote state may be wrong
+                tree = RemoteTree()
+                retry = _next_retry(retry)
+                print(f'Watch batch failed, retrying in {retry:g}s:', e)
+                continue
+            pending = set(summary['failed'])
+            rescan = False
+            retry = _next_retry(retry) if pending else None
+            if summary['uploaded'] or summary['deleted'] or summary['failed']:
+                try:
+                    save_manifest(manifest_path, host, remote_root, deployed)
+                except OSError as e:
+                    print(f'Warning: could not write sync manifest {manifest_path}: {e}')
+                now = time.monotonic()
+                print('Watch: {} uploaded, {} deleted, {} failed in {:.2f}s ({:.2f}s since the change)'.format(
+                    len(summary['uploaded']), len(summary['deleted']), len(summary['failed']),
+                    now - started, now - first) + (f'; retrying in {retry:g}s' if retry else ''))
+    except KeyboardInterrupt:
+        print('Watch stopped')
+    finally:
+        watcher.stop()
+        if owned is not None:
+            owned[1].close()
+            owned[0].close()
+
+
+def plan_deploy(local_root: str, remote_root: str, mode: str, manifest_path: str | None = None,
+                host: str | None = None, releases: str | None = None) -> dict:
+    """Describe the operations a deploy would perform, without contacting the server.
+
+    mode is 'full', 'sync' or 'staged'. For 'sync' the plan is computed
+    against the local manifest (what the last sync recorded as deployed), so
+    it is an estimate: files changed remotely since then are not detected.
+    """
+    local_root = os.path.abspath(local_root)
+    if not os.path.isdir(local_root):
+        raise SystemExit(f'Local path is not a directory: {local_root}')
+    target = remote_root
+    if mode == 'staged':
+        target = posixpath.join(releases_dir(remote_root, releases), INCOMING_PREFIX + '<stamp>')
+    operations = []
+    if mode == 'full':
+        operations.append({'op': 'clear', 'path': remote_root})
+
+    if mode == 'sync':
+        previous = load_manifest(manifest_path, host, remote_root)
+        local_files = scan_local_files(local_root, previous)
+        for rel in sorted(set(previous) - set(local_files)):
+            operations.append({'op': 'delete', 'path': posixpath.join(remote_root, rel)})
+        changed = [rel for rel, entry in sorted(local_files.items())
+                   if previous.get(rel, {}).get('sha256') != entry['sha256']]
+        sizes = {rel: local_files[rel]['size'] for rel in changed}
+    else:
+        sizes = {rel: os.path.getsize(local_file) for local_file, rel in iter_local_files(local_root)}
+
+    for rel_dir in sorted(set(posixpath.dirname(rel) for rel in sizes)):
+        operations.append({'op': 'mkdir', 'path': posixpath.join(target, rel_dir) if rel_dir else target})
+    for rel in sorted(sizes):
+        operations.append({'op': 'put', 'path': posixpath.join(target, rel), 'bytes': sizes[rel]})
+    if mode == 'staged':
+        operations.append({'op': 'rename', 'path': remote_root,
+                           'to': posixpath.join(releases_dir(remote_root, releases), '<stamp>')})
+        operations.append({'op': 'rename', 'path': target, 'to': remote_root})
+    operations.append({'op': 'prune', 'path': target})
+    return {
+        'dry_run': True,
+        'mode': mode,
+        'operations': operations,
+        'files': len(sizes),
+        'estimated_bytes': sum(sizes.values()),
+    }
+
+
+def load_private_key(path: str) -> paramiko.PKey:
+    """Load a private key file (RSA, Ed25519 or ECDSA)."""
+    if hasattr(paramiko.PKey, 'from_path'):
+        # paramiko >= 3.2 reads the key type from the file instead of trying each class
+        return paramiko.PKey.from_path(path)
+    try:
+        return paramiko.RSAKey.from_private_key_file(path)
+    except Exception:
+        try:
+            return paramiko.Ed25519Key.from_private_key_file(path)
+        except Exception:
+            return paramiko.ECDSAKey.from_private_key_file(path)
+
+
+def open_ssh(host: str, port: int, user: str, password: str | None = None, pkey: paramiko.PKey | None = None,
+             allow_missing_host_key: bool = False, stats: DeployStats | None = None) -> paramiko.SSHClient:
+    """Connect and authenticate an SSHClient (TCP connect and auth timed as separate phases)."""
+    ssh = paramiko.SSHClient()
+    ssh.load_system_host_keys()
+    if allow_missing_host_key:
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    else:
+        ssh.set_missing_host_key_policy(paramiko.RejectPolicy())
+    try:
+        with _phase(stats, 'connect'):
+            sock = socket.create_connection((host, port), timeout=30)
+        with _phase(stats, 'auth'):
+            ssh.connect(host, port=port, username=user, password=password, pkey=pkey, sock=sock)
+    except Exception:
+        ssh.close()
+        raise
+    return ssh
 
 
 def main(argv=None):
@@ -239,6 +1773,23 @@ def main(argv=None):
     # current working directory (project root when run from repo root).
     args.local = args.local or DEFAULT_LOCAL_DIR or os.getcwd()
     args.remote = args.remote or DEFAULT_REMOTE_DIR
+    args.sync = args.sync or DEFAULT_SYNC
+    args.workers = args.workers or DEFAULT_WORKERS
+    args.transfer = args.transfer or DEFAULT_TRANSFER_MODE
+    args.gzip = DEFAULT_TAR_GZIP and not args.no_gzip
+    args.staged = args.staged or DEFAULT_STAGED
+    if args.keep_releases is None:
+        args.keep_releases = DEFAULT_KEEP_RELEASES
+    args.releases_dir = args.releases_dir or DEFAULT_RELEASES_DIR
+    if args.debounce is None:
+        args.debounce = DEFAULT_WATCH_DEBOUNCE
+    if args.watch:
+        if args.staged or args.rollback:
+            print('--watch cannot be combined with --staged or --rollback')
+            raise SystemExit(2)
+        # the watcher works from the sync manifest, so the initial deploy is a sync
+        args.sync = True
+    settings = TransferSettings(args.large_file_threshold, args.chunk_size, args.window_size, args.max_packet_size)
 
     # Merge port default: CLI -> DEFAULT_PORT -> 22
     if args.port is None:
@@ -260,51 +1811,91 @@ def main(argv=None):
         print('Either pass them as CLI args or set the DEFAULT_* variables at the top of this script.')
         raise SystemExit(2)
 
-    password = args.password or (getpass.getpass(f'Password for {args.user}@{args.host}: ') if not args.key else None)
+    if args.dry_run:
+        mode = 'staged' if args.staged else ('sync' if args.sync else 'full')
+        plan = plan_deploy(args.local, args.remote, mode, resolve_manifest_path(args.manifest), args.host,
+                           args.releases_dir)
+        for op in plan['operations']:
+            extra = f" ({op['bytes']} bytes)" if 'bytes' in op else (f" -> {op['to']}" if 'to' in op else '')
+            print(f"[dry-run] {op['op']} {op['path']}{extra}")
+        print(f"[dry-run] {plan['files']} files, ~{plan['estimated_bytes']} bytes to transfer")
+        if args.report:
+            write_report(plan, args.report)
+        return
 
-    # Setup SSH client
-    ssh = paramiko.SSHClient()
-    ssh.load_system_host_keys()
-    if args.allow_missing_host_key:
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    else:
-        ssh.set_missing_host_key_policy(paramiko.RejectPolicy())
+    counter = SFTPOpCounter()
+    stats = DeployStats(counter)
+
+    password = args.password or (getpass.getpass(f'Password for {args.user}@{args.host}: ') if not args.key else None)
 
     pkey = None
     if args.key:
-        # try to load private key (support rsa/ecdsa/ed25519)
-        try:
-            pkey = paramiko.RSAKey.from_private_key_file(args.key)
-        except Exception:
+        # loaded once; --watch reconnects reuse it
+        with stats.phase('auth'):
             try:
-                pkey = paramiko.Ed25519Key.from_private_key_file(args.key)
-            except Exception:
-                try:
-                    pkey = paramiko.ECDSAKey.from_private_key_file(args.key)
-                except Exception as e:
-                    print('Failed to load private key:', e)
-                    raise
+                pkey = load_private_key(args.key)
+            except Exception as e:
+                print('Failed to load private key:', e)
+                raise
+
+    def connect():
+        ssh = open_ssh(args.host, args.port, args.user, password, pkey, args.allow_missing_host_key)
+        return ssh, CountingSFTP(ssh.open_sftp(), counter)
 
     try:
-        ssh.connect(args.host, port=args.port, username=args.user, password=password, pkey=pkey)
+        ssh = open_ssh(args.host, args.port, args.user, password, pkey, args.allow_missing_host_key, stats)
     except Exception as e:
         print('SSH connect failed:', e)
         raise SystemExit(1)
 
     try:
-        sftp = ssh.open_sftp()
+        sftp = CountingSFTP(ssh.open_sftp(), counter)
+        # Remote directory state is cached for the whole run so repeated
+        # existence checks and listings don't cost extra round trips.
+        tree = RemoteTree()
         try:
-            ensure_remote_dir(sftp, args.remote)
-            # Clear the remote directory before uploading (whitelist still applies).
-            clear_remote_dir(sftp, args.remote)
-            upload_dir(sftp, args.local, args.remote)
+            if args.rollback:
+                rollback_release(sftp, args.remote, tree, args.releases_dir)
+                return
+            if args.staged:
+                # Upload next to the live directory, then swap it in by rename.
+                deploy_staged(ssh, sftp, args.local, args.remote, args.keep_releases, transfer=args.transfer,
+                              gzip=args.gzip, workers=args.workers, tree=tree, settings=settings, stats=stats,
+                              releases=args.releases_dir)
+                return
+            with stats.phase('mkdir'):
+                ensure_remote_dir(sftp, args.remote, tree)
+            if args.sync:
+                # Incremental: transfer only what changed since the last deploy.
+                sync_dir(sftp, args.local, args.remote, resolve_manifest_path(args.manifest), args.host,
+                         workers=args.workers, tree=tree, settings=settings, stats=stats)
+            else:
+                # Clear the remote directory before uploading (whitelist still applies),
+                # keeping partial large files so an interrupted upload resumes.
+                with stats.phase('clear'):
+                    clear_remote_dir(sftp, args.remote, tree, keep=partial_paths(args.local, args.remote, settings))
+                if args.transfer == 'tar' and upload_dir_tar(ssh, args.local, args.remote, gzip=args.gzip, stats=stats):
+                    # extracted behind SFTP's back: cached listings are stale
+                    tree.invalidate(args.remote)
+                else:
+                    upload_dir(sftp, args.local, args.remote, workers=args.workers, tree=tree, settings=settings,
+                               stats=stats)
             # Remove any empty remote subdirectories left over from traversal
             try:
-                remove_empty_remote_dirs(sftp, args.remote)
+                with stats.phase('prune'):
+                    remove_empty_remote_dirs(sftp, args.remote, tree)
             except Exception as e:
                 print(f'Warning: failed to prune empty remote directories: {e}')
+            if args.watch:
+                watch_dir(connect, ssh, sftp, args.local, args.remote, resolve_manifest_path(args.manifest), args.host,
+                          workers=args.workers, settings=settings, debounce=args.debounce, poll=args.poll)
         finally:
             sftp.close()
+            print(f'SFTP round trips: {counter.summary()}')
+            phases = ', '.join(f'{k} {v:.2f}s' for k, v in stats.phases.items())
+            print(f'Phases: {phases}')
+            if args.report:
+                write_report(stats.report(), args.report)
     finally:
         ssh.close()
 
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""Compare canvas captures against golden images, one per SVG and viewport.
+
+Requires: Pillow (and playwright for --capture).
+
+Usage:
+    python tools/visual_regress.py --capture --update   # record goldens
+    python tools/visual_regress.py --capture            # capture and compare
+    python tools/visual_regress.py --workers 8          # compare existing captures
+
+Captures are PNGs named '<svg>_<width>x<height>[@<dpr>x].png' (e.g.
+'butterfly_1200x800@2x.png', as tools/smoke_matrix.py also writes them);
+--capture renders every SVG in svgs/ at each
+--viewports entry through the dev server. Goldens are stored downscaled (at
+most --golden-max-edge pixels) in tools/visual/goldens/ together with
+index.json, which records the sha256 of the capture each golden was made
+from. A capture with that same hash is reported as unchanged without being
+decoded; the others are compared in a ProcessPoolExecutor:
+
+- perceptual (gates the run): share of pixels whose Gaussian-blurred
+  luminance differs by more than --perceptual-tolerance, checked against
+  --max-perceptual-ratio. Anti-aliasing noise and sub-pixel shifts stay
+  below it; visible changes do not.
+- per-pixel (hard limit): share of pixels whose largest channel difference
+  exceeds --pixel-tolerance, checked against the much looser
+  --max-diff-ratio. It catches changes spread too thinly for the
+  perceptual check, such as a slight colour shift over the whole image.
+
+A golden whose capture is missing also fails the run (delete the golden, or
+re-capture, when an SVG or viewport is dropped on purpose).
+
+Failing comparisons get a heatmap (changes in red over the dimmed golden) in
+tools/visual/report/, next to report.json. The exit status is 1 when any
+comparison fails.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, ImageChops, ImageFilter
+except ImportError:  # pragma: no cover - user will install locally
+    print('This script requires Pillow. Install with: pip install pillow')
+    raise
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import parse_viewports, viewport_label
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_VISUAL_DIR = os.path.join(ROOT, 'tools', 'visual')
+DEFAULT_CAPTURE_DIR = os.path.join(DEFAULT_VISUAL_DIR, 'captures')
+DEFAULT_GOLDEN_DIR = os.path.join(DEFAULT_VISUAL_DIR, 'goldens')
+DEFAULT_REPORT_DIR = os.path.join(DEFAULT_VISUAL_DIR, 'report')
+DEFAULT_SVG_DIR = os.path.join(ROOT, 'svgs')
+GOLDEN_INDEX = 'index.json'
+DEFAULT_VIEWPORTS = '1200x800,800x600,800x600@2x'
+DEFAULT_GOLDEN_MAX_EDGE = 512
+DEFAULT_WORKERS = os.cpu_count() or 4
+# per-pixel: a channel difference above this counts as a changed pixel
+DEFAULT_PIXEL_TOLERANCE = 16
+# loose on purpose: a 1px shift of the artwork changes ~1% of the pixels
+DEFAULT_MAX_DIFF_RATIO = 0.05
+# perceptual: blurred-luminance difference above this counts as a visible change
+DEFAULT_PERCEPTUAL_RADIUS = 1.5
+DEFAULT_PERCEPTUAL_TOLERANCE = 12
+DEFAULT_MAX_PERCEPTUAL_RATIO = 0.001
+
+CAPTURE_NAME_RE = re.compile(r'^(?P<svg>.+)_(?P<width>\d+)x(?P<height>\d+)(?:@(?P<dpr>\d+(?:\.\d+)?)x)?\.png$')
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def capture_name(svg: str, width: int, height: int, scale: float) -> str:
+    stem = os.path.splitext(os.path.basename(svg))[0]
+    return f'{stem}_{viewport_label(width, height, scale)}.png'
+
+
+def capture(svg_dir: str, out_dir: str, viewports: list) -> list:
+    """Render every SVG at every viewport into out_dir; returns the file names."""
+    from playwright.sync_api import sync_playwright
+    from warm_browser import AppBrowser
+
+    svgs = sorted(n for n in os.listdir(svg_dir) if n.lower().endswith('.svg'))
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    # warm pages from tools/browser_daemon.py when it runs, else a launched browser
+    with sync_playwright() as p, AppBrowser(p) as app:
+        for width, height, scale in viewports:
+            with app.page(width, height, scale) as page:
+                for svg in svgs:
+                    page.evaluate("""async (url) => {
+                        const text = await (await fetch(url)).text();
+                        const canvas = document.getElementById('main-canvas');
+                        window.MAFFIE.setLastSvg(text);
+                        await window.MAFFIE.drawSvgOnCanvas(text, canvas);
+                    }""", 'svgs/' + svg)
+                    name = capture_name(svg, width, height, scale)
+                    page.locator('#main-canvas').screenshot(path=os.path.join(out_dir, name))
+                    written.append(name)
+    print(f'Captured {len(written)} images into {out_dir}')
+    return written
+
+
+def _flatten(im: Image.Image) -> Image.Image:
+    if im.mode in ('RGBA', 'LA', 'P'):
+        im = im.convert('RGBA')
+        bg = Image.new('RGB', im.size, (255, 255, 255))
+        bg.paste(im, mask=im.getchannel('A'))
+        return bg
+    return im.convert('RGB')
+
+
+def golden_size(width: int, height: int, max_edge: int) -> tuple:
+    scale = min(1.0, max_edge / max(width, height)) if max_edge else 1.0
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def load_index(golden_dir: str) -> dict:
+    try:
+        with open(os.path.join(golden_dir, GOLDEN_INDEX), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'version': 1, 'goldens': {}}
+
+
+def save_index(golden_dir: str, index: dict) -> None:
+    os.makedirs(golden_dir, exist_ok=True)
+    with open(os.path.join(golden_dir, GOLDEN_INDEX), 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+
+
+def list_captures(capture_dir: str) -> list:
+    if not os.path.isdir(capture_dir):
+        return []
+    return sorted(n for n in os.listdir(capture_dir) if CAPTURE_NAME_RE.match(n))
+
+
+def update_goldens(capture_dir: str, golden_dir: str, max_edge: int = DEFAULT_GOLDEN_MAX_EDGE,
+                   names: list | None = None) -> int:
+    """Store downscaled goldens for the given captures (default: all); returns the count."""
+    index = load_index(golden_dir)
+    goldens = index.setdefault('goldens', {})
+    os.makedirs(golden_dir, exist_ok=True)
+    updated = 0
+    for name in names if names is not None else list_captures(capture_dir):
+        path = os.path.join(capture_dir, name)
+        digest = file_sha256(path)
+        entry = goldens.get(name)
+        if entry and entry.get('capture_sha256') == digest and \
+                os.path.exists(os.path.join(golden_dir, entry['golden'])):
+            continue
+        with Image.open(path) as im:
+            capture_size = im.size
+            im = _flatten(im)
+        size = golden_size(*capture_size, max_edge)
+        if size != capture_size:
+            im = im.resize(size, Image.LANCZOS)
+        golden_path = os.path.join(golden_dir, name)
+        im.save(golden_path, 'PNG', optimize=True)
+        goldens[name] = {
+            'golden': name,
+            'golden_sha256': file_sha256(golden_path),
+            'capture_sha256': digest,
+            'capture_size': list(capture_size),
+            'size': list(size),
+        }
+        updated += 1
+    save_index(golden_dir, index)
+    return updated
+
+
+def compare_one(job: dict) -> dict:
+    """Compare one capture against its golden (runs in a worker process)."""
+    started = time.perf_counter()
+    result = {'name': job['name'], 'status': 'pass'}
+    try:
+        with Image.open(job['golden_path']) as g:
+            golden = _flatten(g)
+        with Image.open(job['capture_path']) as c:
+            if c.size != tuple(job['capture_size']):
+                result.update(status='fail', reason=f'size {c.size[0]}x{c.size[1]} != '
+                              f"{job['capture_size'][0]}x{job['capture_size'][1]}")
+                return result
+            current = _flatten(c)
+        if current.size != golden.size:
+            current = current.resize(golden.size, Image.LANCZOS)
+        total = golden.size[0] * golden.size[1]
+
+        r, g, b = ImageChops.difference(current, golden).split()
+        magnitude = ImageChops.lighter(ImageChops.lighter(r, g), b)
+        hist = magnitude.histogram()
+        changed = sum(hist[job['pixel_tolerance'] + 1:])
+        result['diff_ratio'] = changed / total
+        result['max_diff'] = max((i for i, n in enumerate(hist) if n), default=0)
+        result['mean_diff'] = sum(i * n for i, n in enumerate(hist)) / total
+
+        blur = ImageFilter.GaussianBlur(job['perceptual_radius'])
+        luma = ImageChops.difference(current.convert('L').filter(blur), golden.convert('L').filter(blur))
+        result['perceptual_ratio'] = sum(luma.histogram()[job['perceptual_tolerance'] + 1:]) / total
+
+        failures = []
+        if result['diff_ratio'] > job['max_diff_ratio']:
+            failures.append('pixel')
+        if result['perceptual_ratio'] > job['max_perceptual_ratio']:
+            failures.append('perceptual')
+        if failures:
+            result['status'] = 'fail'
+            result['reason'] = ' and '.join(failures) + ' difference above tolerance'
+            heat = magnitude.point([min(255, v * 4) for v in range(256)])
+            base = golden.convert('L').point([96 + v * 5 // 8 for v in range(256)])
+            heatmap = Image.merge('RGB', (ImageChops.lighter(base, heat),
+                                          ImageChops.subtract(base, heat), ImageChops.subtract(base, heat)))
+            os.makedirs(os.path.dirname(job['heatmap_path']), exist_ok=True)
+            heatmap.save(job['heatmap_path'])
+            result['heatmap'] = job['heatmap_path']
+    except Exception as e:
+        result.update(status='error', reason=str(e))
+    finally:
+        result['ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def run_regression(capture_dir: str, golden_dir: str, report_dir: str, workers: int = DEFAULT_WORKERS,
+                   pixel_tolerance: int = DEFAULT_PIXEL_TOLERANCE, max_diff_ratio: float = DEFAULT_MAX_DIFF_RATIO,
+                   perceptual_radius: float = DEFAULT_PERCEPTUAL_RADIUS,
+                   perceptual_tolerance: int = DEFAULT_PERCEPTUAL_TOLERANCE,
+                   max_perceptual_ratio: float = DEFAULT_MAX_PERCEPTUAL_RATIO) -> dict:
+    """Compare every capture with its golden and return the report dict."""
+    started = time.perf_counter()
+    goldens = load_index(golden_dir).get('goldens', {})
+    captures = list_captures(capture_dir)
+    results = []
+    jobs = []
+    for name in captures:
+        entry = goldens.get(name)
+        path = os.path.join(capture_dir, name)
+        if entry is None:
+            results.append({'name': name, 'status': 'new'})
+            continue
+        if file_sha256(path) == entry.get('capture_sha256'):
+            results.append({'name': name, 'status': 'unchanged'})
+            continue
+        jobs.append({
+            'name': name,
+            'capture_path': path,
+            'golden_path': os.path.join(golden_dir, entry['golden']),
+            'capture_size': entry['capture_size'],
+            'heatmap_path': os.path.join(report_dir, 'heatmaps', name),
+            'pixel_tolerance': pixel_tolerance,
+            'max_diff_ratio': max_diff_ratio,
+            'perceptual_radius': perceptual_radius,
+            'perceptual_tolerance': perceptual_tolerance,
+            'max_perceptual_ratio': max_perceptual_ratio,
+        })
+    for name in sorted(set(goldens) - set(captures)):
+        results.append({'name': name, 'status': 'missing', 'reason': 'golden has no capture'})
+
+    if jobs:
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                chunksize = max(1, len(jobs) // (workers * 4))
+                results.extend(pool.map(compare_one, jobs, chunksize=chunksize))
+        else:
+            results.extend(compare_one(job) for job in jobs)
+
+    results.sort(key=lambda r: r['name'])
+    counts = {}
+    for r in results:
+        counts[r['status']] = counts.get(r['status'], 0) + 1
+    report = {
+        'captures': len(captures),
+        'compared': len(jobs),
+        'counts': counts,
+        'seconds': round(time.perf_counter() - started, 3),
+        'thresholds': {
+            'pixel_tolerance': pixel_tolerance,
+            'max_diff_ratio': max_diff_ratio,
+            'perceptual_radius': perceptual_radius,
+            'perceptual_tolerance': perceptual_tolerance,
+            'max_perceptual_ratio': max_perceptual_ratio,
+        },
+        'results': results,
+    }
+    os.makedirs(report_dir, exist_ok=True)
+    with open(os.path.join(report_dir, 'report.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1)
+    return report
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Visual regression against golden images')
+    p.add_argument('--captures', default=DEFAULT_CAPTURE_DIR, help='Capture directory (default tools/visual/captures)')
+    p.add_argument('--goldens', default=DEFAULT_GOLDEN_DIR, help='Golden directory (default tools/visual/goldens)')
+    p.add_argument('--report-dir', default=DEFAULT_REPORT_DIR, help='Report/heatmap directory (default tools/visual/report)')
+    p.add_argument('--capture', action='store_true', help='Render captures with Playwright before comparing')
+    p.add_argument('--svgs', default=DEFAULT_SVG_DIR, help='SVG directory for --capture (default svgs/)')
+    p.add_argument('--viewports', default=DEFAULT_VIEWPORTS,
+                   help="Comma-separated WxH[@<dpr>x] list for --capture (default '%(default)s')")
+    p.add_argument('--update', action='store_true', help='Store the captures as the new goldens instead of comparing')
+    p.add_argument('--golden-max-edge', type=int, default=DEFAULT_GOLDEN_MAX_EDGE,
+                   help='Longest golden edge in pixels (default %(default)s; 0 keeps full size)')
+    p.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Comparison processes (default: CPU count)')
+    p.add_argument('--pixel-tolerance', type=int, default=DEFAULT_PIXEL_TOLERANCE)
+    p.add_argument('--max-diff-ratio', type=float, default=DEFAULT_MAX_DIFF_RATIO)
+    p.add_argument('--perceptual-radius', type=float, default=DEFAULT_PERCEPTUAL_RADIUS)
+    p.add_argument('--perceptual-tolerance', type=int, default=DEFAULT_PERCEPTUAL_TOLERANCE)
+    p.add_argument('--max-perceptual-ratio', type=float, default=DEFAULT_MAX_PERCEPTUAL_RATIO)
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.capture:
+        try:
+            viewports = parse_viewports(args.viewports)
+        except ValueError as e:
+            print('ERROR:', e)
+            sys.exit(2)
+        capture(args.svgs, args.captures, viewports)
+    if args.update:
+        count = update_goldens(args.captures, args.goldens, args.golden_max_edge)
+        print(f'Updated {count} goldens in {args.goldens}')
+        return
+    report = run_regression(args.captures, args.goldens, args.report_dir, args.workers,
+                            args.pixel_tolerance, args.max_diff_ratio, args.perceptual_radius,
+                            args.perceptual_tolerance, args.max_perceptual_ratio)
+    for r in report['results']:
+        if r['status'] in ('fail', 'error', 'missing'):
+            print(f"{r['status'].upper()}: {r['name']}: {r.get('reason', '')}"
+                  + (f" (heatmap {r['heatmap']})" if r.get('heatmap') else ''))
+        elif r['status'] == 'new':
+            print(f"Warning: {r['name']} is a new capture without golden")
+    summary = ', '.join(f'{n} {s}' for s, n in sorted(report['counts'].items()))
+    print(f"{report['captures']} captures: {summary or 'nothing to compare'} in {report['seconds']:.2f}s")
+    print('Report written to', os.path.join(args.report_dir, 'report.json'))
+    if report['counts'].get('fail') or report['counts'].get('error') or report['counts'].get('missing'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
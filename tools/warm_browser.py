@@ -0,0 +1,227 @@
+"""Pages with the app loaded, from the warm browser daemon or a freshly launched browser.
+
+Shared by tools/smoke_playwright.py, tools/bench_render.py and
+tools/visual_regress.py. When tools/browser_daemon.py is running (its state
+file exists and its DevTools endpoint answers), AppBrowser attaches to that
+Chromium over CDP and leases one of its preloaded pages: no browser launch,
+no page load and no network-idle wait. A leased page is reset through
+MAFFIE.reset() when it is given back, so the next run starts from the
+just-loaded state without a reload; pages are reloaded only when index.html,
+css/ or js/ changed since they were loaded. Without a daemon (or with
+MAFFIE_NO_DAEMON=1, or an explicit url), a browser and an in-process
+tools/dev_server.py are started as before.
+
+    with sync_playwright() as p, AppBrowser(p) as app:
+        with app.page(1200, 800, dpr=2) as page:
+            ...
+"""
+from __future__ import annotations
+import contextlib
+import hashlib
+import json
+import os
+import uuid
+
+from common import RENDER_TIMEOUT_MS, RENDERED_AFTER
+from dev_server import ROOT, start_server, stop_server
+
+DEFAULT_STATE_FILE = os.path.join(ROOT, 'tools', '.browser_daemon.json')
+# files whose change makes a warm page stale (the page must be reloaded)
+APP_FILES = ('index.html', 'css', 'js')
+# a lease older than this is considered abandoned (client crashed) and is taken over
+LEASE_TTL_MS = 10 * 60 * 1000
+CONNECT_TIMEOUT_MS = 3000
+LOAD_TIMEOUT_MS = 15000
+# atomically claim a page: null when it is leased, else 'free' or 'stale' (taken over)
+LEASE_JS = """([token, ttl]) => {
+    const now = Date.now();
+    const lease = window.__maffieLease;
+    if (lease && now - lease.at < ttl) return null;
+    window.__maffieLease = { token: token, at: now };
+    return lease ? 'stale' : 'free';
+}"""
+RELEASE_JS = """(token) => {
+    if (window.__maffieLease && window.__maffieLease.token === token) delete window.__maffieLease;
+}"""
+
+
+def app_stamp(root: str = ROOT) -> str:
+    """Fingerprint (paths, sizes, mtimes) of the files a loaded page depends on."""
+    h = hashlib.sha256()
+    for name in APP_FILES:
+        path = os.path.join(root, name)
+        paths = [path] if os.path.isfile(path) else sorted(
+            os.path.join(d, f) for d, _, files in os.walk(path) for f in files)
+        for p in paths:
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            h.update(f'{os.path.relpath(p, root)}:{st.st_size}:{st.st_mtime_ns}\n'.encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def load_app(page, url: str, stamp: str | None = None) -> None:
+    """Navigate page to the app, wait for its first render and record the app stamp."""
+    page.goto(url, wait_until='networkidle', timeout=LOAD_TIMEOUT_MS)
+    page.wait_for_function(RENDERED_AFTER, arg=0, timeout=RENDER_TIMEOUT_MS)
+    page.evaluate('(stamp) => { window.__maffieStamp = stamp; }', stamp or app_stamp())
+
+
+def read_state(path: str = DEFAULT_STATE_FILE) -> dict | None:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('cdp_url') and state.get('app_url') else None
+
+
+def write_state(state: dict, path: str = DEFAULT_STATE_FILE) -> None:
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, path)
+
+
+class AppBrowser:
+    """Hands out app pages; see the module docstring.
+
+    url: test this already running server (no daemon, no in-process server).
+    use_daemon: False always launches a browser.
+    overlay: build directory for the in-process dev server (the daemon has
+    its own --overlay flag).
+    """
+
+    def __init__(self, playwright, url: str | None = None, use_daemon: bool = True,
+                 state_file: str = DEFAULT_STATE_FILE, quiet: bool = False, overlay: str | None = None):
+        self.playwright = playwright
+        self.url = url
+        self.overlay = overlay
+        self.use_daemon = use_daemon and not url and os.environ.get('MAFFIE_NO_DAEMON') != '1'
+        self.state_file = state_file
+        self.quiet = quiet
+        self.browser = None
+        self.server = None
+        self.warm = False
+
+    def _log(self, *args) -> None:
+        if not self.quiet:
+            print(*args)
+
+    def __enter__(self) -> 'AppBrowser':
+        state = read_state(self.state_file) if self.use_daemon else None
+        if state:
+            try:
+                self.browser = self.playwright.chromium.connect_over_cdp(state['cdp_url'], timeout=CONNECT_TIMEOUT_MS)
+                self.url = state['app_url']
+                self.warm = True
+                self._log('attached to browser daemon at', state['cdp_url'])
+                return self
+            except Exception as e:
+                self._log('browser daemon not reachable, launching a browser:', e)
+        if not self.url:
+            self.server = start_server(ROOT, port=0, overlay=self.overlay)
+            self.url = self.server.url
+        self.browser = self.playwright.chromium.launch(headless=True)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        try:
+            # a daemon browser is only disconnected from (when the driver stops), never closed
+            if self.browser is not None and not self.warm:
+                self.browser.close()
+        finally:
+            if self.server is not None:
+                stop_server(self.server)
+                self.server = None
+
+    @property
+    def version(self) -> str:
+        return self.browser.version if self.browser is not None else ''
+
+    @contextlib.contextmanager
+    def page(self, width: int = 1200, height: int = 800, dpr: float = 1, setup=None):
+        """Yield a page showing the app at width x height CSS pixels and dpr, first render done.
+
+        setup(page), if given, runs before the page is navigated or prepared
+        (e.g. to attach console listeners).
+        """
+        if not self.warm:
+            context = self.browser.new_context(viewport={'width': width, 'height': height}, device_scale_factor=dpr)
+            try:
+                page = context.new_page()
+                if setup is not None:
+                    setup(page)
+                load_app(page, self.url)
+                yield page
+            finally:
+                context.close()
+            return
+
+        page, token = self._lease()
+        cdp = None
+        try:
+            if setup is not None:
+                setup(page)
+            cdp = self._prepare(page, token, width, height, dpr)
+            yield page
+        finally:
+            self._release(page, token, cdp)
+
+    def _lease(self) -> tuple:
+        context = self.browser.contexts[0]
+        token = uuid.uuid4().hex
+        for page in context.pages:
+            if not page.url.startswith(self.url):
+                continue
+            try:
+                status = page.evaluate(LEASE_JS, [token, LEASE_TTL_MS])
+            except Exception:
+                continue
+            if status:
+                if status == 'stale':
+                    page.evaluate('() => window.MAFFIE.reset()')
+                return page, token
+        # every warm page is busy: add one to the daemon's pool
+        page = context.new_page()
+        load_app(page, self.url)
+        page.evaluate(LEASE_JS, [token, LEASE_TTL_MS])
+        return page, token
+
+    def _prepare(self, page, token: str, width: int, height: int, dpr: float):
+        stamp = app_stamp()
+        if page.evaluate('() => window.__maffieStamp') != stamp:
+            self._log('app files changed since the page was loaded; reloading it')
+            load_app(page, self.url, stamp)
+            page.evaluate(LEASE_JS, [token, LEASE_TTL_MS])
+        size = page.evaluate('() => [window.innerWidth, window.innerHeight]')
+        seen = page.evaluate('() => window.MAFFIE.renderState().completed')
+        page.set_viewport_size({'width': width, 'height': height})
+        cdp = None
+        if dpr != 1:
+            # contexts fix their device scale factor; override it on this page only
+            cdp = page.context.new_cdp_session(page)
+            cdp.send('Emulation.setDeviceMetricsOverride',
+                     {'width': width, 'height': height, 'deviceScaleFactor': dpr, 'mobile': False})
+        if size != [width, height]:
+            # let the debounced resize redraw land before the caller starts
+            try:
+                page.wait_for_function(RENDERED_AFTER, arg=seen, timeout=RENDER_TIMEOUT_MS)
+            except Exception:
+                pass
+        return cdp
+
+    def _release(self, page, token: str, cdp) -> None:
+        try:
+            if cdp is not None:
+                # back to the daemon context's scale factor, which is 1
+                size = page.viewport_size
+                cdp.send('Emulation.setDeviceMetricsOverride',
+                         {'width': size['width'], 'height': size['height'], 'deviceScaleFactor': 1, 'mobile': False})
+                cdp.detach()
+            page.evaluate('() => window.MAFFIE.reset()')
+            page.evaluate(RELEASE_JS, token)
+        except Exception as e:
+            # the lease expires after LEASE_TTL_MS and the page is reset on takeover
+            self._log('could not reset the leased page:', e)